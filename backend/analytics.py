@@ -5,7 +5,7 @@ Provides risk analysis, rebalancing suggestions, and optimization tools
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Optional
 from scipy import stats
 from datetime import datetime, timedelta
 
@@ -91,12 +91,22 @@ def suggest_rebalancing(current_allocation: pd.DataFrame, target_weights: Dict[s
     """
     Generate rebalancing recommendations based on target allocation
     """
-    suggestions = []
+    if not target_weights:
+        return []
     
-    for symbol, target_pct in target_weights.items():
-        current = current_allocation[current_allocation['Symbol'] == symbol]
-        
-        if len(current) == 0:
+    targets = pd.Series(target_weights, dtype=float)
+    current = current_allocation.drop_duplicates('Symbol').set_index('Symbol')['Assets (%)']
+    current_pct = current.reindex(targets.index)
+    held = current_pct.notna()
+    difference = targets - current_pct.fillna(0)
+    
+    # Held positions only get a suggestion if difference > 2%; missing ones are always bought
+    keep = ~held | (difference.abs() > 2)
+    
+    suggestions = []
+    for symbol in targets.index[keep.values]:
+        target_pct = target_weights[symbol]
+        if not held[symbol]:
             suggestions.append({
                 'symbol': symbol,
                 'action': 'BUY',
@@ -106,25 +116,162 @@ def suggest_rebalancing(current_allocation: pd.DataFrame, target_weights: Dict[s
                 'priority': 'HIGH' if target_pct > 5 else 'MEDIUM'
             })
         else:
-            current_pct = current['Assets (%)'].iloc[0]
-            difference = target_pct - current_pct
-            
-            if abs(difference) > 2:  # Only suggest if difference > 2%
-                suggestions.append({
-                    'symbol': symbol,
-                    'action': 'BUY' if difference > 0 else 'SELL',
-                    'current_weight': round(current_pct, 2),
-                    'target_weight': target_pct,
-                    'difference': round(abs(difference), 2),
-                    'priority': 'HIGH' if abs(difference) > 5 else 'MEDIUM'
-                })
+            diff = difference[symbol]
+            suggestions.append({
+                'symbol': symbol,
+                'action': 'BUY' if diff > 0 else 'SELL',
+                'current_weight': round(current_pct[symbol], 2),
+                'target_weight': target_pct,
+                'difference': round(abs(diff), 2),
+                'priority': 'HIGH' if abs(diff) > 5 else 'MEDIUM'
+            })
     
     return sorted(suggestions, key=lambda x: x['difference'], reverse=True)
 
 
-def identify_tax_loss_harvesting(holdings: pd.DataFrame, tax_threshold: float = -1000) -> List[Dict[str, Any]]:
+def generate_rebalancing_trades(
+    holdings: pd.DataFrame,
+    target_weights: Dict[str, float],
+    available_cash: float = 0.0,
+    prices: Dict[str, float] = None,
+    min_trade_value: float = 100.0,
+    lot_size: float = 1.0,
+    tolerance_band: float = 2.0,
+    tax_aware: bool = False,
+    max_realized_gain: float = None
+) -> Dict[str, Any]:
+    """
+    Generate a share-level trade list that moves holdings to target weights
+    
+    All positions are evaluated in one vectorized pass: weights are compared against
+    tolerance bands (in percentage points), orders are rounded down to whole lots,
+    trades under min_trade_value are dropped and buys are scaled to fit available cash
+    plus sale proceeds. Symbols held but absent from target_weights are sold in full.
+    With tax_aware, sells that harvest losses come first and gain-realizing sells are
+    trimmed so total realized gain stays under max_realized_gain.
+    """
+    if holdings.empty and not target_weights:
+        return {'trades': [], 'summary': {}}
+    
+    # Current positions by symbol
+    positions = pd.DataFrame({
+        'quantity': holdings['Quantity'].astype(float).values,
+        'value': holdings['Value ($)'].astype(float).values,
+        'gain': holdings['NFS G/L ($)'].astype(float).values if 'NFS G/L ($)' in holdings else 0.0
+    }, index=holdings['Symbol'].values).groupby(level=0).sum()
+    
+    symbols = positions.index.union(pd.Index(list(target_weights.keys())))
+    positions = positions.reindex(symbols, fill_value=0.0)
+    target_pct = pd.Series(target_weights, dtype=float).reindex(symbols, fill_value=0.0).values
+    
+    quantity = positions['quantity'].values
+    value = positions['value'].values
+    
+    # Prices: explicit quotes override implied position prices
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price = np.where(quantity > 0, value / quantity, np.nan)
+    if prices:
+        quoted = pd.Series(prices, dtype=float).reindex(symbols).values
+        price = np.where(np.isnan(quoted), price, quoted)
+        value = np.where(quantity > 0, quantity * price, value)
+    priced = np.isfinite(price) & (price > 0)
+    
+    total_value = value.sum() + available_cash
+    if total_value <= 0:
+        return {'trades': [], 'summary': {}}
+    
+    current_pct = value / total_value * 100
+    drift = current_pct - target_pct
+    
+    # Only positions outside the tolerance band trade; exits always trade
+    exiting = (target_pct == 0) & (quantity > 0)
+    needs_trade = ((np.abs(drift) > tolerance_band) | exiting) & priced
+    
+    target_value = target_pct / 100 * total_value
+    raw_shares = np.where(needs_trade, (target_value - value) / np.where(priced, price, 1.0), 0.0)
+    shares = np.trunc(raw_shares / lot_size) * lot_size
+    shares = np.where(exiting, -quantity, shares)
+    shares = np.maximum(shares, -quantity)
+    shares[np.abs(shares * np.nan_to_num(price)) < min_trade_value] = 0.0
+    
+    gain_per_share = np.divide(positions['gain'].values, quantity, out=np.zeros_like(quantity), where=quantity > 0)
+    
+    # Tax-aware: trim gain-realizing sells, largest gain per share last
+    if tax_aware and max_realized_gain is not None:
+        sells = np.flatnonzero(shares < 0)
+        order = sells[np.argsort(gain_per_share[sells], kind='stable')]
+        realized = -shares[order] * gain_per_share[order]
+        cumulative = np.cumsum(realized)
+        over = cumulative > max_realized_gain
+        if over.any():
+            first = np.argmax(over)
+            budget = max_realized_gain - (cumulative[first - 1] if first > 0 else 0.0)
+            idx = order[first]
+            allowed = np.trunc(budget / gain_per_share[idx] / lot_size) * lot_size if gain_per_share[idx] > 0 else 0.0
+            shares[idx] = -min(allowed, -shares[idx])
+            shares[order[first + 1:]] = np.where(gain_per_share[order[first + 1:]] > 0, 0.0, shares[order[first + 1:]])
+            shares[np.abs(shares * np.nan_to_num(price)) < min_trade_value] = 0.0
+    
+    # Cash constraint: buys cannot exceed cash plus sale proceeds
+    trade_value = shares * np.nan_to_num(price)
+    proceeds = -trade_value[trade_value < 0].sum()
+    buy_cost = trade_value[trade_value > 0].sum()
+    funds = available_cash + proceeds
+    if buy_cost > funds and buy_cost > 0:
+        scale = max(funds, 0.0) / buy_cost
+        buys = shares > 0
+        shares[buys] = np.floor(shares[buys] * scale / lot_size) * lot_size
+        shares[buys & (np.abs(shares * np.nan_to_num(price)) < min_trade_value)] = 0.0
+        trade_value = shares * np.nan_to_num(price)
+    
+    post_value = value + trade_value
+    post_pct = post_value / total_value * 100
+    realized_gain = np.where(shares < 0, -shares * gain_per_share, 0.0)
+    
+    trades = pd.DataFrame({
+        'symbol': symbols,
+        'action': np.where(shares > 0, 'BUY', 'SELL'),
+        'shares': shares,
+        'price': np.round(np.nan_to_num(price), 4),
+        'value': np.round(np.abs(trade_value), 2),
+        'current_weight': np.round(current_pct, 2),
+        'target_weight': np.round(target_pct, 2),
+        'post_trade_weight': np.round(post_pct, 2),
+        'drift': np.round(drift, 2),
+        'estimated_realized_gain': np.round(realized_gain, 2),
+        'gain_per_share': gain_per_share
+    })[shares != 0]
+    trades['shares'] = trades['shares'].abs()
+    
+    if tax_aware:
+        # Loss-harvesting sells first, then smallest gains; buys after all sells
+        trades = trades.sort_values(['action', 'gain_per_share'], ascending=[False, True], kind='stable')
+    else:
+        trades = trades.sort_values(['action', 'value'], ascending=[False, False], kind='stable')
+    
+    sell_value = trades.loc[trades['action'] == 'SELL', 'value'].sum()
+    buy_value = trades.loc[trades['action'] == 'BUY', 'value'].sum()
+    
+    return {
+        'trades': trades.drop(columns='gain_per_share').to_dict('records'),
+        'unpriced_symbols': [s for s, ok, t in zip(symbols, priced, target_pct) if not ok and t > 0],
+        'summary': {
+            'num_trades': len(trades),
+            'total_buy_value': round(float(buy_value), 2),
+            'total_sell_value': round(float(sell_value), 2),
+            'starting_cash': round(float(available_cash), 2),
+            'ending_cash': round(float(available_cash + sell_value - buy_value), 2),
+            'estimated_realized_gain': round(float(trades['estimated_realized_gain'].sum()), 2),
+            'max_drift_before': round(float(np.abs(drift).max()), 2) if len(drift) else 0.0,
+            'max_drift_after': round(float(np.abs(post_pct - target_pct).max()), 2) if len(drift) else 0.0
+        }
+    }
+
+
+def identify_tax_loss_harvesting(holdings: pd.DataFrame, tax_threshold: float = -1000, wash_sale_index=None, as_of=None) -> List[Dict[str, Any]]:
     """
     Identify tax loss harvesting opportunities
+    If a wash_sale.WashSaleIndex is given, suggestions are screened against recent purchases
     """
     opportunities = []
     
@@ -139,9 +286,14 @@ def identify_tax_loss_harvesting(holdings: pd.DataFrame, tax_threshold: float =
             'loss_percentage': round(holding['NFS G/L (%)'], 2),
             'holding_value': round(holding['Value ($)'], 2),
             'recommendation': 'Consider selling to realize loss for tax purposes',
-            'estimated_tax_benefit': round(abs(holding['NFS G/L ($)']) * 0.24, 2)  # Assuming 24% tax bracket
+            'estimated_tax_benefit': round(abs(holding['NFS G/L ($)']) * 0.24, 2),  # Assuming 24% tax bracket
+            **({'quantity': float(holding['Quantity'])} if pd.notna(holding.get('Quantity')) else {})
         })
-    
+
+    if wash_sale_index is not None:
+        from wash_sale import screen_harvest_opportunities
+        opportunities = screen_harvest_opportunities(opportunities, wash_sale_index, as_of)
+
     return sorted(opportunities, key=lambda x: x['current_loss'])
 
 
@@ -378,83 +530,73 @@ def calculate_performance_vs_weight(portfolio: pd.DataFrame) -> Dict[str, Any]:
         return {'points': [], 'trendline': None}
 
 
-def calculate_advanced_risk_analytics(portfolio: pd.DataFrame) -> Dict[str, Any]:
+def calculate_advanced_risk_analytics(
+    portfolio: pd.DataFrame,
+    cluster: bool = False,
+    dense_limit: int = 50
+) -> Dict[str, Any]:
     """
     Calculate advanced risk metrics including Monte Carlo and Correlation
+    across every holding, using a Ledoit-Wolf shrinkage covariance.
+
+    The correlation matrix is returned as a float32 upper triangle ('packed');
+    the dense 'values' list is included only for universes up to dense_limit.
     """
     try:
-        import yfinance as yf
         import numpy as np
         from datetime import datetime, timedelta
+        from price_history import get_price_store
+        from risk_models import ledoit_wolf_covariance, select_usable_assets, build_correlation_report
+        from monte_carlo import gbm_period_returns, generate_paths
         
-        # Get top 10 holdings by weight for analysis to keep performance reasonable
-        top_holdings = portfolio.nlargest(10, 'Assets (%)')
-        symbols = top_holdings['Symbol'].tolist()
-        weights = (top_holdings['Assets (%)'] / top_holdings['Assets (%)'].sum()).values
+        # Weight every holding (duplicates across accounts are merged)
+        holdings = portfolio.dropna(subset=['Symbol'])
+        holdings = holdings[holdings['Symbol'].astype(str).str.strip() != '']
+        asset_weights = holdings.groupby('Symbol', sort=False)['Assets (%)'].sum()
+        asset_weights = asset_weights[asset_weights > 0]
+        symbols = asset_weights.index.tolist()
         
         if not symbols:
             return {}
             
-        # Fetch historical data (1 year)
+        # Fetch historical data (1 year) in one batch through the shared price store
         end_date = datetime.now()
         start_date = end_date - timedelta(days=365)
         
-        # Download data
-        # Use ThreadPool to speed up if needed, but yfinance handles list well
-        hist_data = yf.download(symbols, start=start_date, end=end_date, progress=False)
-        
-        # Handle yfinance column structure (Adj Close preferred, else Close)
-        if 'Adj Close' in hist_data.columns:
-            hist_data = hist_data['Adj Close']
-        elif 'Close' in hist_data.columns:
-            hist_data = hist_data['Close']
-        else:
-            # Fallback for weird multi-index or single column cases
-            pass
+        store = get_price_store()
+        returns = store.get_returns(symbols, start_date, end_date)
         
-        if hist_data.empty:
+        if returns.empty:
             return {}
             
-        # Calculate daily returns
-        returns = hist_data.pct_change().dropna()
-        
-        # 1. Correlation Matrix
-        correlation_matrix = returns.corr().round(2)
-        corr_data = {
-            'labels': correlation_matrix.columns.tolist(),
-            'values': correlation_matrix.values.tolist()
-        }
+        # 1. Correlation Matrix (shrinkage estimate, always positive definite)
+        usable, excluded = select_usable_assets(returns)
+        if not usable:
+            return {}
+        
+        returns = returns[usable]
+        cov_values, shrinkage = ledoit_wolf_covariance(returns.values)
+        corr_data = build_correlation_report(cov_values, usable, shrinkage, cluster=cluster, dense_limit=dense_limit)
+        corr_data['excluded'] = excluded
+        
+        weights = (asset_weights[usable] / asset_weights[usable].sum()).values
         
         # 2. Monte Carlo Simulation
         # Simulation parameters
         num_simulations = 1000
         num_days = 252 # 1 trading year
         
-        # Portfolio stats
-        mean_returns = returns.mean()
-        cov_matrix = returns.cov()
-        
-        # Run simulation
-        # Cholesky decomposition for correlated random variables
-        try:
-            L = np.linalg.cholesky(cov_matrix)
-        except np.linalg.LinAlgError:
-            # Fallback if matrix is not positive definite (e.g. insufficient data)
-            return {'correlation_matrix': corr_data, 'monte_carlo': None}
+        # Portfolio stats: a weighted sum of correlated normals is normal with
+        # variance w' Sigma w, so the portfolio path needs no per-asset draws
+        mean_returns = returns.mean().fillna(0.0).values
+        port_mean = float(weights @ mean_returns)
+        port_vol = float(np.sqrt(max(weights @ cov_values @ weights, 0.0)))
         
-        portfolio_sims = np.zeros((num_simulations, num_days))
         initial_value = portfolio['Value ($)'].sum()
         
-        for i in range(num_simulations):
-            # Generate random shocks
-            daily_shocks = np.random.normal(0, 1, (len(symbols), num_days))
-            correlated_shocks = np.dot(L, daily_shocks)
-            
-            # Calculate portfolio daily returns
-            simulated_returns = np.dot(weights, correlated_shocks) + np.dot(weights, mean_returns.values[:, None])
-            
-            # Calculate cumulative value
-            portfolio_sims[i, :] = initial_value * np.cumprod(1 + simulated_returns)
+        daily_shocks = np.random.default_rng().standard_normal((num_simulations, num_days))
+        simulated_returns = gbm_period_returns(daily_shocks, port_mean, port_vol, 1.0)
+        portfolio_sims = generate_paths(initial_value, simulated_returns)[:, 1:]
             
         # Process simulation results for chart
         # We'll return percentiles (10th, 50th, 90th) to keep payload small
@@ -470,31 +612,22 @@ def calculate_advanced_risk_analytics(portfolio: pd.DataFrame) -> Dict[str, Any]
         
         # 3. Calculate Advanced Metrics (Sharpe, Beta)
         # Beta requires Market history
-        # Beta requires Market history
-        market_data_df = yf.download('SPY', start=start_date, end=end_date, progress=False)
-        if 'Adj Close' in market_data_df.columns:
-            market_data = market_data_df['Adj Close']
-        elif 'Close' in market_data_df.columns:
-            market_data = market_data_df['Close']
-        else:
-             market_data = market_data_df # Fallback, might work if it's series
-
-        # Ensure Series
-        if hasattr(market_data, 'squeeze'):
-            market_data = market_data.squeeze()
-
-        market_returns = market_data.pct_change().dropna()
+        market_returns = store.get_returns(['SPY'], start_date, end_date)
+        market_returns = market_returns['SPY'].dropna() if 'SPY' in market_returns else pd.Series(dtype=float)
+        
+        # Portfolio daily returns (weighted; missing history counts as flat)
+        portfolio_daily = returns.fillna(0.0).dot(weights)
         
-        # Portfolio daily returns (weighted)
         # Align dates
-        common_dates = returns.index.intersection(market_returns.index)
-        portfolio_daily = returns.loc[common_dates].dot(weights)
-        market_daily = market_returns.loc[common_dates]
+        common_dates = portfolio_daily.index.intersection(market_returns.index)
         
         # Beta
-        covariance = np.cov(portfolio_daily, market_daily)[0][1]
-        market_var = np.var(market_daily)
-        beta = float(covariance / market_var) if market_var != 0 else 1.0
+        beta = 1.0
+        if len(common_dates) > 1:
+            market_daily = market_returns.loc[common_dates]
+            covariance = np.cov(portfolio_daily.loc[common_dates], market_daily)[0][1]
+            market_var = np.var(market_daily, ddof=1)
+            beta = float(covariance / market_var) if market_var != 0 else 1.0
         
         # Sharpe (assume RF = 4% currently)
         rf_daily = 0.04 / 252
@@ -508,7 +641,8 @@ def calculate_advanced_risk_analytics(portfolio: pd.DataFrame) -> Dict[str, Any]
             'metrics': {
                 'beta': round(beta, 2),
                 'sharpe': round(sharpe, 2),
-                'volatility': round(std_dev * np.sqrt(252) * 100, 2) # Annualized %
+                'volatility': round(std_dev * np.sqrt(252) * 100, 2), # Annualized %
+                'holdings_analyzed': len(usable)
             }
         }
         
@@ -709,13 +843,19 @@ def compare_portfolios(current_df: pd.DataFrame, proposed_df: pd.DataFrame) -> D
         return {}
 
 
-def calculate_benchmark_comparison(portfolio: pd.DataFrame, benchmark_ticker: str = 'SPY', period: str = '1y') -> Dict[str, Any]:
+def calculate_benchmark_comparison(portfolio: pd.DataFrame, benchmark_ticker: Any = 'SPY', period: str = '1y') -> Dict[str, Any]:
     """
     Compare portfolio performance against a benchmark (e.g., S&P 500)
     Uses a 'backcast' assumption: assumes current holdings were held over the period.
+    The benchmark may be a blend such as 'SPY:60,AGG:40@Q' or an already parsed
+    BenchmarkBlend (see benchmark.parse_benchmark).
     """
     try:
         import yfinance as yf
+        from benchmark import BenchmarkBlend, parse_benchmark, get_benchmark_service
+        
+        benchmark = parse_benchmark(benchmark_ticker)
+        blend = benchmark if isinstance(benchmark, BenchmarkBlend) else None
         
         # 1. Filter valid assets (Stock/ETF/Crypto)
         # We can't easily get history for "My House" or "Cash" unless we track it manually.
@@ -731,7 +871,7 @@ def calculate_benchmark_comparison(portfolio: pd.DataFrame, benchmark_ticker: st
         weights = (valid_assets['Value ($)'] / total_investable_value).values
         
         # 2. Fetch Historical Data
-        tickers_to_fetch = symbols + [benchmark_ticker]
+        tickers_to_fetch = symbols + ([] if blend else [benchmark])
         
         # Calculate start date
         end_date = datetime.now()
@@ -784,8 +924,16 @@ def calculate_benchmark_comparison(portfolio: pd.DataFrame, benchmark_ticker: st
         portfolio_returns = returns.dot(aligned_weights)
         
         # Calculate benchmark returns
-        if benchmark_ticker in data.columns:
-            benchmark_returns = data[benchmark_ticker].pct_change().fillna(0)
+        if blend is not None:
+            # Memoized per blend definition, built from the cached component series
+            try:
+                blend_returns = get_benchmark_service().get_blended_returns(blend, start_date, end_date)
+            except ValueError as e:
+                print(f"Blended benchmark {blend.key} unavailable: {e}")
+                return {}
+            benchmark_returns = blend_returns.reindex(portfolio_returns.index).fillna(0)
+        elif benchmark in data.columns:
+            benchmark_returns = data[benchmark].pct_change().fillna(0)
         else:
             # Fallback if benchmark fails
             benchmark_returns = pd.Series(0, index=portfolio_returns.index)
@@ -811,18 +959,8 @@ def calculate_benchmark_comparison(portfolio: pd.DataFrame, benchmark_ticker: st
             'dates': dates,
             'portfolio': portfolio_vals,
             'benchmark': benchmark_vals,
-            'metrics': {
-                'portfolio_return': round(port_total_return, 2),
-                'benchmark_return': round(bench_total_return, 2),
-                'alpha': round(port_total_return - bench_total_return, 2)
-            }
-        }
-        
-    except Exception as e:
-        return {
-            'dates': dates,
-            'portfolio': portfolio_vals,
-            'benchmark': benchmark_vals,
+            'benchmark_ticker': blend.key if blend else benchmark,
+            'benchmark_name': blend.display_name if blend else benchmark,
             'metrics': {
                 'portfolio_return': round(port_total_return, 2),
                 'benchmark_return': round(bench_total_return, 2),
@@ -944,15 +1082,21 @@ def calculate_retirement_projection(
     portfolio: pd.DataFrame, 
     years: int = 30, 
     monthly_contribution: float = 0,
-    inflation_rate: float = 0.025
+    inflation_rate: float = 0.025,
+    num_simulations: int = 1000,
+    annual_increase: float = 0.0,
+    retirement_year: Optional[int] = None,
+    monthly_withdrawal: float = 0,
+    events: Optional[List[Dict[str, float]]] = None
 ) -> Dict[str, Any]:
     """
     Run a long-term Monte Carlo simulation for retirement planning.
-    Projects portfolio value with contributions and inflation.
+    Projects portfolio value with escalating contributions until retirement,
+    inflation-indexed withdrawals afterwards and one-off events ({year, amount}).
     """
     try:
         import numpy as np
-        import yfinance as yf
+        from monte_carlo import generate_paths, cash_flow_schedule, apply_depletion, depletion_summary
         
         # 1. Estimate Portfolio Stats (Return & Volatility)
         # We need investable assets only
@@ -995,46 +1139,41 @@ def calculate_retirement_projection(
         avg_vol *= 0.7
         
         # 2. Run Simulation
-        num_simulations = 1000
         months = years * 12
         monthly_return_mean = avg_return / 12
         monthly_vol = avg_vol / np.sqrt(12)
         
-        results = np.zeros((num_simulations, months))
-        
-        for i in range(num_simulations):
-            # Random monthly returns
-            # log-normal assumption
-            rand_returns = np.random.normal(monthly_return_mean, monthly_vol, months)
-            
-            val = total_value
-            for m in range(months):
-                val = val * (1 + rand_returns[m]) + monthly_contribution
-                # Inflation adjustment (nominal to real)? 
-                # Let's keep it nominal for now, or real if we assumed real returns.
-                # The assumption above (8%) is nominal.
-                results[i, m] = val
+        # Random monthly returns for every path at once, compounded with contributions
+        rand_returns = np.random.default_rng().normal(monthly_return_mean, monthly_vol, (num_simulations, months))
+        schedule = cash_flow_schedule(
+            months,
+            monthly_amount=monthly_contribution,
+            annual_increase=annual_increase,
+            retirement_month=retirement_year * 12 + 1 if retirement_year is not None else None,
+            monthly_withdrawal=monthly_withdrawal,
+            inflation_rate=inflation_rate,
+            events=[
+                {'month': max(int(round(event['year'] * 12)), 1), 'amount': event['amount']}
+                for event in events or []
+            ]
+        )
+        # Nominal values (the return assumptions above are nominal)
+        paths = generate_paths(total_value, rand_returns, schedule)
+        withdrawing = bool((schedule < 0).any())
+        if withdrawing:
+            paths = apply_depletion(paths)
+        results = paths[:, 1:]
                 
         # 3. Analyze Results
         final_values = results[:, -1]
         
         # Percentiles
-        p10 = np.percentile(final_values, 10)
-        p50 = np.percentile(final_values, 50)
-        p90 = np.percentile(final_values, 90)
+        p10, p50, p90 = np.percentile(final_values, [10, 50, 90])
         
         # Chart Data (decimated for speed)
         # Return annual points
         chart_labels = list(range(1, years + 1))
-        chart_p10 = []
-        chart_p50 = []
-        chart_p90 = []
-        
-        for y in range(years):
-            idx = (y + 1) * 12 - 1
-            chart_p10.append(np.percentile(results[:, idx], 10))
-            chart_p50.append(np.percentile(results[:, idx], 50))
-            chart_p90.append(np.percentile(results[:, idx], 90))
+        chart_p10, chart_p50, chart_p90 = np.percentile(results[:, 11::12], [10, 50, 90], axis=0)
             
         return {
             'years': years,
@@ -1052,7 +1191,8 @@ def calculate_retirement_projection(
                 'p10': [round(x, 2) for x in chart_p10],
                 'p50': [round(x, 2) for x in chart_p50],
                 'p90': [round(x, 2) for x in chart_p90]
-            }
+            },
+            **({'depletion': depletion_summary((paths <= 0).sum(axis=0), num_simulations)} if withdrawing else {})
         }
     except Exception as e:
         print(f"Error calculating retirement projection: {e}")
@@ -0,0 +1,289 @@
+"""
+Performance Attribution for VisionWealth
+Brinson-Fachler allocation/selection/interaction effects by sector or asset type,
+computed for every period at once with integer-coded segments and multi-period linking
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Any, Optional, Union
+from datetime import datetime, timedelta
+import logging
+
+from price_history import get_price_store
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# ========================================
+# CORE KERNELS
+# ========================================
+
+def segment_sums(values: np.ndarray, codes: np.ndarray, n_groups: int) -> np.ndarray:
+    """
+    Sum a (periods x assets) matrix into (periods x groups) with one bincount.
+
+    Args:
+        values: (T x N) values per period and asset
+        codes: (N,) integer segment code per asset
+        n_groups: Number of segments
+
+    Returns:
+        (T x n_groups) segment totals
+    """
+    periods = values.shape[0]
+    flat_index = (np.arange(periods)[:, None] * n_groups + codes[None, :]).ravel()
+    return np.bincount(flat_index, weights=values.ravel(), minlength=periods * n_groups).reshape(periods, n_groups)
+
+
+def drift_weights(initial_weights: np.ndarray, returns: np.ndarray) -> np.ndarray:
+    """
+    Beginning-of-period buy-and-hold weights for every period.
+
+    Args:
+        initial_weights: (N,) weights at the start of the first period
+        returns: (T x N) asset returns per period
+
+    Returns:
+        (T x N) weights, each row summing to 1
+    """
+    growth = np.vstack([np.ones(returns.shape[1]), np.cumprod(1.0 + returns[:-1], axis=0)])
+    weights = initial_weights[None, :] * growth
+    totals = weights.sum(axis=1, keepdims=True)
+    return np.divide(weights, totals, out=np.zeros_like(weights), where=totals != 0)
+
+
+def brinson_fachler(
+    port_weights: np.ndarray,
+    port_returns: np.ndarray,
+    port_codes: np.ndarray,
+    bench_weights: np.ndarray,
+    bench_returns: np.ndarray,
+    bench_codes: np.ndarray,
+    n_groups: int
+) -> Dict[str, np.ndarray]:
+    """
+    Single-period Brinson-Fachler effects for every period at once.
+
+    allocation  = (wp_g - wb_g) * (Rb_g - Rb)
+    selection   = wb_g * (Rp_g - Rb_g)
+    interaction = (wp_g - wb_g) * (Rp_g - Rb_g)
+
+    Segments the portfolio does not hold take the benchmark segment return;
+    segments absent from the benchmark take the total benchmark return, so
+    their active return lands in interaction. Effects sum to Rp - Rb per period.
+
+    Args:
+        port_weights: (T x N) portfolio weights per period
+        port_returns: (T x N) portfolio asset returns
+        port_codes: (N,) segment codes of portfolio assets
+        bench_weights: (T x M) benchmark weights per period
+        bench_returns: (T x M) benchmark asset returns
+        bench_codes: (M,) segment codes of benchmark assets
+        n_groups: Number of segments
+
+    Returns:
+        Dictionary of (T x G) arrays and (T,) total returns
+    """
+    wp = segment_sums(port_weights, port_codes, n_groups)
+    wb = segment_sums(bench_weights, bench_codes, n_groups)
+    cp = segment_sums(port_weights * port_returns, port_codes, n_groups)
+    cb = segment_sums(bench_weights * bench_returns, bench_codes, n_groups)
+
+    rp_total = cp.sum(axis=1)
+    rb_total = cb.sum(axis=1)
+
+    rb = np.where(wb != 0, cb / np.where(wb != 0, wb, 1.0), rb_total[:, None])
+    rp = np.where(wp != 0, cp / np.where(wp != 0, wp, 1.0), rb)
+
+    active_weight = wp - wb
+
+    return {
+        'portfolio_weight': wp,
+        'benchmark_weight': wb,
+        'portfolio_segment_return': rp,
+        'benchmark_segment_return': rb,
+        'allocation': active_weight * (rb - rb_total[:, None]),
+        'selection': wb * (rp - rb),
+        'interaction': active_weight * (rp - rb),
+        'portfolio_return': rp_total,
+        'benchmark_return': rb_total
+    }
+
+
+def linking_coefficients(
+    portfolio_returns: np.ndarray,
+    benchmark_returns: np.ndarray,
+    method: str = 'carino'
+) -> np.ndarray:
+    """
+    Per-period scaling factors that make single-period effects add up to the
+    compounded active return.
+
+    Args:
+        portfolio_returns: (T,) portfolio returns
+        benchmark_returns: (T,) benchmark returns
+        method: 'carino' (logarithmic smoothing) or 'grap'
+
+    Returns:
+        (T,) coefficients; multiply each period's effects and sum over periods
+    """
+    rp = np.asarray(portfolio_returns, dtype=float)
+    rb = np.asarray(benchmark_returns, dtype=float)
+
+    if method == 'grap':
+        # Compound prior periods at the portfolio return and later ones at the benchmark return
+        prior = np.concatenate(([1.0], np.cumprod(1.0 + rp)[:-1]))
+        later = np.concatenate((np.cumprod((1.0 + rb)[::-1])[::-1][1:], [1.0]))
+        return prior * later
+
+    def log_ratio(a, b):
+        diff = a - b
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = (np.log1p(a) - np.log1p(b)) / diff
+        return np.where(np.abs(diff) > 1e-12, ratio, 1.0 / (1.0 + b))
+
+    total_rp = np.prod(1.0 + rp) - 1.0
+    total_rb = np.prod(1.0 + rb) - 1.0
+
+    return log_ratio(rp, rb) / log_ratio(np.array(total_rp), np.array(total_rb))
+
+
+# ========================================
+# HIGH-LEVEL API
+# ========================================
+
+def _holdings_frame(
+    holdings: Union[pd.DataFrame, List[Dict[str, Any]]],
+    group_by: str,
+    weight_column: str
+) -> pd.DataFrame:
+    """Normalize holdings to Symbol / weight / group columns"""
+    df = holdings.copy() if isinstance(holdings, pd.DataFrame) else pd.DataFrame(list(holdings))
+    df = df.rename(columns={'symbol': 'Symbol', 'weight': weight_column, 'group': group_by})
+    if df.empty:
+        return pd.DataFrame(columns=['Symbol', group_by, weight_column])
+
+    df['Symbol'] = df['Symbol'].astype(str).str.upper().str.strip()
+    df[group_by] = df[group_by].fillna('Other').astype(str) if group_by in df.columns else 'Other'
+    df[weight_column] = pd.to_numeric(df[weight_column], errors='coerce').fillna(0.0)
+
+    return df[df[weight_column] > 0]
+
+
+def calculate_brinson_attribution(
+    portfolio: Union[pd.DataFrame, List[Dict[str, Any]]],
+    benchmark: Union[pd.DataFrame, List[Dict[str, Any]]],
+    group_by: str = 'Asset Type',
+    years: int = 5,
+    frequency: str = 'M',
+    returns: Optional[pd.DataFrame] = None,
+    linking: str = 'carino',
+    drift: bool = True
+) -> Dict[str, Any]:
+    """
+    Multi-period Brinson-Fachler attribution of a portfolio against a benchmark.
+
+    Args:
+        portfolio: Holdings with Symbol, 'Value ($)' and the group_by column
+        benchmark: Benchmark constituents with symbol, weight and group (or the group_by column)
+        group_by: Segment column, e.g. 'Asset Type' or 'Sector'
+        years: Look-back window when returns are fetched
+        frequency: 'M' monthly or 'W' weekly periods
+        returns: Optional returns panel (periods x symbols); fetched from the price store if omitted
+        linking: 'carino' or 'grap' multi-period linking
+        drift: Let weights drift with returns between periods (otherwise rebalance to initial weights)
+
+    Returns:
+        Dictionary with linked totals, per-segment effects and a per-period table
+    """
+    port = _holdings_frame(portfolio, group_by, 'Value ($)')
+    bench = _holdings_frame(benchmark, group_by, 'Value ($)')
+
+    if port.empty or bench.empty:
+        return {'group_by': group_by, 'groups': [], 'periods': {}, 'totals': {}}
+
+    port = port.groupby(['Symbol', group_by], sort=False, as_index=False)['Value ($)'].sum()
+    bench = bench.groupby(['Symbol', group_by], sort=False, as_index=False)['Value ($)'].sum()
+
+    if returns is None:
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=int(365.25 * years) + 31)
+        symbols = list(dict.fromkeys(port['Symbol'].tolist() + bench['Symbol'].tolist()))
+        returns = get_price_store().get_returns(symbols, start_date, end_date, frequency=frequency)
+
+    returns = returns.sort_index()
+    periods = returns.index
+
+    # Integer-code segments once over both sides
+    codes, groups = pd.factorize(pd.concat([port[group_by], bench[group_by]], ignore_index=True))
+    port_codes, bench_codes = codes[:len(port)], codes[len(port):]
+
+    # Missing history (pre-listing, unpriced) is treated as a flat return
+    port_returns = returns.reindex(columns=port['Symbol']).fillna(0.0).values
+    bench_returns = returns.reindex(columns=bench['Symbol']).fillna(0.0).values
+
+    port_w0 = (port['Value ($)'] / port['Value ($)'].sum()).values
+    bench_w0 = (bench['Value ($)'] / bench['Value ($)'].sum()).values
+
+    if drift:
+        port_weights = drift_weights(port_w0, port_returns)
+        bench_weights = drift_weights(bench_w0, bench_returns)
+    else:
+        port_weights = np.broadcast_to(port_w0, port_returns.shape)
+        bench_weights = np.broadcast_to(bench_w0, bench_returns.shape)
+
+    effects = brinson_fachler(
+        port_weights, port_returns, port_codes,
+        bench_weights, bench_returns, bench_codes, len(groups)
+    )
+
+    rp, rb = effects['portfolio_return'], effects['benchmark_return']
+    coefficients = linking_coefficients(rp, rb, method=linking)
+
+    linked = {
+        name: (effects[name] * coefficients[:, None]).sum(axis=0)
+        for name in ('allocation', 'selection', 'interaction')
+    }
+
+    total_rp = float(np.prod(1.0 + rp) - 1.0)
+    total_rb = float(np.prod(1.0 + rb) - 1.0)
+
+    group_rows = [
+        {
+            'group': str(group),
+            'allocation': round(float(linked['allocation'][g]), 6),
+            'selection': round(float(linked['selection'][g]), 6),
+            'interaction': round(float(linked['interaction'][g]), 6),
+            'total': round(float(linked['allocation'][g] + linked['selection'][g] + linked['interaction'][g]), 6),
+            'portfolio_weight': round(float(effects['portfolio_weight'][-1, g]), 6) if len(periods) else 0.0,
+            'benchmark_weight': round(float(effects['benchmark_weight'][-1, g]), 6) if len(periods) else 0.0
+        }
+        for g, group in enumerate(groups)
+    ]
+
+    period_labels = [p.strftime('%Y-%m-%d') for p in periods]
+
+    return {
+        'group_by': group_by,
+        'linking': linking,
+        'totals': {
+            'portfolio_return': round(total_rp, 6),
+            'benchmark_return': round(total_rb, 6),
+            'active_return': round(total_rp - total_rb, 6),
+            'allocation': round(float(linked['allocation'].sum()), 6),
+            'selection': round(float(linked['selection'].sum()), 6),
+            'interaction': round(float(linked['interaction'].sum()), 6)
+        },
+        'groups': group_rows,
+        'periods': {
+            'labels': period_labels,
+            'groups': [str(g) for g in groups],
+            'portfolio_return': np.round(rp, 6).tolist(),
+            'benchmark_return': np.round(rb, 6).tolist(),
+            'allocation': np.round(effects['allocation'], 6).tolist(),
+            'selection': np.round(effects['selection'], 6).tolist(),
+            'interaction': np.round(effects['interaction'], 6).tolist()
+        }
+    }
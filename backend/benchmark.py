@@ -7,9 +7,10 @@ performance comparison, and statistical analysis.
 import yfinance as yf
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Union
 from datetime import datetime, timedelta
 from functools import lru_cache
+from dataclasses import dataclass
 import logging
 from enum import Enum
 
@@ -51,6 +52,193 @@ BENCHMARK_NAMES = {
     "VNQ": "REITs"
 }
 
+# Rebalance frequency -> pandas period ('D' keeps weights constant, 'none' never rebalances)
+REBALANCE_FREQUENCIES = {'D': 'D', 'M': 'M', 'Q': 'Q', 'A': 'Y', 'none': None}
+
+PERIOD_DAYS = {
+    '1d': 1, '5d': 5, '1mo': 30, '3mo': 90, '6mo': 180, '6m': 180,
+    '1y': 365, '2y': 730, '5y': 1825, '10y': 3650
+}
+
+# First date requested for the 'max' period; each component's history starts where it does
+MAX_PERIOD_START = datetime(1990, 1, 1)
+
+
+def normalize_rebalance(rebalance: Optional[str]) -> str:
+    """
+    Canonical rebalance code, case-insensitive ('q' -> 'Q', 'None' -> 'none').
+
+    Args:
+        rebalance: Rebalance frequency code
+
+    Returns:
+        Key of REBALANCE_FREQUENCIES
+    """
+    code = str(rebalance).strip()
+    code = 'none' if code.lower() == 'none' else code.upper()
+    if code not in REBALANCE_FREQUENCIES:
+        raise ValueError(f"Unknown rebalance frequency: {rebalance}")
+    return code
+
+
+def period_start(period: str, end: datetime) -> datetime:
+    """
+    First date of a lookback period ending at end.
+
+    Args:
+        period: 'ytd', 'max' or a key of PERIOD_DAYS (case-insensitive)
+        end: Last date
+
+    Returns:
+        Start date
+    """
+    period = str(period).strip().lower()
+    if period == 'ytd':
+        return datetime(end.year, 1, 1)
+    if period == 'max':
+        return MAX_PERIOD_START
+    if period not in PERIOD_DAYS:
+        raise ValueError(f"Unknown period: {period}")
+    return end - timedelta(days=PERIOD_DAYS[period])
+
+
+# ========================================
+# BLENDED BENCHMARKS
+# ========================================
+
+@dataclass(frozen=True)
+class BenchmarkBlend:
+    """
+    Weighted blend of benchmark components, e.g. 60% SPY / 40% AGG rebalanced monthly.
+
+    Components are (symbol, weight) pairs with weights normalized to sum to 1,
+    sorted by symbol so equal definitions share one cache key.
+    """
+    components: Tuple[Tuple[str, float], ...]
+    rebalance: str = 'M'
+    name: Optional[str] = None
+
+    @classmethod
+    def create(cls, weights: Dict[str, float], rebalance: str = 'M', name: Optional[str] = None) -> 'BenchmarkBlend':
+        """
+        Build a normalized blend.
+
+        Args:
+            weights: Symbol (BenchmarkIndex member or any ticker) -> weight
+            rebalance: 'D', 'M', 'Q', 'A' or 'none' (any case)
+            name: Display name (default: generated from the components)
+
+        Returns:
+            BenchmarkBlend
+        """
+        rebalance = normalize_rebalance(rebalance)
+
+        merged: Dict[str, float] = {}
+        for symbol, weight in weights.items():
+            symbol = str(symbol).upper().strip()
+            if not symbol or weight < 0:
+                raise ValueError("Blend components need a symbol and a non-negative weight")
+            merged[symbol] = merged.get(symbol, 0.0) + float(weight)
+
+        total = sum(merged.values())
+        if total <= 0:
+            raise ValueError("Blend weights must sum to a positive value")
+
+        components = tuple(sorted((symbol, round(weight / total, 10)) for symbol, weight in merged.items() if weight > 0))
+        return cls(components=components, rebalance=rebalance, name=name)
+
+    @property
+    def symbols(self) -> List[str]:
+        return [symbol for symbol, _ in self.components]
+
+    @property
+    def weights(self) -> np.ndarray:
+        return np.array([weight for _, weight in self.components])
+
+    @property
+    def key(self) -> str:
+        """Canonical definition, e.g. 'AGG:0.4,SPY:0.6@M'"""
+        return ','.join(f"{symbol}:{weight:g}" for symbol, weight in self.components) + f"@{self.rebalance}"
+
+    @property
+    def display_name(self) -> str:
+        if self.name:
+            return self.name
+        return ' / '.join(f"{weight:.0%} {BENCHMARK_NAMES.get(symbol, symbol)}" for symbol, weight in self.components)
+
+
+def parse_benchmark(benchmark: Union[str, Dict[str, float], BenchmarkBlend]) -> Union[str, BenchmarkBlend]:
+    """
+    Normalize a benchmark argument to a ticker or a blend.
+
+    Strings like 'SPY:60,AGG:40' (optionally suffixed with '@Q' or '@q' for
+    the rebalance frequency) and symbol -> weight dicts become blends; plain
+    tickers are returned unchanged.
+
+    Args:
+        benchmark: Ticker, blend string, weights dict or BenchmarkBlend
+
+    Returns:
+        Ticker string or BenchmarkBlend
+    """
+    if isinstance(benchmark, BenchmarkBlend):
+        return benchmark
+    if isinstance(benchmark, dict):
+        return BenchmarkBlend.create(benchmark)
+
+    text = str(benchmark).strip()
+    if ':' not in text and ',' not in text and '@' not in text:
+        return text.upper()
+
+    definition, _, rebalance = text.partition('@')
+    weights = {}
+    for part in definition.split(','):
+        symbol, _, weight = part.partition(':')
+        weights[symbol] = weights.get(symbol, 0.0) + float(weight or 1.0)
+    return BenchmarkBlend.create(weights, rebalance=rebalance.strip() or 'M')
+
+
+def blended_returns(returns: np.ndarray, weights: np.ndarray, period_codes: np.ndarray) -> np.ndarray:
+    """
+    Daily returns of a blend rebalanced to its weights at the start of every period.
+
+    Within a period each component drifts buy-and-hold: the blend value is
+    w' G_t, where G_t is each component's growth since the period start
+    (cumulative growth divided by its value at the end of the previous
+    period), so no day-by-day loop is needed.
+
+    Args:
+        returns: (days x components) simple returns
+        weights: (components,) target weights summing to 1
+        period_codes: (days,) rebalance period label of each day
+
+    Returns:
+        (days,) blend returns
+    """
+    n_days = len(returns)
+    if n_days == 0:
+        return np.zeros(0)
+
+    growth = np.cumprod(1.0 + returns, axis=0)
+    starts = np.r_[True, period_codes[1:] != period_codes[:-1]]
+
+    # Index of the day before each day's period start (-1 for the first period)
+    previous_end = np.maximum.accumulate(np.where(starts, np.arange(n_days), 0)) - 1
+    base = np.where(previous_end[:, None] >= 0, growth[np.maximum(previous_end, 0)], 1.0)
+
+    value = (growth / base) @ weights
+    previous = np.r_[1.0, value[:-1]]
+    previous[starts] = 1.0
+    return value / previous - 1
+
+
+def rebalance_codes(index: pd.DatetimeIndex, rebalance: str) -> np.ndarray:
+    """Integer rebalance period of each date for a frequency in REBALANCE_FREQUENCIES"""
+    frequency = REBALANCE_FREQUENCIES[rebalance]
+    if frequency is None:
+        return np.zeros(len(index), dtype=np.int64)
+    return index.to_period(frequency).asi8
+
 
 # ========================================
 # BENCHMARK SERVICE
@@ -224,6 +412,113 @@ class BenchmarkService:
             logger.error(f"Error fetching benchmark data for {ticker}: {e}")
             return self._empty_response(ticker)
     
+    def get_blended_returns(
+        self,
+        blend: BenchmarkBlend,
+        start: datetime,
+        end: Optional[datetime] = None
+    ) -> pd.Series:
+        """
+        Daily returns of a blended benchmark, memoized per definition and date range.
+
+        Component series come from the shared price history store.
+
+        Args:
+            blend: Blend definition
+            start: First date
+            end: Last date (default today)
+
+        Returns:
+            Series of daily blend returns (fractions)
+        """
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end or datetime.now()).normalize()
+        cache_key = f"blend_{blend.key}_{start.date()}_{end.date()}"
+
+        cached = self._get_from_cache(cache_key)
+        if cached is not None:
+            return cached
+
+        from price_history import get_price_store
+
+        returns = get_price_store().get_returns(blend.symbols, start, end)
+        missing = [s for s in blend.symbols if s not in returns.columns]
+        if missing:
+            raise ValueError(f"No price history for blend components: {', '.join(missing)}")
+
+        # Days before a component's first price count as flat for that component
+        returns = returns[blend.symbols].dropna(how='all').fillna(0.0)
+        series = pd.Series(
+            blended_returns(returns.values, blend.weights, rebalance_codes(returns.index, blend.rebalance)),
+            index=returns.index,
+            name=blend.key
+        )
+
+        self._set_cache(cache_key, series)
+        return series
+
+    def get_blended_benchmark_data(self, blend: BenchmarkBlend, period: str = "1y") -> Dict[str, Any]:
+        """
+        Blended benchmark history in the shape of get_benchmark_data.
+
+        The blend is reported as an index level starting at 100.
+
+        Args:
+            blend: Blend definition
+            period: Time period (1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max)
+
+        Returns:
+            Dictionary with blended benchmark data and statistics
+        """
+        end = datetime.now()
+        start = period_start(period, end)
+
+        try:
+            returns = self.get_blended_returns(blend, start, end)
+        except Exception as e:
+            logger.error(f"Error building blended benchmark {blend.key}: {e}")
+            return self._empty_response(blend.key)
+
+        if returns.empty:
+            return self._empty_response(blend.key)
+
+        level = 100 * (1 + returns).cumprod()
+        # Base the index at 100 on the trading day before the first return
+        level = pd.concat([pd.Series([100.0], index=[returns.index[0] - pd.offsets.BDay(1)]), level])
+        daily_return = level.pct_change() * 100
+
+        period_return = level.iloc[-1] - 100
+        drawdown = (level / level.cummax() - 1) * 100
+        volatility = daily_return.std()
+
+        return {
+            'ticker': blend.key,
+            'name': blend.display_name,
+            'components': [{'ticker': s, 'name': BENCHMARK_NAMES.get(s, s), 'weight': w} for s, w in blend.components],
+            'rebalance': blend.rebalance,
+            'period': period,
+            'interval': '1d',
+            'dates': level.index.strftime('%Y-%m-%d').tolist(),
+            'close_prices': level.round(2).tolist(),
+            'pct_changes': (level - 100).round(2).tolist(),
+            'daily_returns': daily_return.round(2).fillna(0).tolist(),
+            'current_price': round(level.iloc[-1], 2),
+            'start_price': 100.0,
+            'period_return': round(period_return, 2),
+            'period_return_annualized': self._annualize_return(
+                period_return, period, (level.index[-1] - level.index[0]).days if period.lower() == 'max' else None
+            ),
+            'volatility': round(volatility, 2),
+            'volatility_annualized': round(volatility * np.sqrt(252), 2),
+            'max_price': round(level.max(), 2),
+            'min_price': round(level.min(), 2),
+            'avg_price': round(level.mean(), 2),
+            'max_drawdown': round(drawdown.min(), 2),
+            'sharpe_ratio': self._calculate_sharpe_ratio(daily_return.dropna()),
+            'data_points': len(level),
+            'fetched_at': datetime.now().isoformat()
+        }
+
     def _empty_response(self, ticker: str) -> Dict[str, Any]:
         """
         Return empty response structure.
@@ -245,13 +540,14 @@ class BenchmarkService:
             'error': 'No data available'
         }
     
-    def _annualize_return(self, period_return: float, period: str) -> float:
+    def _annualize_return(self, period_return: float, period: str, days: Optional[int] = None) -> float:
         """
         Annualize a period return.
         
         Args:
             period_return: Period return percentage
             period: Period string
+            days: Actual length of the period in days (overrides the period's nominal length)
         
         Returns:
             Annualized return percentage
@@ -263,7 +559,7 @@ class BenchmarkService:
             'ytd': (datetime.now() - datetime(datetime.now().year, 1, 1)).days
         }
         
-        days = period_days.get(period, 365)
+        days = days if days is not None else period_days.get(period, 365)
         years = days / 365
         
         if years == 0:
@@ -347,7 +643,7 @@ class BenchmarkService:
         self,
         portfolio_dates: List[str],
         portfolio_values: List[float],
-        benchmark_ticker: str = "SPY",
+        benchmark_ticker: Union[str, Dict[str, float], BenchmarkBlend] = "SPY",
         period: str = "1y"
     ) -> Dict[str, Any]:
         """
@@ -356,17 +652,24 @@ class BenchmarkService:
         Args:
             portfolio_dates: List of portfolio dates
             portfolio_values: List of portfolio values
-            benchmark_ticker: Benchmark ticker
+            benchmark_ticker: Benchmark ticker, or a blend ('SPY:60,AGG:40@M', weights dict or BenchmarkBlend)
             period: Time period
         
         Returns:
             Comparison analysis
         """
         try:
-            logger.info(f"Comparing portfolio to {benchmark_ticker}")
+            benchmark = parse_benchmark(benchmark_ticker)
             
             # Get benchmark data
-            benchmark_data = self.get_benchmark_data(benchmark_ticker, period)
+            if isinstance(benchmark, BenchmarkBlend):
+                benchmark_data = self.get_blended_benchmark_data(benchmark, period)
+                benchmark_ticker = benchmark.key
+            else:
+                benchmark_data = self.get_benchmark_data(benchmark, period)
+                benchmark_ticker = benchmark
+            
+            logger.info(f"Comparing portfolio to {benchmark_ticker}")
             
             if not benchmark_data.get('dates'):
                 return {'error': 'Benchmark data not available'}
@@ -627,6 +930,18 @@ class BenchmarkService:
 # CONVENIENCE FUNCTIONS
 # ========================================
 
+# Singleton instance
+_service_instance = None
+
+
+def get_benchmark_service() -> BenchmarkService:
+    """Get or create BenchmarkService singleton (shares memoized blends across callers)"""
+    global _service_instance
+    if _service_instance is None:
+        _service_instance = BenchmarkService()
+    return _service_instance
+
+
 def get_sp500_data(period: str = "1y") -> Dict[str, Any]:
     """
     Convenience function to get S&P 500 data.
@@ -671,6 +986,12 @@ __all__ = [
     'BenchmarkService',
     'BenchmarkIndex',
     'BENCHMARK_NAMES',
+    'BenchmarkBlend',
+    'parse_benchmark',
+    'normalize_rebalance',
+    'period_start',
+    'blended_returns',
+    'get_benchmark_service',
     'get_sp500_data',
     'compare_to_sp500'
 ]
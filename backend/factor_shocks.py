@@ -0,0 +1,412 @@
+"""
+Hypothetical Factor Shocks for VisionWealth
+Maps holdings to market, rate, credit, currency, commodity and sector exposures and
+applies parametric shocks ("tech -20%, rates +100bp, USD +5%") to many portfolios at
+once as one sparse matrix product, with results cached per portfolio version
+"""
+
+import numpy as np
+from scipy import sparse
+from typing import Dict, List, Any, Optional, Tuple, Union
+from collections import OrderedDict
+import threading
+import hashlib
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# ========================================
+# FACTORS
+# ========================================
+
+SECTORS = [
+    'technology', 'healthcare', 'financials', 'consumer_discretionary', 'consumer_staples', 'energy',
+    'industrials', 'materials', 'utilities', 'real_estate', 'communication_services'
+]
+
+# Sector labels as they appear in imports and market data -> canonical sector
+SECTOR_ALIASES = {
+    'tech': 'technology', 'information technology': 'technology',
+    'health care': 'healthcare', 'financial services': 'financials', 'financial': 'financials',
+    'consumer cyclical': 'consumer_discretionary', 'consumer discretionary': 'consumer_discretionary',
+    'consumer defensive': 'consumer_staples', 'consumer staples': 'consumer_staples',
+    'basic materials': 'materials', 'real estate': 'real_estate',
+    'communication services': 'communication_services', 'communications': 'communication_services',
+    'telecommunications': 'communication_services'
+}
+
+# Equity, commodity, sector and USD shocks are relative moves (-0.2 = -20%);
+# rates and credit shocks are in basis points
+FACTORS = ['equity', 'rates', 'credit', 'usd', 'commodities'] + [f'sector:{s}' for s in SECTORS]
+FACTOR_INDEX = {factor: i for i, factor in enumerate(FACTORS)}
+
+DEFAULT_DURATION = {'bond': 6.0, 'tips': 7.0, 'cash': 0.0}
+CREDIT_KEYWORDS = ('corporate', 'high yield', 'credit', 'junk')
+
+SHOCK_SCENARIOS: Dict[str, Dict[str, Any]] = {
+    'risk_committee_base': {
+        'name': 'Tech -20%, rates +100bp, USD +5%',
+        'shocks': {'sector:technology': -0.20, 'rates': 100, 'usd': 0.05}
+    },
+    'equity_crash': {
+        'name': 'Equity crash',
+        'shocks': {'equity': -0.30, 'credit': 200}
+    },
+    'tech_selloff': {
+        'name': 'Technology sell-off',
+        'shocks': {'sector:technology': -0.20, 'sector:communication_services': -0.10}
+    },
+    'rates_up_100bp': {
+        'name': 'Rates +100bp',
+        'shocks': {'rates': 100}
+    },
+    'rates_down_100bp': {
+        'name': 'Rates -100bp',
+        'shocks': {'rates': -100}
+    },
+    'credit_widening': {
+        'name': 'Credit spreads +150bp',
+        'shocks': {'credit': 150, 'equity': -0.05}
+    },
+    'usd_rally': {
+        'name': 'USD +10%',
+        'shocks': {'usd': 0.10}
+    },
+    'stagflation': {
+        'name': 'Stagflation',
+        'shocks': {'equity': -0.15, 'rates': 150, 'commodities': 0.20, 'sector:energy': 0.10}
+    }
+}
+
+
+def canonical_sector(sector: Optional[str]) -> Optional[str]:
+    """Canonical sector name, or None when the label is unknown"""
+    text = (sector or '').lower().strip()
+    if not text:
+        return None
+    text = SECTOR_ALIASES.get(text, text)
+    key = text.replace(' ', '_')
+    return key if key in SECTORS else None
+
+
+def asset_class(asset_type: Optional[str]) -> str:
+    """Coarse asset class (equity, international, bond, tips, real_estate, commodity, cash) of an asset type"""
+    text = (asset_type or '').lower()
+    for keywords, label in (
+        (('cash', 'money market'), 'cash'),
+        (('tips', 'inflation'), 'tips'),
+        (('bond', 'fixed income', 'treasury', 'debt', 'credit', 'municipal'), 'bond'),
+        (('reit', 'real estate'), 'real_estate'),
+        (('gold', 'precious', 'commodit'), 'commodity'),
+        (('international', 'foreign', 'emerging', 'global', 'developed'), 'international'),
+    ):
+        if any(keyword in text for keyword in keywords):
+            return label
+    return 'equity'
+
+
+def holding_exposures(
+    asset_type: Optional[str] = None,
+    sector: Optional[str] = None,
+    currency: Optional[str] = 'USD',
+    beta: Optional[float] = None,
+    duration: Optional[float] = None
+) -> Dict[str, float]:
+    """
+    Factor exposures of one dollar of a holding.
+
+    Equities load on the market (beta, default 1) and their sector; bonds
+    lose duration x 1bp per basis point of rates, plus the same for credit
+    when corporate; international assets and non-USD holdings lose value
+    one-for-one as the dollar rises.
+
+    Args:
+        asset_type: Holding asset type, e.g. 'Stock', 'Bond', 'International ETF'
+        sector: Holding sector
+        currency: Holding currency
+        beta: Market beta override
+        duration: Duration override in years
+
+    Returns:
+        Mapping of factor name to exposure per dollar
+    """
+    kind = asset_class(asset_type)
+    exposures: Dict[str, float] = {}
+
+    if kind in ('equity', 'international', 'real_estate'):
+        exposures['equity'] = 1.0 if beta is None else float(beta)
+        canonical = 'real_estate' if kind == 'real_estate' else canonical_sector(sector)
+        if canonical:
+            exposures[f'sector:{canonical}'] = 1.0
+    elif kind in ('bond', 'tips'):
+        years = DEFAULT_DURATION[kind] if duration is None else float(duration)
+        exposures['rates'] = -years / 10000
+        if any(keyword in (asset_type or '').lower() for keyword in CREDIT_KEYWORDS):
+            exposures['credit'] = -years / 10000
+    elif kind == 'commodity':
+        exposures['commodities'] = 1.0
+
+    if kind == 'international' or (currency or 'USD').upper() != 'USD':
+        exposures['usd'] = -1.0
+
+    return exposures
+
+
+def shock_matrix(scenarios: Optional[List[Union[str, Dict[str, Any]]]] = None) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """
+    Scenario x factor shock matrix.
+
+    Args:
+        scenarios: Library keys and/or custom {name, shocks: {factor: shock}} (default: whole library)
+
+    Returns:
+        Tuple of (scenario descriptors, (scenarios x factors) shocks)
+    """
+    descriptors, rows = [], []
+    for scenario in scenarios or list(SHOCK_SCENARIOS):
+        if isinstance(scenario, str):
+            if scenario not in SHOCK_SCENARIOS:
+                raise ValueError(f"Unknown shock scenario: {scenario}")
+            key, definition = scenario, SHOCK_SCENARIOS[scenario]
+        else:
+            definition = scenario
+            key = definition.get('key') or definition.get('name')
+            if not key:
+                raise ValueError("Custom shock scenarios need a name")
+
+        row = np.zeros(len(FACTORS))
+        for factor, shock in definition['shocks'].items():
+            if factor not in FACTOR_INDEX:
+                raise ValueError(f"Unknown shock factor: {factor}")
+            row[FACTOR_INDEX[factor]] = float(shock)
+
+        descriptors.append({'scenario': key, 'name': definition.get('name', key), 'shocks': dict(definition['shocks'])})
+        rows.append(row)
+
+    return descriptors, np.array(rows).reshape(len(rows), len(FACTORS))
+
+
+# ========================================
+# CORE KERNELS
+# ========================================
+
+def _holding_row(holding: Dict[str, Any]) -> tuple:
+    """(symbol, value, asset type, sector, currency, beta, duration) of a holding"""
+    metadata = holding.get('metadata') or {}
+    value = holding.get('value')
+    if value is None:
+        value = float(holding.get('quantity') or 0.0) * float(holding.get('price') or 0.0)
+    return (
+        str(holding.get('symbol') or holding.get('ticker') or ''),
+        round(float(value), 2),
+        holding.get('asset_type') or '',
+        holding.get('sector') or '',
+        (holding.get('currency') or 'USD').upper(),
+        metadata.get('beta'),
+        metadata.get('duration')
+    )
+
+
+def _version(rows: List[tuple]) -> str:
+    return hashlib.sha256('\n'.join(sorted(map(repr, rows))).encode()).hexdigest()
+
+
+def portfolio_version(holdings: List[Dict[str, Any]]) -> str:
+    """
+    Content address of a portfolio's holdings.
+
+    Any change to a position's value or classification changes the version;
+    holding order does not.
+
+    Args:
+        holdings: Holdings with ticker/symbol, value (or quantity and price) and classification
+
+    Returns:
+        Hex digest
+    """
+    return _version([_holding_row(h) for h in holdings])
+
+
+def _exposures(portfolio_rows: List[List[tuple]]) -> np.ndarray:
+    profiles: Dict[tuple, int] = {}
+    rows, columns, values = [], [], []
+    for p, holdings in enumerate(portfolio_rows):
+        for row in holdings:
+            if row[1] == 0:
+                continue
+            rows.append(p)
+            columns.append(profiles.setdefault(row[2:], len(profiles)))
+            values.append(row[1])
+
+    V = sparse.csr_matrix((values, (rows, columns)), shape=(len(portfolio_rows), len(profiles)))
+
+    e_rows, e_columns, e_values = [], [], []
+    for profile, index in profiles.items():
+        for factor, exposure in holding_exposures(*profile).items():
+            e_rows.append(index)
+            e_columns.append(FACTOR_INDEX[factor])
+            e_values.append(exposure)
+    E = sparse.csr_matrix((e_values, (e_rows, e_columns)), shape=(len(profiles), len(FACTORS)))
+
+    return (V @ E).toarray()
+
+
+def exposure_matrix(portfolios: List[List[Dict[str, Any]]]) -> np.ndarray:
+    """
+    (portfolios x factors) dollar exposures as one sparse product.
+
+    Holdings are grouped into profiles (asset type, sector, currency, beta,
+    duration) so exposures are derived once per profile; the sparse
+    portfolio x profile value matrix V is then multiplied by the sparse
+    profile x factor matrix E.
+
+    Args:
+        portfolios: Holdings per portfolio
+
+    Returns:
+        (portfolios x factors) dollar exposures
+    """
+    return _exposures([[_holding_row(h) for h in holdings] for holdings in portfolios])
+
+
+# ========================================
+# ENGINE
+# ========================================
+
+class ShockEngine:
+    """
+    Applies factor shock scenarios to many portfolios with per-version caching.
+
+    Features:
+    - Exposures cached per portfolio version (content hash of its holdings)
+    - P&L rows cached per (portfolio version, scenario set)
+    - Exposures of all uncached versions from one sparse (portfolios x profiles) @ (profiles x factors) product
+    """
+
+    def __init__(self, max_entries: int = 200_000):
+        """
+        Initialize shock engine.
+
+        Args:
+            max_entries: LRU bound on cached exposure and P&L rows each
+        """
+        self.max_entries = max_entries
+        self._exposures: OrderedDict = OrderedDict()
+        self._results: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def clear_cache(self):
+        """Drop all cached exposures and results"""
+        with self._lock:
+            self._exposures.clear()
+            self._results.clear()
+
+    def _remember(self, cache: OrderedDict, key: Any, value: Any):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.max_entries:
+            cache.popitem(last=False)
+
+    def run(
+        self,
+        portfolios: Dict[Any, List[Dict[str, Any]]],
+        scenarios: Optional[List[Union[str, Dict[str, Any]]]] = None,
+        include_exposures: bool = False
+    ) -> Dict[str, Any]:
+        """
+        P&L of every portfolio under every scenario.
+
+        Args:
+            portfolios: Mapping of portfolio id to its holdings
+            scenarios: Library keys and/or custom {name, shocks} (default: whole library)
+            include_exposures: Include each portfolio's non-zero factor exposures
+
+        Returns:
+            Dictionary with scenarios, per-portfolio P&L, firm-wide totals and cache statistics
+        """
+        descriptors, shocks = shock_matrix(scenarios)
+        shock_key = hashlib.sha256(shocks.tobytes()).hexdigest()
+
+        ids = list(portfolios)
+        holding_rows = [[_holding_row(h) for h in portfolios[pid]] for pid in ids]
+        versions = [_version(rows) for rows in holding_rows]
+        values = np.array([sum(row[1] for row in rows) for rows in holding_rows])
+
+        with self._lock:
+            cached = [self._results.get((version, shock_key)) for version in versions]
+            known = {v: self._exposures[v] for v in set(versions) if v in self._exposures}
+
+        missing = [i for i, row in enumerate(cached) if row is None]
+        first = {}
+        for i in missing:
+            if versions[i] not in known:
+                first.setdefault(versions[i], i)
+        if first:
+            fresh = _exposures([holding_rows[i] for i in first.values()])
+            known.update(zip(first, fresh))
+
+        pnl = np.empty((len(ids), len(descriptors)))
+        if missing:
+            pnl[missing] = np.array([known[versions[i]] for i in missing]) @ shocks.T
+        for i, row in enumerate(cached):
+            if row is not None:
+                pnl[i] = row
+
+        with self._lock:
+            for v in first:
+                self._remember(self._exposures, v, known[v])
+            for i in missing:
+                self._remember(self._results, (versions[i], shock_key), pnl[i].copy())
+
+        returns = np.divide(pnl, values[:, None], out=np.zeros_like(pnl), where=values[:, None] != 0)
+        scenario_keys = [d['scenario'] for d in descriptors]
+        rounded_pnl, rounded_returns = np.round(pnl, 2).tolist(), np.round(returns, 6).tolist()
+
+        rows = []
+        for i, pid in enumerate(ids):
+            row = {
+                'portfolio_id': pid,
+                'version': versions[i][:16],
+                'value': round(float(values[i]), 2),
+                'pnl': dict(zip(scenario_keys, rounded_pnl[i])),
+                'return': dict(zip(scenario_keys, rounded_returns[i]))
+            }
+            if include_exposures:
+                exposure = known.get(versions[i])
+                if exposure is None:
+                    exposure = _exposures([holding_rows[i]])[0]
+                row['exposures'] = {FACTORS[j]: round(float(exposure[j]), 2) for j in np.flatnonzero(exposure)}
+            rows.append(row)
+
+        total_value = float(values.sum())
+        totals = pnl.sum(axis=0)
+
+        return {
+            'factors': FACTORS,
+            'scenarios': [
+                {
+                    **d,
+                    'total_pnl': round(float(totals[s]), 2),
+                    'total_return': round(float(totals[s] / total_value), 6) if total_value else 0.0,
+                    'worst_portfolio': ids[int(np.argmin(pnl[:, s]))] if ids else None
+                }
+                for s, d in enumerate(descriptors)
+            ],
+            'portfolios': rows,
+            'total_value': round(total_value, 2),
+            'cache': {'hits': len(ids) - len(missing), 'computed': len(missing)}
+        }
+
+
+# Singleton instance
+_engine_instance = None
+
+
+def get_shock_engine() -> ShockEngine:
+    """Get or create ShockEngine singleton"""
+    global _engine_instance
+    if _engine_instance is None:
+        _engine_instance = ShockEngine()
+    return _engine_instance
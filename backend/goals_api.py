@@ -13,6 +13,8 @@ from datetime import datetime, timedelta
 from enum import Enum
 import logging
 
+import numpy as np
+
 from db import get_db
 from models import Goal, User, Portfolio, GoalStatus
 from auth import get_current_active_user
@@ -23,6 +25,15 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Paths shared by every goal in a batch projection
+GOAL_SIMULATION_PATHS = 2000
+GOAL_SIMULATION_SEED = 42
+# Longest horizon simulated (goals further out are projected to this cap)
+GOAL_MAX_MONTHS = 600
+# Annual volatility assumed per goal risk level
+GOAL_VOLATILITY = {'low': 0.06, 'medium': 0.12, 'high': 0.18}
+DEFAULT_GOAL_VOLATILITY = 0.12
+
 
 # ========================================
 # ENUMS
@@ -143,6 +154,9 @@ class GoalResponse(BaseModel):
     months_remaining: Optional[int] = None
     days_remaining: Optional[int] = None
     projected_value: Optional[float] = None
+    probability_of_success: Optional[float] = None
+    projected_value_p10: Optional[float] = None
+    projected_value_p90: Optional[float] = None
     on_track: Optional[bool] = None
     
     class Config:
@@ -174,12 +188,199 @@ class GoalProjection(BaseModel):
     will_reach_goal: bool
     shortfall_or_surplus: float
     recommendation: str
+    probability_of_success: Optional[float] = None
+    projected_value_p10: Optional[float] = None
+    projected_value_p90: Optional[float] = None
 
 
 # ========================================
 # HELPER FUNCTIONS
 # ========================================
 
+def months_between(start: datetime, ends: List[Optional[datetime]]) -> np.ndarray:
+    """
+    Whole calendar months from start to each end date (-1 where there is no date).
+    
+    Args:
+        start: Reference date
+        ends: End dates
+    
+    Returns:
+        Integer array of months, floored at 0
+    """
+    known = np.array([end is not None for end in ends], dtype=bool)
+    parts = np.array(
+        [(end.year, end.month, end.day) if end is not None else (start.year, start.month, start.day) for end in ends],
+        dtype=int
+    ).reshape(-1, 3)
+    
+    months = (parts[:, 0] - start.year) * 12 + (parts[:, 1] - start.month) - (parts[:, 2] < start.day)
+    return np.where(known, np.maximum(months, 0), -1)
+
+
+def future_value(
+    current: np.ndarray,
+    contribution: np.ndarray,
+    annual_return: np.ndarray,
+    months: np.ndarray
+) -> np.ndarray:
+    """
+    Future value of the current amount plus end-of-month contributions,
+    compounded monthly at annual_return / 12.
+    """
+    monthly_rate = annual_return / 12
+    compound = (1 + monthly_rate) ** months
+    safe_rate = np.where(monthly_rate > 0, monthly_rate, 1.0)
+    annuity = np.where(monthly_rate > 0, (compound - 1) / safe_rate, months)
+    return current * compound + contribution * annuity
+
+
+def simulate_goal_values(
+    current: np.ndarray,
+    contribution: np.ndarray,
+    annual_return: np.ndarray,
+    volatility: np.ndarray,
+    months: np.ndarray,
+    num_paths: int = GOAL_SIMULATION_PATHS,
+    random_seed: Optional[int] = GOAL_SIMULATION_SEED
+) -> np.ndarray:
+    """
+    Simulated values of many goals at their own horizons on shared return paths.
+    
+    One matrix of standard normals W drives every goal. A goal's growth is
+    G_t = exp(drift * t + vol * sqrt(dt) * W_t) and its value is
+    G_m * (current + contribution * D_m) with D_m = sum_{s<=m} 1 / G_s.
+    Drift is deterministic, so goals are grouped by volatility only and
+    every goal's D_m in a group comes from one product:
+    exp(-vol * sqrt(dt) * W) (paths x months) @ a masked (months x goals)
+    matrix of exp(-drift_g * s). Monthly log drift is set so the mean path
+    matches the deterministic projection.
+    
+    Args:
+        current: (G,) current values
+        contribution: (G,) monthly contributions (end of month)
+        annual_return: (G,) expected annual returns (monthly compounding)
+        volatility: (G,) annual volatilities
+        months: (G,) horizons in months (0 = now)
+        num_paths: Number of shared paths
+        random_seed: Seed of the shared draws
+    
+    Returns:
+        (num_paths x G) simulated values
+    """
+    values = np.broadcast_to(current.astype(float), (num_paths, len(current))).copy()
+    horizon = int(months.max(initial=0))
+    if horizon == 0:
+        return values
+    
+    dt = 1 / 12
+    brownian = np.cumsum(np.random.default_rng(random_seed).standard_normal((num_paths, horizon)), axis=1)
+    steps = np.arange(1, horizon + 1)
+    
+    for vol in np.unique(volatility):
+        members = np.flatnonzero((volatility == vol) & (months > 0))
+        if len(members) == 0:
+            continue
+        
+        # Only as many months as the group's longest goal
+        span = int(months[members].max())
+        horizons = months[members]
+        drift = np.log1p(annual_return[members] * dt) - 0.5 * vol ** 2 * dt
+        shock = vol * np.sqrt(dt) * brownian[:, :span]
+        
+        # (span x goals) deterministic discount factors, zeroed past each goal's horizon
+        weights = np.exp(-np.outer(steps[:span], drift))
+        weights[steps[:span, None] > horizons] = 0.0
+        discounted = np.exp(-shock) @ weights
+        
+        growth = np.exp(drift * horizons + shock[:, horizons - 1])
+        values[:, members] = growth * (current[members] + contribution[members] * discounted)
+    
+    return values
+
+
+def project_goals(
+    goals: List[Goal],
+    now: Optional[datetime] = None,
+    simulate: bool = True,
+    num_paths: int = GOAL_SIMULATION_PATHS
+) -> List[Dict[str, Any]]:
+    """
+    Calculate metrics for a batch of goals in one array computation.
+    
+    Deterministic projections use the closed-form future value of the
+    current amount plus an end-of-month annuity; probabilities of reaching
+    each target come from shared simulated return paths.
+    
+    Args:
+        goals: Goal objects
+        now: Reference time (default: now, UTC)
+        simulate: Add Monte Carlo probability of success and value range
+        num_paths: Simulated paths shared by all goals
+    
+    Returns:
+        One metrics dictionary per goal, in input order
+    """
+    if not goals:
+        return []
+    
+    now = now or datetime.utcnow()
+    
+    current = np.array([goal.current_value or 0.0 for goal in goals], dtype=float)
+    target = np.array([goal.target_value for goal in goals], dtype=float)
+    contribution = np.array([goal.monthly_contribution or 0.0 for goal in goals], dtype=float)
+    annual_return = np.array([goal.expected_return or 0.0 for goal in goals], dtype=float)
+    volatility = np.array([
+        GOAL_VOLATILITY.get(str(getattr(goal, 'risk_level', None) or '').lower(), DEFAULT_GOAL_VOLATILITY)
+        for goal in goals
+    ])
+    
+    target_dates = [goal.target_date for goal in goals]
+    start_dates = [goal.start_date for goal in goals]
+    has_date = np.array([date is not None for date in target_dates])
+    
+    progress_pct = np.divide(current, target, out=np.zeros_like(current), where=target > 0) * 100
+    months = months_between(now, target_dates)
+    days = np.array([(date - now).days if date is not None else 0 for date in target_dates])
+    
+    # On track if within 10% of the progress expected from elapsed time
+    dated = has_date & np.array([start is not None for start in start_dates])
+    total_days = np.array([(t - s).days if d else 0 for t, s, d in zip(target_dates, start_dates, dated)])
+    elapsed_days = np.array([(now - s).days if d else 0 for s, d in zip(start_dates, dated)])
+    expected_progress = np.divide(elapsed_days, total_days, out=np.zeros(len(goals)), where=total_days > 0) * 100
+    on_track = progress_pct >= expected_progress * 0.9
+    
+    # Deterministic projection (goals without contributions are carried at their current value)
+    horizon = np.where(has_date & (contribution > 0), months, 0).clip(0, GOAL_MAX_MONTHS)
+    projected = np.where(horizon > 0, future_value(current, contribution, annual_return, horizon), current)
+    
+    if simulate:
+        simulation_months = np.where(has_date, months, 0).clip(0, GOAL_MAX_MONTHS)
+        simulated = simulate_goal_values(current, contribution, annual_return, volatility, simulation_months, num_paths)
+        probability = (simulated >= target).mean(axis=0)
+        p10, p90 = np.percentile(simulated, [10, 90], axis=0)
+    
+    metrics = []
+    for i in range(len(goals)):
+        goal_metrics = {
+            'progress_pct': float(progress_pct[i]),
+            'amount_needed': float(max(0.0, target[i] - current[i])),
+            'days_remaining': int(max(0, days[i])) if has_date[i] else None,
+            'months_remaining': int(months[i]) if has_date[i] else None,
+            'on_track': bool(on_track[i]) if dated[i] and total_days[i] > 0 else None,
+            'projected_value': float(projected[i])
+        }
+        if simulate:
+            goal_metrics.update(
+                probability_of_success=float(probability[i]),
+                projected_value_p10=float(p10[i]),
+                projected_value_p90=float(p90[i])
+            )
+        metrics.append(goal_metrics)
+    
+    return metrics
+
+
 def calculate_goal_metrics(goal: Goal) -> Dict[str, Any]:
     """
     Calculate comprehensive metrics for a goal.
@@ -190,68 +391,103 @@ def calculate_goal_metrics(goal: Goal) -> Dict[str, Any]:
     Returns:
         Dictionary with calculated metrics
     """
-    metrics = {}
+    return project_goals([goal])[0]
+
+
+def months_to_reach(
+    current: np.ndarray,
+    target: np.ndarray,
+    contribution: np.ndarray,
+    annual_return: np.ndarray
+) -> np.ndarray:
+    """
+    Months of contributions (with monthly compounding) needed to reach each target.
     
-    # Calculate progress percentage
-    if goal.target_value > 0:
-        metrics['progress_pct'] = (goal.current_value / goal.target_value) * 100
-    else:
-        metrics['progress_pct'] = 0
+    Solves current * (1+r)^n + c * ((1+r)^n - 1) / r = target for n; goals
+    that can never get there report 0.
+    """
+    r = annual_return / 12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        compounded = np.log((target * r + contribution) / (current * r + contribution)) / np.log1p(r)
+        linear = (target - current) / contribution
+    months = np.where(r > 0, compounded, linear)
+    months = np.where(current >= target, 0, months)
+    return np.where(np.isfinite(months) & (months > 0), np.ceil(months), 0).astype(int)
+
+
+def goal_recommendation(
+    will_reach: bool,
+    shortfall_or_surplus: float,
+    target_value: float,
+    months_remaining: int,
+    probability: Optional[float] = None
+) -> str:
+    """Plain-language recommendation for a goal projection"""
+    odds = f" (estimated {probability:.0%} chance of success)" if probability is not None else ""
+    if will_reach:
+        if shortfall_or_surplus > target_value * 0.1:
+            return f"Great! You're on track to exceed your goal{odds}. Consider reducing contributions or setting a more ambitious target."
+        return f"You're on track to reach your goal{odds}. Keep up the good work!"
     
-    # Calculate amount needed
-    metrics['amount_needed'] = max(0, goal.target_value - goal.current_value)
+    shortfall = abs(shortfall_or_surplus)
+    additional_monthly = shortfall / months_remaining if months_remaining > 0 else shortfall
+    return f"You may fall short by ${shortfall:,.2f}{odds}. Consider increasing monthly contributions by ${additional_monthly:,.2f}."
+
+
+def build_goal_projections(goals: List[Goal]) -> List[GoalProjection]:
+    """
+    Projections for a batch of goals from one vectorized computation.
     
-    # Calculate time remaining
-    if goal.target_date:
-        now = datetime.utcnow()
-        delta = goal.target_date - now
-        metrics['days_remaining'] = max(0, delta.days)
-        metrics['months_remaining'] = max(0, int(delta.days / 30))
-    else:
-        metrics['days_remaining'] = None
-        metrics['months_remaining'] = None
+    Args:
+        goals: Goal objects
+    
+    Returns:
+        One GoalProjection per goal, in input order
+    """
+    metrics = project_goals(goals)
+    undated = [i for i, goal in enumerate(goals) if not goal.target_date]
     
-    # Calculate if on track
-    if goal.target_date and goal.start_date:
-        total_days = (goal.target_date - goal.start_date).days
-        elapsed_days = (datetime.utcnow() - goal.start_date).days
+    # Goals without a target date are projected over the months needed to reach them
+    if undated:
+        current = np.array([goals[i].current_value or 0.0 for i in undated], dtype=float)
+        contribution = np.array([goals[i].monthly_contribution or 0.0 for i in undated], dtype=float)
+        annual_return = np.array([goals[i].expected_return or 0.0 for i in undated], dtype=float)
+        estimate = months_to_reach(
+            current, np.array([goals[i].target_value for i in undated], dtype=float), contribution, annual_return
+        ).clip(0, GOAL_MAX_MONTHS)
+        projected = future_value(current, contribution, annual_return, estimate)
+        for i, months, value in zip(undated, estimate, projected):
+            metrics[i]['months_remaining'] = int(months)
+            metrics[i]['projected_value'] = float(value)
+    
+    projections = []
+    for goal, goal_metrics in zip(goals, metrics):
+        months_remaining = goal_metrics['months_remaining'] or 0
+        projected_value = goal_metrics['projected_value']
+        will_reach = projected_value >= goal.target_value
+        shortfall_or_surplus = projected_value - goal.target_value
+        probability = goal_metrics['probability_of_success'] if goal.target_date else None
         
-        if total_days > 0:
-            expected_progress = (elapsed_days / total_days) * 100
-            actual_progress = metrics['progress_pct']
-            
-            # On track if within 10% of expected progress
-            metrics['on_track'] = actual_progress >= (expected_progress * 0.9)
-        else:
-            metrics['on_track'] = None
-    else:
-        metrics['on_track'] = None
-    
-    # Project future value with contributions
-    if goal.target_date and goal.monthly_contribution > 0:
-        months_remaining = metrics.get('months_remaining', 0)
-        if months_remaining and months_remaining > 0:
-            # Future value calculation with monthly contributions
-            monthly_rate = goal.expected_return / 12
-            
-            # FV of current amount
-            fv_current = goal.current_value * ((1 + monthly_rate) ** months_remaining)
-            
-            # FV of monthly contributions (annuity)
-            if monthly_rate > 0:
-                fv_contributions = goal.monthly_contribution * (
-                    (((1 + monthly_rate) ** months_remaining) - 1) / monthly_rate
-                )
-            else:
-                fv_contributions = goal.monthly_contribution * months_remaining
-            
-            metrics['projected_value'] = fv_current + fv_contributions
-        else:
-            metrics['projected_value'] = goal.current_value
-    else:
-        metrics['projected_value'] = goal.current_value
+        projections.append(GoalProjection(
+            goal_id=goal.id,
+            goal_name=goal.name,
+            current_value=goal.current_value,
+            target_value=goal.target_value,
+            monthly_contribution=goal.monthly_contribution,
+            expected_return=goal.expected_return,
+            months_to_goal=months_remaining,
+            projected_final_value=projected_value,
+            will_reach_goal=will_reach,
+            shortfall_or_surplus=shortfall_or_surplus,
+            recommendation=goal_recommendation(
+                will_reach, shortfall_or_surplus, goal.target_value, months_remaining, probability
+            ),
+            probability_of_success=probability,
+            projected_value_p10=goal_metrics['projected_value_p10'] if goal.target_date else None,
+            projected_value_p90=goal_metrics['projected_value_p90'] if goal.target_date else None
+        ))
     
-    return metrics
+    return projections
 
 
 def update_goal_status(goal: Goal, db: Session):
@@ -449,10 +685,9 @@ async def get_goals(
         # Get goals
         goals = query.limit(limit).all()
         
-        # Calculate metrics for each goal
+        # Metrics for every goal in one vectorized projection
         response_goals = []
-        for goal in goals:
-            metrics = calculate_goal_metrics(goal)
+        for goal, metrics in zip(goals, project_goals(goals)):
             goal_response = GoalResponse.from_orm(goal)
             
             for key, value in metrics.items():
@@ -531,6 +766,39 @@ async def get_goals_summary(
         )
 
 
+@router.get("/goals/projections", response_model=List[GoalProjection], tags=["Goals"])
+async def get_goal_projections(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+    is_active: Optional[bool] = Query(None, description="Filter by active status"),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """
+    Get projections for all of the user's goals in one request.
+    
+    Every goal is projected in a single array computation, with the
+    probability of reaching each target estimated on shared simulated
+    return paths.
+    
+    **Returns**: One projection per goal, by priority
+    """
+    try:
+        query = db.query(Goal).filter(Goal.user_id == current_user.id)
+        if is_active is not None:
+            query = query.filter(Goal.is_active == is_active)
+        
+        goals = query.order_by(Goal.priority.asc()).limit(limit).all()
+        
+        return build_goal_projections(goals)
+    
+    except Exception as e:
+        logger.error(f"Failed to calculate goal projections: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to calculate projections: {str(e)}"
+        )
+
+
 @router.get("/goals/{goal_id}", response_model=GoalResponse, tags=["Goals"])
 async def get_goal(
     goal_id: int,
@@ -731,61 +999,7 @@ async def get_goal_projection(
                 detail="Goal not found"
             )
         
-        # Calculate projection
-        if goal.target_date:
-            months_remaining = max(0, int((goal.target_date - datetime.utcnow()).days / 30))
-        else:
-            # Estimate months needed
-            if goal.monthly_contribution > 0:
-                amount_needed = goal.target_value - goal.current_value
-                months_remaining = int(amount_needed / goal.monthly_contribution)
-            else:
-                months_remaining = 0
-        
-        # Calculate projected value
-        if months_remaining > 0 and goal.monthly_contribution > 0:
-            monthly_rate = goal.expected_return / 12
-            
-            fv_current = goal.current_value * ((1 + monthly_rate) ** months_remaining)
-            
-            if monthly_rate > 0:
-                fv_contributions = goal.monthly_contribution * (
-                    (((1 + monthly_rate) ** months_remaining) - 1) / monthly_rate
-                )
-            else:
-                fv_contributions = goal.monthly_contribution * months_remaining
-            
-            projected_value = fv_current + fv_contributions
-        else:
-            projected_value = goal.current_value
-        
-        will_reach = projected_value >= goal.target_value
-        shortfall_or_surplus = projected_value - goal.target_value
-        
-        # Generate recommendation
-        if will_reach:
-            if shortfall_or_surplus > goal.target_value * 0.1:
-                recommendation = "Great! You're on track to exceed your goal. Consider reducing contributions or setting a more ambitious target."
-            else:
-                recommendation = "You're on track to reach your goal. Keep up the good work!"
-        else:
-            shortfall = abs(shortfall_or_surplus)
-            additional_monthly = shortfall / months_remaining if months_remaining > 0 else shortfall
-            recommendation = f"You may fall short by ${shortfall:,.2f}. Consider increasing monthly contributions by ${additional_monthly:,.2f}."
-        
-        return GoalProjection(
-            goal_id=goal.id,
-            goal_name=goal.name,
-            current_value=goal.current_value,
-            target_value=goal.target_value,
-            monthly_contribution=goal.monthly_contribution,
-            expected_return=goal.expected_return,
-            months_to_goal=months_remaining,
-            projected_final_value=projected_value,
-            will_reach_goal=will_reach,
-            shortfall_or_surplus=shortfall_or_surplus,
-            recommendation=recommendation
-        )
+        return build_goal_projections([goal])[0]
     
     except HTTPException:
         raise
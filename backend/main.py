@@ -67,7 +67,7 @@ from auth import get_current_active_user, get_current_user, get_optional_user
 import monte_carlo_api
 
 from ai_service import AIService
-from benchmark import BenchmarkService
+from benchmark import BenchmarkService, parse_benchmark
 from latex_generator import LatexReportGenerator
 
 
@@ -1834,10 +1834,16 @@ async def analyze_portfolio(
 async def get_portfolio_analytics(
     request: Request,
     portfolio_id: int,
-    benchmark: str = Query("SPY", description="Benchmark ticker"),
-    period: str = Query("1y", description="Analysis period")
+    benchmark: str = Query("SPY", description="Benchmark ticker or blend, e.g. SPY:60,AGG:40@Q"),
+    period: str = Query("1y", description="Analysis period"),
+    cluster: bool = Query(False, description="Order the correlation matrix by hierarchical clusters")
 ):
     """Generate analytics for a saved portfolio from database."""
+    try:
+        benchmark_spec = parse_benchmark(benchmark)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid benchmark: {e}")
+    
     try:
         session = next(db_module.get_session())
         p = session.get(db_module.Portfolio, portfolio_id)
@@ -1893,14 +1899,24 @@ async def get_portfolio_analytics(
         analytics_data = {}
         try:
             analytics_data['risk_metrics'] = analytics.calculate_risk_metrics(df)
-            analytics_data['advanced_risk'] = analytics.calculate_advanced_risk_analytics(df)
+            analytics_data['advanced_risk'] = analytics.calculate_advanced_risk_analytics(df, cluster=cluster)
             analytics_data['sector_allocation'] = analytics.generate_sector_allocation(df)
+        except Exception as e:
+            logger.warning(f"Some analytics failed: {e}")
+        
+        try:
             analytics_data['benchmark_comparison'] = analytics.calculate_benchmark_comparison(
-                df, benchmark_ticker=benchmark, period=period
+                df, benchmark_ticker=benchmark_spec, period=period
             )
+        except Exception as e:
+            logger.warning(f"Benchmark comparison failed: {e}")
+            analytics_data['benchmark_comparison'] = {}
+        
+        try:
             analytics_data['dividend_calendar'] = analytics.calculate_dividend_calendar(df)
         except Exception as e:
-            logger.warning(f"Some analytics failed: {e}")
+            logger.warning(f"Dividend calendar failed: {e}")
+            analytics_data['dividend_calendar'] = {}
         
         response = {
             'success': True,
@@ -4,16 +4,42 @@ Predicts portfolio outcomes using historical data and probability distributions
 """
 
 import numpy as np
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Callable
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from functools import lru_cache
+import threading
+import warnings
+import base64
 import logging
-from datetime import datetime
-from dataclasses import dataclass
+import os
+from datetime import datetime, timedelta
+from dataclasses import dataclass, replace
 from enum import Enum
 
+from monte_carlo_regimes import fit_regime_model, portfolio_regime_model, describe_regime_model, regime_period_returns
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Above this many path cells (~160MB of float64) simulations stream by default
+STREAMING_AUTO_CELLS = 20_000_000
+
+# Chunks in the first round of an adaptive (precision-targeted) run
+ADAPTIVE_MIN_CHUNKS = 4
+
+# Worker processes used for simulation chunks (1 = run in-process)
+DEFAULT_WORKERS = int(os.getenv("MONTE_CARLO_WORKERS", 1))
+
+# Percentile bands reported in time_series
+BAND_LEVELS = [0.05, 0.25, 0.50, 0.75, 0.95]
+
+
+class SimulationCancelled(Exception):
+    """Raised when a running simulation observes its cancellation flag"""
+
+
 class DistributionType(str, Enum):
     """Types of probability distributions"""
     NORMAL = "normal"
@@ -22,11 +48,44 @@ class DistributionType(str, Enum):
     HISTORICAL = "historical"
 
 
+class VarianceReduction(str, Enum):
+    """Variance reduction schemes for shock generation"""
+    NONE = "none"
+    ANTITHETIC = "antithetic"
+    SOBOL = "sobol"
+
+
 class SimulationMethod(str, Enum):
     """Monte Carlo simulation methods"""
     GEOMETRIC_BROWNIAN = "geometric_brownian_motion"
     HISTORICAL_BOOTSTRAP = "historical_bootstrap"
     MEAN_REVERSION = "mean_reversion"
+    REGIME_SWITCHING = "regime_switching"
+
+
+class TimeSeriesResolution(str, Enum):
+    """Point spacing of time-series output"""
+    AUTO = "auto"  # monthly for short horizons, coarser as the horizon grows
+    MONTHLY = "monthly"
+    QUARTERLY = "quarterly"
+    YEARLY = "yearly"
+
+
+# Longest horizons (years) that the automatic resolution reports monthly / quarterly
+AUTO_MONTHLY_MAX_YEARS = 10
+AUTO_QUARTERLY_MAX_YEARS = 20
+
+
+class TimeSeriesEncoding(str, Enum):
+    """Serialization of time-series arrays"""
+    JSON = "json"
+    BINARY = "binary"  # base64 little-endian float32
+
+
+class SolveFor(str, Enum):
+    """Cash flow solved for by the sustainable-amount solver"""
+    WITHDRAWAL = "withdrawal"
+    CONTRIBUTION = "contribution"
 
 
 @dataclass
@@ -39,6 +98,23 @@ class SimulationConfig:
     method: SimulationMethod = SimulationMethod.GEOMETRIC_BROWNIAN
     risk_free_rate: float = 0.03
     random_seed: Optional[int] = 42
+    streaming: Optional[bool] = None  # None = stream automatically for large runs
+    block_size: int = 2000  # paths per chunk; each chunk has its own random stream
+    sample_paths: int = 100
+    workers: int = DEFAULT_WORKERS
+    variance_reduction: VarianceReduction = VarianceReduction.NONE
+    target_relative_error: Optional[float] = None  # stop early once percentile SE / value is below this
+    multi_asset: bool = False  # simulate correlated holding-level paths
+    rebalance_months: Optional[int] = None  # None = buy and hold (multi-asset only)
+    degrees_of_freedom: float = 5.0  # Student-t shocks
+    bootstrap_block_months: float = 6.0  # mean block length of the stationary bootstrap
+    history_years: int = 10  # look-back for bootstrapped returns
+    mean_reversion_speed: float = 1.0  # annual OU speed of log value toward its trend
+    regimes: int = 2  # Markov regimes of the regime-switching method
+    time_series_resolution: TimeSeriesResolution = TimeSeriesResolution.AUTO
+    sample_path_points: Optional[int] = None  # LTTB-decimate sample paths to this many points
+    time_series_digits: Optional[int] = None  # significant digits kept in time-series values
+    time_series_encoding: TimeSeriesEncoding = TimeSeriesEncoding.JSON
     
     def validate(self):
         """Validate configuration parameters"""
@@ -48,17 +124,90 @@ class SimulationConfig:
             raise ValueError("num_simulations cannot exceed 100,000")
         if self.years < 1 or self.years > 50:
             raise ValueError("years must be between 1 and 50")
+        if self.block_size < 100:
+            raise ValueError("block_size must be at least 100")
+        if self.workers < 1:
+            raise ValueError("workers must be at least 1")
+        if self.target_relative_error is not None and self.target_relative_error <= 0:
+            raise ValueError("target_relative_error must be positive")
+        if self.rebalance_months is not None and self.rebalance_months < 1:
+            raise ValueError("rebalance_months must be at least 1")
+        if self.multi_asset and self.variance_reduction == VarianceReduction.SOBOL:
+            raise ValueError("Sobol sampling is not supported for multi-asset simulation")
+        if self.multi_asset and self.method != SimulationMethod.GEOMETRIC_BROWNIAN:
+            raise ValueError("Multi-asset simulation supports geometric Brownian motion only")
+        if self.degrees_of_freedom <= 2:
+            raise ValueError("degrees_of_freedom must be greater than 2")
+        if self.bootstrap_block_months < 1:
+            raise ValueError("bootstrap_block_months must be at least 1")
+        if self.mean_reversion_speed <= 0:
+            raise ValueError("mean_reversion_speed must be positive")
+        if not 2 <= self.regimes <= 4:
+            raise ValueError("regimes must be between 2 and 4")
+        if self.method == SimulationMethod.REGIME_SWITCHING and self.distribution == DistributionType.HISTORICAL:
+            raise ValueError("Regime switching uses fitted regimes; choose a normal or Student-t distribution")
+        if self.uses_bootstrap() and self.variance_reduction != VarianceReduction.NONE:
+            raise ValueError("Variance reduction does not apply to historical bootstrap")
+        if self.sample_path_points is not None and self.sample_path_points < 3:
+            raise ValueError("sample_path_points must be at least 3")
+        if self.time_series_digits is not None and not 1 <= self.time_series_digits <= 15:
+            raise ValueError("time_series_digits must be between 1 and 15")
+    
+    def uses_bootstrap(self) -> bool:
+        """Whether paths resample historical returns"""
+        return (self.method == SimulationMethod.HISTORICAL_BOOTSTRAP
+                or self.distribution == DistributionType.HISTORICAL)
+    
+    def uses_history(self) -> bool:
+        """Whether paths depend on stored price history (bootstrap sample or fitted regimes)"""
+        return self.uses_bootstrap() or self.method == SimulationMethod.REGIME_SWITCHING
+    
+    def resolved_time_series_resolution(self) -> str:
+        """Time-series resolution, with 'auto' resolved from the horizon"""
+        resolution = TimeSeriesResolution(self.time_series_resolution)
+        if resolution != TimeSeriesResolution.AUTO:
+            return resolution.value
+        if self.years <= AUTO_MONTHLY_MAX_YEARS:
+            return TimeSeriesResolution.MONTHLY.value
+        if self.years <= AUTO_QUARTERLY_MAX_YEARS:
+            return TimeSeriesResolution.QUARTERLY.value
+        return TimeSeriesResolution.YEARLY.value
+    
+    def time_series_options(self) -> Dict[str, Any]:
+        """Keyword arguments of format_time_series"""
+        return {
+            'resolution': self.resolved_time_series_resolution(),
+            'sample_points': self.sample_path_points,
+            'digits': self.time_series_digits,
+            'encoding': TimeSeriesEncoding(self.time_series_encoding).value
+        }
+    
+    def use_streaming(self) -> bool:
+        """Whether results are aggregated block by block instead of from a full path matrix"""
+        if self.streaming is not None:
+            return self.streaming
+        return self.num_simulations * (self.years * 12 + 1) > STREAMING_AUTO_CELLS
 
 
 class PortfolioStats:
     """Container for portfolio statistics"""
     
-    def __init__(self, initial_value: float, mean_return: float, volatility: float, sharpe_ratio: float, weights: np.ndarray):
+    def __init__(
+        self, initial_value: float, mean_return: float, volatility: float, sharpe_ratio: float, weights: np.ndarray,
+        asset_returns: Optional[np.ndarray] = None, asset_volatilities: Optional[np.ndarray] = None,
+        correlation: Optional[np.ndarray] = None, history: Optional[np.ndarray] = None,
+        regime_model: Optional[Dict[str, Any]] = None
+    ):
         self.initial_value = initial_value
         self.mean_return = mean_return
         self.volatility = volatility
         self.sharpe_ratio = sharpe_ratio
         self.weights = weights
+        self.asset_returns = asset_returns
+        self.asset_volatilities = asset_volatilities
+        self.correlation = correlation
+        self.history = history
+        self.regime_model = regime_model
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -69,24 +218,872 @@ class PortfolioStats:
         }
 
 
+# ========================================
+# PATH KERNELS
+# ========================================
+
+def gbm_period_returns(shocks: np.ndarray, mean_return: float, volatility: float, dt: float) -> np.ndarray:
+    """
+    Convert standard normal shocks into per-period simple returns (in place).
+
+    Args:
+        shocks: (paths x steps) standard normal draws; overwritten
+        mean_return: Annual mean return
+        volatility: Annual volatility
+        dt: Step length in years
+
+    Returns:
+        The shocks array holding mean_return * dt + volatility * sqrt(dt) * z
+    """
+    shocks *= volatility * np.sqrt(dt)
+    shocks += mean_return * dt
+    return shocks
+
+
+def generate_paths(
+    initial_value: float,
+    period_returns: np.ndarray,
+    contributions: Optional[Any] = None
+) -> np.ndarray:
+    """
+    Build whole value paths from per-period returns without a Python time loop.
+
+    Solves V_t = V_{t-1} * (1 + r_t) + c_t in closed form:
+    V_t = G_t * (V_0 + sum_{s<=t} c_s / G_s), with G_t = prod_{s<=t} (1 + r_s),
+    using one cumprod and (only when there are cash flows) one cumsum.
+
+    Args:
+        initial_value: Starting value (scalar or per-path array)
+        period_returns: (paths x steps) simple returns; consumed (used as scratch space)
+        contributions: Cash flow added at the end of each step - scalar,
+            (steps,) schedule or (paths x steps) matrix; None for no flows
+
+    Returns:
+        (paths x steps + 1) value matrix whose first column is initial_value
+    """
+    n_paths, n_steps = period_returns.shape
+    initial = np.broadcast_to(np.asarray(initial_value, dtype=float), (n_paths,))
+
+    growth = period_returns
+    growth += 1.0
+    np.cumprod(growth, axis=1, out=growth)
+
+    paths = np.empty((n_paths, n_steps + 1))
+    paths[:, 0] = initial
+    values = paths[:, 1:]
+
+    if contributions is None or (np.ndim(contributions) == 0 and contributions == 0):
+        np.multiply(growth, initial[:, None], out=values)
+        return paths
+
+    np.divide(contributions, growth, out=values)
+    np.cumsum(values, axis=1, out=values)
+    values += initial[:, None]
+    values *= growth
+
+    return paths
+
+
+def cash_flow_schedule(
+    months: int,
+    monthly_amount: float = 0.0,
+    annual_increase: float = 0.0,
+    retirement_month: Optional[int] = None,
+    monthly_withdrawal: float = 0.0,
+    inflation_rate: float = 0.0,
+    events: Optional[List[Dict[str, float]]] = None
+) -> np.ndarray:
+    """
+    Per-month cash flows: escalating contributions until retirement, then
+    inflation-indexed withdrawals, plus one-off events.
+
+    Contributions grow by annual_increase each year; withdrawals are stated in
+    today's money and indexed by inflation_rate each year. Flows land at the
+    end of each month (index t is month t + 1).
+
+    Args:
+        months: Horizon in months
+        monthly_amount: Monthly contribution in the first year
+        annual_increase: Yearly contribution growth
+        retirement_month: First month of the withdrawal phase (None = never)
+        monthly_withdrawal: Monthly withdrawal in today's money
+        inflation_rate: Yearly withdrawal indexation
+        events: One-off flows as dicts with month (1-based) and amount (negative = outflow)
+
+    Returns:
+        (months,) cash flow vector
+    """
+    t = np.arange(months)
+    years_elapsed = t // 12
+    retired = t >= (retirement_month - 1 if retirement_month is not None else months)
+    
+    flows = np.where(retired, 0.0, monthly_amount * (1 + annual_increase) ** years_elapsed)
+    flows -= np.where(retired, monthly_withdrawal * (1 + inflation_rate) ** years_elapsed, 0.0)
+    
+    for event in events or []:
+        month = int(event['month'])
+        if 1 <= month <= months:
+            flows[month - 1] += float(event['amount'])
+    
+    return flows
+
+
+def apply_depletion(paths: np.ndarray) -> np.ndarray:
+    """
+    Make ruin absorbing (in place): once a path reaches zero it stays there.
+
+    Before its first non-positive value a path is unaffected by the barrier, so
+    zeroing everything from that point on equals step-by-step simulation with
+    an absorbing barrier.
+    """
+    depleted = np.logical_or.accumulate(paths <= 0, axis=1)
+    paths[depleted] = 0.0
+    return paths
+
+
+def correlation_factor(correlation: np.ndarray) -> np.ndarray:
+    """
+    Factor L with L @ L.T equal to the correlation matrix.
+
+    Uses Cholesky when the matrix is positive definite, otherwise an eigen
+    decomposition with negative eigenvalues clipped (rows rescaled so every
+    asset keeps unit variance).
+    """
+    correlation = np.asarray(correlation, dtype=float)
+    try:
+        return np.linalg.cholesky(correlation)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+        factor = eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+        norms = np.linalg.norm(factor, axis=1, keepdims=True)
+        return np.divide(factor, norms, out=np.zeros_like(factor), where=norms > 0)
+
+
+def simulate_multi_asset_chunk(model: Dict[str, Any], rng: np.random.Generator, n_paths: int) -> np.ndarray:
+    """
+    Generate one chunk of portfolio paths from correlated holding-level paths.
+
+    Time is processed in blocks (the rebalancing period, or a year when buying
+    and holding), so memory per chunk is paths x block x assets rather than
+    paths x months x assets. Each block correlates shocks with the factor,
+    compounds every holding (with contributions split by target weight)
+    through generate_paths, and optionally resets holdings to target weights.
+
+    Args:
+        model: Picklable multi-asset model (initial_values, asset_returns,
+            asset_volatilities, factor, weights, rebalance_months, months, dt,
+            contribution, variance_reduction)
+        rng: Generator dedicated to this chunk
+        n_paths: Number of paths
+
+    Returns:
+        (n_paths x months + 1) portfolio value matrix
+    """
+    initial_values = np.asarray(model['initial_values'], dtype=float)
+    weights = np.asarray(model['weights'], dtype=float)
+    factor = np.asarray(model['factor'], dtype=float)
+    n_assets = len(initial_values)
+    months, dt = model['months'], model['dt']
+    rebalance = model.get('rebalance_months')
+    block = rebalance or 12
+    
+    drift = np.asarray(model['asset_returns']) * dt
+    scale = np.asarray(model['asset_volatilities']) * np.sqrt(dt)
+    contribution = model.get('contribution')
+    asset_weights = np.tile(weights, n_paths)[:, None]
+    
+    paths = np.empty((n_paths, months + 1))
+    paths[:, 0] = initial_values.sum()
+    holdings = np.tile(initial_values, (n_paths, 1))
+    
+    t = 0
+    while t < months:
+        steps = min(block, months - t)
+        shocks = draw_shocks(
+            rng, n_paths, steps * n_assets,
+            model.get('variance_reduction', VarianceReduction.NONE.value), model.get('degrees_of_freedom')
+        )
+        returns = shocks.reshape(n_paths, steps, n_assets) @ factor.T
+        returns *= scale
+        returns += drift
+        
+        # One row per (path, asset) so the shared kernel compounds every holding at once
+        returns = np.ascontiguousarray(returns.transpose(0, 2, 1)).reshape(n_paths * n_assets, steps)
+        flows = None
+        if contribution is not None:
+            # Cash flows are split across holdings by target weight
+            flows = asset_weights * (contribution if np.ndim(contribution) == 0 else contribution[t:t + steps])
+        asset_paths = generate_paths(holdings.ravel(), returns, flows)[:, 1:].reshape(n_paths, n_assets, steps)
+        
+        paths[:, t + 1:t + steps + 1] = asset_paths.sum(axis=1)
+        holdings = asset_paths[:, :, -1]
+        
+        if rebalance:
+            holdings = paths[:, t + steps][:, None] * weights[None, :]
+        
+        t += steps
+    
+    return apply_depletion(paths) if model.get('absorbing') else paths
+
+
+# ========================================
+# CHUNKED EXECUTION
+# ========================================
+
+@lru_cache(maxsize=32)
+def _brownian_bridge_plan(n_steps: int) -> Tuple[Tuple[int, int, int, float, float, float], ...]:
+    """
+    Construction order for a Brownian bridge over n_steps unit steps.
+
+    The endpoint comes first, then midpoints breadth-first, so the leading
+    (best distributed) quasi-random dimensions drive the coarse path shape.
+    Each entry is (point, left, right, left_weight, right_weight, sigma).
+    """
+    plan = [(n_steps, 0, 0, 0.0, 0.0, float(np.sqrt(n_steps)))]
+    queue = deque([(0, n_steps)])
+    
+    while queue:
+        left, right = queue.popleft()
+        if right - left < 2:
+            continue
+        mid = (left + right) // 2
+        span = right - left
+        plan.append((
+            mid, left, right,
+            (right - mid) / span, (mid - left) / span,
+            float(np.sqrt((mid - left) * (right - mid) / span))
+        ))
+        queue.extend([(left, mid), (mid, right)])
+    
+    return tuple(plan)
+
+
+def brownian_bridge_increments(z: np.ndarray) -> np.ndarray:
+    """
+    Map (paths x steps) standard normals, in dimension-priority order, to
+    unit-variance Brownian increments via a Brownian bridge.
+    """
+    n_paths, n_steps = z.shape
+    walk = np.zeros((n_paths, n_steps + 1))
+    
+    for k, (point, left, right, w_left, w_right, sigma) in enumerate(_brownian_bridge_plan(n_steps)):
+        walk[:, point] = w_left * walk[:, left] + w_right * walk[:, right] + sigma * z[:, k]
+    
+    return np.diff(walk, axis=1)
+
+
+def draw_shocks(
+    rng: np.random.Generator,
+    n_paths: int,
+    n_steps: int,
+    variance_reduction: str = VarianceReduction.NONE.value,
+    degrees_of_freedom: Optional[float] = None
+) -> np.ndarray:
+    """
+    Draw a (paths x steps) matrix of unit-variance shocks.
+
+    Args:
+        rng: Generator for this chunk
+        n_paths: Number of paths
+        n_steps: Number of time steps
+        variance_reduction: 'none', 'antithetic' (z and -z pairs) or
+            'sobol' (scrambled Sobol points mapped through the inverse CDF;
+            normal shocks are assembled with a Brownian bridge)
+        degrees_of_freedom: Student-t shocks (rescaled to unit variance) instead of normal
+
+    Returns:
+        Shock matrix
+    """
+    if variance_reduction == VarianceReduction.SOBOL.value:
+        from scipy.stats import qmc
+        from scipy.special import ndtri, stdtrit
+        
+        sampler = qmc.Sobol(d=n_steps, scramble=True, seed=rng)
+        with warnings.catch_warnings():
+            # Non power-of-two chunks lose some balance but stay valid
+            warnings.simplefilter('ignore', UserWarning)
+            points = np.clip(sampler.random(n_paths), 1e-12, 1 - 1e-12)
+        if degrees_of_freedom is None:
+            return brownian_bridge_increments(ndtri(points))
+        shocks = stdtrit(degrees_of_freedom, points)
+    else:
+        rows = (n_paths + 1) // 2 if variance_reduction == VarianceReduction.ANTITHETIC.value else n_paths
+        if degrees_of_freedom is None:
+            shocks = rng.standard_normal((rows, n_steps))
+        else:
+            shocks = rng.standard_t(degrees_of_freedom, (rows, n_steps))
+        if rows != n_paths:
+            shocks = np.concatenate((shocks, -shocks))[:n_paths]
+    
+    if degrees_of_freedom is not None:
+        shocks *= np.sqrt((degrees_of_freedom - 2) / degrees_of_freedom)
+    return shocks
+
+
+def stationary_bootstrap_returns(
+    history: np.ndarray,
+    rng: np.random.Generator,
+    n_paths: int,
+    n_steps: int,
+    mean_block_length: float
+) -> np.ndarray:
+    """
+    Resample a return history with the stationary (Politis-Romano) bootstrap.
+
+    Blocks start at uniform positions and have geometric lengths with the given
+    mean; the history wraps around. Block starts and block boundaries are drawn
+    up front for every path and step, so the whole matrix is one gather into
+    the history.
+
+    Args:
+        history: (T,) or (T x k) historical period returns; rows stay together
+        rng: Generator for this chunk
+        n_paths: Number of paths
+        n_steps: Steps per path
+        mean_block_length: Expected block length in steps
+
+    Returns:
+        (n_paths x n_steps) or (n_paths x n_steps x k) resampled returns
+    """
+    history = np.asarray(history, dtype=float)
+    n_obs = history.shape[0]
+    
+    new_block = rng.random((n_paths, n_steps)) < 1.0 / mean_block_length
+    new_block[:, 0] = True
+    block_starts = rng.integers(0, n_obs, size=(n_paths, n_steps))
+    
+    # Step at which each step's block began, then walk forward from that block's start
+    steps = np.arange(n_steps)
+    began = np.maximum.accumulate(np.where(new_block, steps, 0), axis=1)
+    index = np.take_along_axis(block_starts, began, axis=1)
+    index += steps - began
+    index %= n_obs
+    
+    return history[index]
+
+
+def ou_period_returns(
+    shocks: np.ndarray,
+    mean_return: float,
+    volatility: float,
+    speed: float,
+    dt: float
+) -> np.ndarray:
+    """
+    Per-period simple returns of a value whose log reverts to a growth trend.
+
+    log V_t = log V_0 + m t + X_t, with X an Ornstein-Uhlenbeck deviation
+    (dX = -speed X dt + volatility dW, X_0 = 0) sampled exactly:
+    X_t = phi X_{t-1} + volatility * sqrt((1 - phi^2) / (2 speed)) * z_t,
+    phi = exp(-speed dt). The AR(1) recursion runs as one linear filter, or
+    as a compiled loop when Numba is available.
+
+    Args:
+        shocks: (paths x steps) unit-variance shocks
+        mean_return: Annual trend growth (m = log(1 + mean_return))
+        volatility: Annual volatility of the deviation
+        speed: Annual mean-reversion speed
+        dt: Step length in years
+
+    Returns:
+        (paths x steps) simple returns
+    """
+    from monte_carlo_kernels import ou_deviation
+    
+    phi = np.exp(-speed * dt)
+    step_std = volatility * np.sqrt((1 - phi ** 2) / (2 * speed))
+    
+    deviation = ou_deviation(shocks, phi, step_std)
+    log_returns = np.diff(deviation, axis=1, prepend=0.0)
+    log_returns += np.log1p(mean_return) * dt
+    return np.expm1(log_returns, out=log_returns)
+
+
+def simulate_chunk(
+    model: Dict[str, Any],
+    rng: np.random.Generator,
+    n_paths: int,
+    common_shocks: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Generate one chunk of value paths.
+
+    Args:
+        model: Picklable path model: kind ('gbm', 'mean_reversion', 'bootstrap'
+            or 'multi_asset'), initial_value, mean_return, volatility, months, dt,
+            contribution, variance_reduction, degrees_of_freedom, plus
+            mean_reversion_speed or history / block_months per kind
+        rng: Generator dedicated to this chunk
+        n_paths: Number of paths
+        common_shocks: Optional (n_paths x >= months) standard normals shared
+            with other scenarios; GBM and mean-reversion models use its leading
+            columns (Student-t models divide them by a chi-square mixing draw)
+
+    Returns:
+        (n_paths x months + 1) value matrix
+    """
+    if model.get('kind') == 'multi_asset':
+        return simulate_multi_asset_chunk(model, rng, n_paths)
+    
+    period_returns = _period_returns(model, rng, n_paths, common_shocks)
+    paths = generate_paths(model['initial_value'], period_returns, model.get('contribution'))
+    return apply_depletion(paths) if model.get('absorbing') else paths
+
+
+def _period_returns(
+    model: Dict[str, Any],
+    rng: np.random.Generator,
+    n_paths: int,
+    common_shocks: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """(n_paths x months) portfolio-level period returns of a single-asset model"""
+    if model.get('kind') == 'bootstrap':
+        return stationary_bootstrap_returns(model['history'], rng, n_paths, model['months'], model['block_months'])
+    return _shock_period_returns(model, rng, n_paths, common_shocks)
+
+
+def _shock_period_returns(
+    model: Dict[str, Any],
+    rng: np.random.Generator,
+    n_paths: int,
+    common_shocks: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Period returns of the shock-driven (GBM and mean-reversion) models"""
+    degrees_of_freedom = model.get('degrees_of_freedom')
+    if common_shocks is not None:
+        shocks = common_shocks[:, :model['months']].copy()
+        if degrees_of_freedom is not None:
+            shocks /= np.sqrt(rng.chisquare(degrees_of_freedom, shocks.shape) / (degrees_of_freedom - 2))
+    else:
+        shocks = draw_shocks(
+            rng, n_paths, model['months'],
+            model.get('variance_reduction', VarianceReduction.NONE.value), degrees_of_freedom
+        )
+    
+    if model.get('kind') == 'regime_switching':
+        return regime_period_returns(shocks, rng.random(shocks.shape), model['regimes'])
+    if model.get('kind') == 'mean_reversion':
+        return ou_period_returns(
+            shocks, model['mean_return'], model['volatility'], model['mean_reversion_speed'], model['dt']
+        )
+    return gbm_period_returns(shocks, model['mean_return'], model['volatility'], model['dt'])
+
+
+# ========================================
+# PATH STATISTICS
+# ========================================
+
+def path_quantiles(paths: np.ndarray, levels: List[float]) -> np.ndarray:
+    """
+    Quantiles of every timestep for all levels from a single sort.
+
+    The path matrix is transposed once so each timestep is a contiguous row,
+    sorted in place, and every level is read from the order statistics with
+    the same linear interpolation as np.percentile.
+
+    Args:
+        paths: (paths x steps) values
+        levels: Quantile levels in [0, 1]
+
+    Returns:
+        (len(levels) x steps) array
+    """
+    ordered = np.ascontiguousarray(paths.T)
+    ordered.sort(axis=1)
+    
+    position = np.asarray(levels, dtype=float) * (ordered.shape[1] - 1)
+    lower = np.floor(position).astype(int)
+    upper = np.minimum(lower + 1, ordered.shape[1] - 1)
+    fraction = (position - lower)[:, None]
+    
+    low_values = ordered[:, lower].T
+    return low_values + fraction * (ordered[:, upper].T - low_values)
+
+
+def drawdown_statistics(paths: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Per-path drawdown and time-under-water from one running-max pass.
+
+    Args:
+        paths: (paths x steps) values, first column the initial value
+
+    Returns:
+        Dictionary of per-path arrays: max_drawdown (fraction, <= 0),
+        longest_underwater (steps in the longest spell below a prior peak)
+        and fraction_underwater (share of steps below a prior peak)
+    """
+    n_steps = paths.shape[1]
+    running_max = np.maximum.accumulate(paths, axis=1)
+    underwater = paths < running_max
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(paths, running_max, out=running_max)
+    max_drawdown = np.nan_to_num(running_max.min(axis=1) - 1.0)
+    del running_max
+    
+    # Steps since the last step at a peak; the longest such run is the longest spell under water
+    steps = np.arange(n_steps, dtype=np.int32)
+    last_peak = np.where(underwater, np.int32(0), steps)
+    np.maximum.accumulate(last_peak, axis=1, out=last_peak)
+    np.subtract(steps, last_peak, out=last_peak)
+    
+    return {
+        'max_drawdown': max_drawdown,
+        'longest_underwater': last_peak.max(axis=1),
+        'fraction_underwater': underwater.sum(axis=1) / max(n_steps - 1, 1)
+    }
+
+
+def depletion_summary(depleted_counts: np.ndarray, n_paths: int) -> Dict[str, Any]:
+    """
+    Depletion-probability curve from per-step counts of depleted paths.
+
+    Depletion is absorbing, so the counts are non-decreasing and their
+    increments are the distribution of first-depletion times.
+
+    Args:
+        depleted_counts: (steps,) number of depleted paths at each step (step 0 = start)
+        n_paths: Number of paths
+
+    Returns:
+        Dictionary with the yearly probability curve, the final probability,
+        the first year the probability reaches 50% and the mean depletion year
+        of depleted paths
+    """
+    probability = np.asarray(depleted_counts, dtype=float) / max(n_paths, 1)
+    first_times = np.diff(depleted_counts, prepend=0)
+    depleted = int(depleted_counts[-1])
+    half = np.flatnonzero(probability >= 0.5)
+    
+    return {
+        'probability_by_year': probability[12::12].tolist(),
+        'probability_final': float(probability[-1]),
+        'year_50pct_depleted': float(half[0] / 12) if len(half) else None,
+        'mean_depletion_year': float(first_times @ np.arange(len(first_times)) / depleted / 12) if depleted else None
+    }
+
+
+# ========================================
+# TIME-SERIES OUTPUT
+# ========================================
+
+_RESOLUTION_MONTHS = {'monthly': 1, 'quarterly': 3, 'yearly': 12}
+
+
+def output_steps(n_steps: int, resolution: str = 'monthly') -> np.ndarray:
+    """
+    Indices of the steps reported at a resolution (always including the last step).
+
+    Args:
+        n_steps: Steps in the full series (months + 1)
+        resolution: 'monthly', 'quarterly' or 'yearly'
+
+    Returns:
+        Increasing step indices
+    """
+    steps = np.arange(0, n_steps, _RESOLUTION_MONTHS[resolution])
+    return steps if steps[-1] == n_steps - 1 else np.append(steps, n_steps - 1)
+
+
+def lttb_indices(values: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets decimation of many series at once.
+
+    Keeps the first and last points and, from each of n_out - 2 equal
+    buckets, the point spanning the largest triangle with the previously
+    kept point and the mean of the next bucket, which preserves peaks and
+    troughs that plain subsampling drops. Buckets are processed in order
+    with every series handled in the same array operation.
+
+    Args:
+        values: (series x points) values on a uniform grid
+        n_out: Points to keep per series
+
+    Returns:
+        (series x n_out) increasing indices of the kept points
+    """
+    n_series, n_points = values.shape
+    if n_out >= n_points:
+        return np.broadcast_to(np.arange(n_points), (n_series, n_points)).copy()
+    
+    edges = np.linspace(1, n_points - 1, n_out - 1).astype(int)
+    rows = np.arange(n_series)
+    kept = np.empty((n_series, n_out), dtype=np.int64)
+    kept[:, 0], kept[:, -1] = 0, n_points - 1
+    
+    for b in range(n_out - 2):
+        start, stop = edges[b], edges[b + 1]
+        next_stop = edges[b + 2] if b + 2 < len(edges) else n_points
+        next_x = (stop + next_stop - 1) / 2
+        next_y = values[:, stop:next_stop].mean(axis=1)
+        
+        prev_x = kept[:, b]
+        prev_y = values[rows, prev_x]
+        
+        x = np.arange(start, stop)
+        # Twice the triangle area for every candidate point in the bucket
+        area = np.abs(
+            (prev_x[:, None] - next_x) * (values[:, start:stop] - prev_y[:, None])
+            - (prev_x[:, None] - x[None, :]) * (next_y - prev_y)[:, None]
+        )
+        kept[:, b + 1] = start + area.argmax(axis=1)
+    
+    return kept
+
+
+def round_significant(values: np.ndarray, digits: int) -> np.ndarray:
+    """Round to a number of significant digits (short JSON, chart-identical)"""
+    values = np.asarray(values, dtype=float)
+    with np.errstate(divide='ignore'):
+        magnitude = np.floor(np.log10(np.abs(values)))
+    scale = 10.0 ** (digits - 1 - np.where(np.isfinite(magnitude), magnitude, 0))
+    return np.round(values * scale) / scale
+
+
+def _encode_series(values: np.ndarray, digits: Optional[int], encoding: str) -> Any:
+    """Serialize one array as nested lists or base64 float32"""
+    if encoding == TimeSeriesEncoding.BINARY.value:
+        return {
+            'dtype': 'float32',
+            'shape': list(values.shape),
+            'data': base64.b64encode(np.ascontiguousarray(values, dtype='<f4').tobytes()).decode('ascii')
+        }
+    return (round_significant(values, digits) if digits else values).tolist()
+
+
+def format_time_series(
+    sample_paths: np.ndarray,
+    bands: Dict[str, np.ndarray],
+    resolution: str = 'monthly',
+    sample_points: Optional[int] = None,
+    digits: Optional[int] = None,
+    encoding: str = 'json'
+) -> Dict[str, Any]:
+    """
+    Chart payload of sample paths and percentile bands at a chosen resolution.
+
+    Bands are reported at the resolution's steps. Sample paths either follow
+    the same steps or, with sample_points, are LTTB-decimated from their full
+    monthly detail (each path then has its own months, in sample_path_months).
+    The default arguments reproduce the full monthly lists.
+
+    Args:
+        sample_paths: (samples x steps) monthly sample paths
+        bands: Name -> (steps,) monthly band values
+        resolution: 'monthly', 'quarterly' or 'yearly'
+        sample_points: Optional LTTB target points per sample path
+        digits: Optional significant digits kept in JSON output
+        encoding: 'json' lists or 'binary' base64 float32 arrays
+
+    Returns:
+        Dictionary with sample_paths, percentile_bands and num_samples
+    """
+    n_steps = len(next(iter(bands.values())))
+    steps = output_steps(n_steps, resolution)
+    full = len(steps) == n_steps
+    
+    time_series = {}
+    if sample_points and len(sample_paths):
+        months = lttb_indices(sample_paths, sample_points)
+        time_series['sample_paths'] = _encode_series(np.take_along_axis(sample_paths, months, axis=1), digits, encoding)
+        time_series['sample_path_months'] = months.tolist()
+    else:
+        time_series['sample_paths'] = _encode_series(sample_paths if full else sample_paths[:, steps], digits, encoding)
+    
+    time_series['percentile_bands'] = {
+        name: _encode_series(values if full else values[steps], digits, encoding) for name, values in bands.items()
+    }
+    time_series['num_samples'] = len(sample_paths)
+    
+    if not full:
+        time_series['months'] = steps.tolist()
+    if encoding != TimeSeriesEncoding.JSON.value:
+        time_series['encoding'] = encoding
+    
+    return time_series
+
+
+def _run_chunk_group(
+    model: Dict[str, Any],
+    chunks: List[Tuple[int, np.random.SeedSequence]],
+    aggregator_params: Optional[Dict[str, Any]] = None,
+    on_chunk: Optional[Callable[[], None]] = None
+) -> Any:
+    """
+    Simulate a contiguous group of chunks (process pool entry point).
+
+    Returns the chunk path matrices, or - when aggregating - the summed sketch
+    counts plus one floating-point partial per chunk, so the caller can merge
+    them in chunk order independently of how chunks were grouped.
+
+    on_chunk (in-process only) runs after every chunk; it may raise to stop.
+    """
+    if aggregator_params is None:
+        results = []
+        for n_paths, seed in chunks:
+            results.append(simulate_chunk(model, np.random.default_rng(seed), n_paths))
+            if on_chunk:
+                on_chunk()
+        return results
+    
+    from monte_carlo_streaming import StreamingAggregator
+    
+    aggregator = StreamingAggregator(**aggregator_params)
+    counts = np.zeros_like(aggregator.sketch.counts)
+    partials = []
+    
+    for n_paths, seed in chunks:
+        rng = np.random.default_rng(seed)
+        paths = simulate_chunk(model, rng, n_paths)
+        counts += aggregator.sketch.bucket_counts(paths)
+        partials.append(aggregator.partial(paths, rng.random(n_paths), include_counts=False))
+        if on_chunk:
+            on_chunk()
+    
+    return counts, partials
+
+
+def _child_seed(seed: np.random.SeedSequence, index: int) -> np.random.SeedSequence:
+    """Deterministic sub-stream of a chunk seed (independent of spawn history)"""
+    return np.random.SeedSequence(seed.entropy, spawn_key=tuple(seed.spawn_key) + (index,))
+
+
+def _run_scenario_group(
+    models: List[Dict[str, Any]],
+    chunks: List[Tuple[int, np.random.SeedSequence]],
+    aggregator_params: List[Dict[str, Any]],
+    variance_reduction: str = VarianceReduction.NONE.value
+) -> List[Tuple[np.ndarray, List[Dict[str, Any]], List[np.ndarray]]]:
+    """
+    Simulate every scenario on the same draws for a group of chunks.
+
+    Each chunk draws one standard normal tensor (paths x longest horizon, with
+    the shared variance reduction) used by all scenarios, and every scenario's
+    auxiliary generator (bootstrap
+    blocks, Student-t mixing, multi-asset shocks) restarts from the same
+    sub-seed, so scenarios differ only through their parameters.
+
+    Returns:
+        Per scenario: summed sketch counts, per-chunk partials and per-chunk final values
+    """
+    from monte_carlo_streaming import StreamingAggregator
+    
+    aggregators = [StreamingAggregator(**params) for params in aggregator_params]
+    outputs = [(np.zeros_like(a.sketch.counts), [], []) for a in aggregators]
+    max_months = max(model['months'] for model in models)
+    
+    for n_paths, seed in chunks:
+        common_shocks = draw_shocks(np.random.default_rng(_child_seed(seed, 0)), n_paths, max_months, variance_reduction)
+        sample_keys = np.random.default_rng(_child_seed(seed, 2)).random(n_paths)
+        
+        for model, aggregator, (counts, partials, finals) in zip(models, aggregators, outputs):
+            paths = simulate_chunk(model, np.random.default_rng(_child_seed(seed, 1)), n_paths, common_shocks)
+            counts += aggregator.sketch.bucket_counts(paths)
+            partials.append(aggregator.partial(paths, sample_keys, include_counts=False))
+            finals.append(paths[:, -1].copy())
+    
+    return outputs
+
+
+def percentile_precision(
+    estimates: np.ndarray,
+    levels: List[float],
+    target_relative_error: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Batch-means precision of percentile estimates.
+
+    Args:
+        estimates: (chunks x levels) per-chunk percentile estimates
+        levels: Percentile levels
+        target_relative_error: Optional convergence target
+
+    Returns:
+        Dictionary with per-percentile standard errors (absolute and relative),
+        the worst relative error and whether the target was met
+    """
+    labels = [f'p{int(level * 100)}' for level in levels]
+    
+    if len(estimates) < 2:
+        return {
+            'batches': len(estimates),
+            'standard_errors': None,
+            'relative_errors': None,
+            'max_relative_error': None,
+            'target_relative_error': target_relative_error,
+            'converged': False
+        }
+    
+    standard_errors = estimates.std(axis=0, ddof=1) / np.sqrt(len(estimates))
+    centers = np.abs(estimates.mean(axis=0))
+    relative_errors = np.divide(standard_errors, centers, out=np.full_like(standard_errors, np.nan), where=centers > 0)
+    max_relative = float(np.nanmax(relative_errors)) if np.isfinite(relative_errors).any() else None
+    
+    return {
+        'batches': len(estimates),
+        'standard_errors': {label: float(se) for label, se in zip(labels, standard_errors)},
+        'relative_errors': {label: (float(re) if np.isfinite(re) else None) for label, re in zip(labels, relative_errors)},
+        'max_relative_error': max_relative,
+        'target_relative_error': target_relative_error,
+        'converged': target_relative_error is not None and max_relative is not None and max_relative <= target_relative_error
+    }
+
+
+_process_pool = None
+_process_pool_workers = 0
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """Get or create the shared simulation process pool"""
+    global _process_pool, _process_pool_workers
+    with _process_pool_lock:
+        if _process_pool is None or _process_pool_workers != workers:
+            if _process_pool is not None:
+                _process_pool.shutdown(wait=False)
+            _process_pool = ProcessPoolExecutor(max_workers=workers)
+            _process_pool_workers = workers
+        return _process_pool
+
+
 class MonteCarloSimulator:
     """Advanced Monte Carlo simulation for portfolio forecasting"""
     
-    def __init__(self, config: Optional[SimulationConfig] = None):
+    def __init__(
+        self,
+        config: Optional[SimulationConfig] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        cancel_event: Optional[threading.Event] = None
+    ):
+        """
+        Args:
+            config: Simulation configuration
+            progress_callback: Called with (completed chunks, planned chunks) as chunks finish
+            cancel_event: Checked after every chunk; when set the run raises SimulationCancelled
+        """
         self.config = config or SimulationConfig()
         self.config.validate()
-        
-        if self.config.random_seed is not None:
-            np.random.seed(self.config.random_seed)
+        self.progress_callback = progress_callback
+        self.cancel_event = cancel_event
+        self._correlation_source = None
+        self._chunks_done = 0
+        self._chunks_planned = 0
         
         logger.info(f"Initialized Monte Carlo: {self.config.num_simulations} simulations, {self.config.years} years")
     
     def simulate_portfolio(
         self, holdings: List[Dict[str, Any]], years: Optional[int] = None,
         confidence_levels: List[float] = [0.05, 0.25, 0.50, 0.75, 0.95],
-        contributions: Optional[Dict[str, float]] = None
+        contributions: Optional[Dict[str, float]] = None,
+        correlation_matrix: Optional[List[List[float]]] = None
     ) -> Dict[str, Any]:
-        """Run Monte Carlo simulation for portfolio"""
+        """
+        Run Monte Carlo simulation for portfolio.
+
+        correlation_matrix (holdings order) is used for the portfolio volatility
+        and, in multi-asset mode, for the correlated holding-level paths. Without
+        it, multi-asset mode estimates correlations from cached price history.
+        """
         if years:
             self.config.years = years
         
@@ -95,45 +1092,45 @@ class MonteCarloSimulator:
         try:
             start_time = datetime.now()
             
-            portfolio_stats = self._calculate_portfolio_stats(holdings)
+            portfolio_stats = self._calculate_portfolio_stats(holdings, correlation_matrix)
+            self._attach_history(portfolio_stats, holdings)
             
             if portfolio_stats.initial_value <= 0:
                 raise ValueError("Portfolio initial value must be positive")
             
             # Run simulations
-            simulation_paths = self._run_gbm_simulations(portfolio_stats, contributions)
-            
-            # Calculate results
-            percentiles = self._calculate_percentiles(simulation_paths, confidence_levels)
-            stats = self._calculate_statistics(simulation_paths, portfolio_stats.initial_value)
-            probabilities = self._calculate_probabilities(simulation_paths, portfolio_stats.initial_value)
-            risk_metrics = self._calculate_risk_metrics(simulation_paths, portfolio_stats.initial_value)
-            time_series = self._prepare_time_series(simulation_paths)
+            if self.config.use_streaming():
+                outputs, run_info = self._run_streaming(portfolio_stats, contributions, confidence_levels)
+            else:
+                outputs, run_info = self._run_in_memory(portfolio_stats, contributions, confidence_levels)
             
             elapsed_time = (datetime.now() - start_time).total_seconds()
             
+            schedule = self._cash_flow_schedule(contributions, self.config.years * 12)
+            if schedule is not None:
+                run_info['total_contributions'] = float(schedule[schedule > 0].sum())
+                run_info['total_withdrawals'] = float(-schedule[schedule < 0].sum())
+            
             result = {
                 'metadata': {
                     'num_simulations': self.config.num_simulations,
                     'years': self.config.years,
                     'method': self.config.method.value,
+                    'distribution': DistributionType(self.config.distribution).value,
+                    'history_months': len(portfolio_stats.history) if portfolio_stats.history is not None else None,
                     'initial_value': portfolio_stats.initial_value,
                     'mean_annual_return': portfolio_stats.mean_return,
                     'annual_volatility': portfolio_stats.volatility,
+                    'streaming': self.config.use_streaming(),
+                    'multi_asset': self.config.multi_asset,
+                    'rebalance_months': self.config.rebalance_months,
+                    'correlation_source': self._correlation_source,
+                    **({'regime_model': describe_regime_model(portfolio_stats.regime_model)} if portfolio_stats.regime_model else {}),
+                    **run_info,
                     'simulation_time_seconds': elapsed_time,
                     'timestamp': datetime.utcnow().isoformat()
                 },
-                'scenarios': {
-                    'best_case': float(np.max(simulation_paths[:, -1])),
-                    'worst_case': float(np.min(simulation_paths[:, -1])),
-                    'median': float(np.median(simulation_paths[:, -1])),
-                    'mean': float(np.mean(simulation_paths[:, -1]))
-                },
-                'percentiles': percentiles,
-                'statistics': stats,
-                'probabilities': probabilities,
-                'risk_metrics': risk_metrics,
-                'time_series': time_series,
+                **outputs,
                 'portfolio_stats': portfolio_stats.to_dict()
             }
             
@@ -141,11 +1138,259 @@ class MonteCarloSimulator:
             
             return result
             
+        except SimulationCancelled:
+            logger.info(f"Simulation cancelled after {self._chunks_done}/{self._chunks_planned} chunks")
+            raise
         except Exception as e:
             logger.error(f"Simulation failed: {e}", exc_info=True)
             raise
     
-    def _calculate_portfolio_stats(self, holdings: List[Dict]) -> PortfolioStats:
+    def _chunk_plan(self) -> Tuple[List[Tuple[int, np.random.SeedSequence]], np.random.SeedSequence]:
+        """
+        Split the run into fixed-size chunks, each with an independent stream.
+
+        Chunk sizes and seeds depend only on the config, never on worker count,
+        so a given seed reproduces the same paths bit for bit.
+        """
+        root = np.random.SeedSequence(self.config.random_seed)
+        block_size = self.config.block_size
+        if self.config.variance_reduction == VarianceReduction.SOBOL:
+            # Sobol points are balanced in power-of-two batches
+            block_size = 1 << (block_size.bit_length() - 1)
+        
+        n_full, remainder = divmod(self.config.num_simulations, block_size)
+        sizes = [block_size] * n_full + ([remainder] if remainder else [])
+        
+        children = root.spawn(len(sizes) + 1)
+        return list(zip(sizes, children[:-1])), children[-1]
+    
+    def _execute_chunks(
+        self, model: Dict[str, Any], chunks: List[Tuple[int, np.random.SeedSequence]],
+        aggregator_params: Optional[Dict[str, Any]] = None
+    ) -> List[Any]:
+        """Run chunk groups in-process or across the process pool, preserving chunk order"""
+        workers = min(self.config.workers, len(chunks))
+        
+        if workers <= 1:
+            return [_run_chunk_group(model, chunks, aggregator_params, on_chunk=lambda: self._chunks_completed(1))]
+        
+        # A few groups per worker keeps the pool balanced
+        n_groups = min(len(chunks), workers * 4)
+        bounds = np.linspace(0, len(chunks), n_groups + 1).astype(int)
+        groups = [chunks[bounds[i]:bounds[i + 1]] for i in range(n_groups)]
+        
+        pool = _get_process_pool(workers)
+        futures = [pool.submit(_run_chunk_group, model, group, aggregator_params) for group in groups]
+        
+        results = []
+        try:
+            for future, group in zip(futures, groups):
+                results.append(future.result())
+                self._chunks_completed(len(group))
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        
+        return results
+    
+    def _chunks_completed(self, count: int):
+        """Report progress and honour cancellation between chunks"""
+        self._chunks_done += count
+        if self.progress_callback:
+            self.progress_callback(self._chunks_done, self._chunks_planned)
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise SimulationCancelled("Simulation cancelled")
+    
+    def _path_model(self, stats: PortfolioStats, contributions: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Picklable description of the paths to simulate"""
+        months = self.config.years * 12
+        schedule = self._cash_flow_schedule(contributions, months)
+        absorbing = schedule is not None and bool((schedule < 0).any())
+        degrees_of_freedom = (
+            self.config.degrees_of_freedom if self.config.distribution == DistributionType.STUDENT_T else None
+        )
+        
+        if self.config.multi_asset:
+            return {
+                'kind': 'multi_asset',
+                'initial_values': stats.weights * stats.initial_value,
+                'weights': stats.weights,
+                'asset_returns': stats.asset_returns,
+                'asset_volatilities': stats.asset_volatilities,
+                'factor': correlation_factor(stats.correlation),
+                'rebalance_months': self.config.rebalance_months,
+                'months': months,
+                'dt': 1 / 12,
+                'contribution': schedule,
+                'absorbing': absorbing,
+                'variance_reduction': VarianceReduction(self.config.variance_reduction).value,
+                'degrees_of_freedom': degrees_of_freedom
+            }
+        
+        model = {
+            'kind': 'gbm',
+            'initial_value': stats.initial_value,
+            'mean_return': stats.mean_return,
+            'volatility': stats.volatility,
+            'months': months,
+            'dt': 1 / 12,
+            'contribution': schedule,
+            'absorbing': absorbing,
+            'variance_reduction': VarianceReduction(self.config.variance_reduction).value,
+            'degrees_of_freedom': degrees_of_freedom
+        }
+        
+        if self.config.uses_bootstrap():
+            model.update(kind='bootstrap', history=stats.history, block_months=self.config.bootstrap_block_months)
+        elif self.config.method == SimulationMethod.MEAN_REVERSION:
+            model.update(kind='mean_reversion', mean_reversion_speed=self.config.mean_reversion_speed)
+        elif self.config.method == SimulationMethod.REGIME_SWITCHING:
+            model.update(kind='regime_switching', regimes=stats.regime_model)
+        
+        return model
+    
+    def _cash_flow_schedule(self, contributions: Optional[Dict[str, Any]], months: int) -> Optional[np.ndarray]:
+        """Monthly cash-flow vector from a contributions dict (None when there are no flows)"""
+        if not contributions:
+            return None
+        
+        retirement_year = contributions.get('retirement_year')
+        schedule = cash_flow_schedule(
+            months,
+            monthly_amount=contributions.get('monthly_amount', 0.0),
+            annual_increase=contributions.get('annual_increase', 0.0),
+            retirement_month=int(round(retirement_year * 12)) + 1 if retirement_year is not None else None,
+            monthly_withdrawal=contributions.get('monthly_withdrawal', 0.0),
+            inflation_rate=contributions.get('inflation_rate', 0.0),
+            events=[
+                {'month': max(int(round(event['year'] * 12)), 1), 'amount': event['amount']}
+                for event in contributions.get('events') or []
+            ]
+        )
+        return schedule if schedule.any() else None
+    
+    def _run_chunk_rounds(
+        self, model: Dict[str, Any], confidence_levels: List[float],
+        aggregator_params: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Any], Dict[str, Any]]:
+        """
+        Execute the chunk plan, in growing rounds when a precision target is set.
+
+        Precision is measured by batch means: every chunk is an independent
+        replicate, so the standard error of a percentile is the spread of the
+        per-chunk estimates over sqrt(chunks). Round sizes never depend on the
+        worker count, keeping early-stopped runs reproducible.
+
+        Returns:
+            Tuple of (group results in chunk order, run info for metadata)
+        """
+        chunks, sample_seed = self._chunk_plan()
+        target = self.config.target_relative_error
+        self._chunks_done = 0
+        self._chunks_planned = len(chunks)
+        levels = list(confidence_levels)
+        
+        groups = []
+        estimates = []
+        position = 0
+        precision = None
+        
+        while position < len(chunks):
+            if target is None:
+                batch = chunks[position:]
+            else:
+                batch = chunks[position:position + max(ADAPTIVE_MIN_CHUNKS, position // 2)]
+            
+            for group in self._execute_chunks(model, batch, aggregator_params):
+                groups.append(group)
+                if aggregator_params is None:
+                    estimates.extend(np.quantile(paths[:, -1], levels) for paths in group)
+                else:
+                    estimates.extend(partial['final_quantiles'] for partial in group[1])
+            
+            position += len(batch)
+            precision = percentile_precision(np.array(estimates), levels, target)
+            
+            if target is not None and precision['converged']:
+                if self.progress_callback:
+                    self.progress_callback(len(chunks), len(chunks))
+                break
+        
+        run_info = {
+            'paths_used': int(sum(n_paths for n_paths, _ in chunks[:position])),
+            'variance_reduction': VarianceReduction(self.config.variance_reduction).value,
+            'precision': precision,
+            'sample_seed': sample_seed
+        }
+        
+        return groups, run_info
+    
+    def _run_in_memory(
+        self, stats: PortfolioStats, contributions: Optional[Dict[str, float]], confidence_levels: List[float]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Simulate the full path matrix and compute exact statistics"""
+        model = self._path_model(stats, contributions)
+        groups, run_info = self._run_chunk_rounds(model, confidence_levels)
+        simulation_paths = np.vstack([paths for group in groups for paths in group])
+        final_values = simulation_paths[:, -1]
+        
+        # One sort serves the bands, the requested percentiles and the VaR levels
+        levels = sorted(set(BAND_LEVELS) | set(confidence_levels) | {0.01, 0.05, 0.50})
+        quantiles = dict(zip(levels, path_quantiles(simulation_paths, levels)))
+        drawdowns = drawdown_statistics(simulation_paths)
+        
+        outputs = {
+            'scenarios': {
+                'best_case': float(np.max(final_values)),
+                'worst_case': float(np.min(final_values)),
+                'median': float(quantiles[0.50][-1]),
+                'mean': float(np.mean(final_values))
+            },
+            'percentiles': self._calculate_percentiles(quantiles, confidence_levels),
+            'statistics': self._calculate_statistics(simulation_paths, stats.initial_value),
+            'probabilities': self._calculate_probabilities(simulation_paths, stats.initial_value),
+            'risk_metrics': self._calculate_risk_metrics(simulation_paths, stats.initial_value, quantiles, drawdowns),
+            'time_series': self._prepare_time_series(
+                simulation_paths, np.random.default_rng(run_info.pop('sample_seed')), quantiles
+            )
+        }
+        
+        if model.get('absorbing'):
+            outputs['depletion'] = depletion_summary((simulation_paths <= 0).sum(axis=0), len(simulation_paths))
+        
+        return outputs, run_info
+    
+    def _run_streaming(
+        self, stats: PortfolioStats, contributions: Optional[Dict[str, float]], confidence_levels: List[float]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Simulate in fixed-size chunks, folding each into bounded-memory aggregates"""
+        from monte_carlo_streaming import StreamingAggregator
+        
+        model = self._path_model(stats, contributions)
+        aggregator_params = {
+            'n_steps': self.config.years * 12 + 1,
+            'initial_value': stats.initial_value,
+            'years': self.config.years,
+            'sample_size': min(self.config.sample_paths, self.config.num_simulations),
+            'quantile_levels': list(confidence_levels),
+            'track_depletion': model.get('absorbing', False)
+        }
+        aggregator = StreamingAggregator(**aggregator_params)
+        
+        groups, run_info = self._run_chunk_rounds(model, confidence_levels, aggregator_params)
+        run_info.pop('sample_seed')
+        
+        for counts, partials in groups:
+            aggregator.sketch.counts += counts
+            for partial in partials:
+                aggregator.merge(partial)
+        
+        return aggregator.summary(confidence_levels, self.config.time_series_options()), run_info
+    
+    def _calculate_portfolio_stats(
+        self, holdings: List[Dict], correlation_matrix: Optional[List[List[float]]] = None
+    ) -> PortfolioStats:
         """Calculate portfolio statistics"""
         if not holdings:
             raise ValueError("Holdings list cannot be empty")
@@ -159,47 +1404,101 @@ class MonteCarloSimulator:
         returns = np.array([h.get('annual_return', 0.08) for h in holdings])
         volatilities = np.array([h.get('volatility', 0.15) for h in holdings])
         
+        correlation = self._resolve_correlation(holdings, correlation_matrix)
+        
         portfolio_return = np.dot(weights, returns)
-        portfolio_variance = np.dot(weights ** 2, volatilities ** 2)
+        if correlation is not None:
+            weighted_vols = weights * volatilities
+            portfolio_variance = float(weighted_vols @ correlation @ weighted_vols)
+        else:
+            # No correlation information: holdings treated as independent
+            portfolio_variance = np.dot(weights ** 2, volatilities ** 2)
         portfolio_volatility = np.sqrt(portfolio_variance)
         
-        sharpe_ratio = (portfolio_return - self.config.risk_free_rate) / portfolio_volatility
+        sharpe_ratio = (portfolio_return - self.config.risk_free_rate) / portfolio_volatility if portfolio_volatility > 0 else 0.0
         
-        return PortfolioStats(total_value, portfolio_return, portfolio_volatility, sharpe_ratio, weights)
+        return PortfolioStats(
+            total_value, portfolio_return, portfolio_volatility, sharpe_ratio, weights,
+            asset_returns=returns, asset_volatilities=volatilities,
+            correlation=correlation if correlation is not None else np.eye(len(holdings))
+        )
     
-    def _run_gbm_simulations(self, stats: PortfolioStats, contributions: Optional[Dict[str, float]] = None) -> np.ndarray:
-        """Run Geometric Brownian Motion simulations"""
-        months = self.config.years * 12
-        dt = 1 / 12
+    def _attach_history(self, stats: PortfolioStats, holdings: List[Dict]):
+        """Load the return history the configured method needs (bootstrap sample or fitted regimes)"""
+        if self.config.uses_bootstrap():
+            stats.history = self._historical_portfolio_returns(holdings, stats.weights)
+        elif self.config.method == SimulationMethod.REGIME_SWITCHING:
+            panel, weights = self._historical_panel(holdings, stats.weights, min_months=12 * self.config.regimes)
+            fit = fit_regime_model(panel, weights, n_regimes=self.config.regimes)
+            stats.history = panel @ weights
+            stats.regime_model = portfolio_regime_model(fit, weights)
+            logger.info(f"Fitted {self.config.regimes}-regime model on {len(panel)} months in {fit['iterations']} iterations")
+    
+    def _historical_portfolio_returns(self, holdings: List[Dict], weights: np.ndarray, min_months: int = 24) -> np.ndarray:
+        """Monthly returns of the current weights over the cached price history (rebalanced monthly)"""
+        panel, available_weights = self._historical_panel(holdings, weights, min_months)
+        return panel @ available_weights
+    
+    def _historical_panel(
+        self, holdings: List[Dict], weights: np.ndarray, min_months: int = 24
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(months x holdings) monthly returns over the shared cached history, with renormalized weights"""
+        from price_history import get_price_store
+        
+        tickers = [str(h.get('ticker') or '').upper().strip() for h in holdings]
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=int(365.25 * self.config.history_years) + 31)
+        returns = get_price_store().get_returns([t for t in tickers if t], start_date, end_date, frequency='M')
         
-        paths = np.zeros((self.config.num_simulations, months + 1))
-        paths[:, 0] = stats.initial_value
+        # Holdings without history drop out and the remaining weights are renormalized
+        available = [i for i, t in enumerate(tickers) if t and t in returns.columns]
+        if not available:
+            raise ValueError("No price history available for historical simulation")
         
-        period_return = stats.mean_return * dt
-        period_vol = stats.volatility * np.sqrt(dt)
+        panel = returns[[tickers[i] for i in available]].dropna()
+        if len(panel) < min_months:
+            raise ValueError(f"Historical simulation needs at least {min_months} months of shared price history")
         
-        monthly_contribution = contributions.get('monthly_amount', 0) if contributions else 0
+        available_weights = weights[available] / weights[available].sum()
+        return panel.values, available_weights
+    
+    def _resolve_correlation(
+        self, holdings: List[Dict], correlation_matrix: Optional[List[List[float]]]
+    ) -> Optional[np.ndarray]:
+        """Validate a supplied correlation matrix or estimate one for multi-asset runs"""
+        n_assets = len(holdings)
         
-        shocks = np.random.standard_normal((self.config.num_simulations, months))
+        if correlation_matrix is not None:
+            correlation = np.asarray(correlation_matrix, dtype=float)
+            if correlation.shape != (n_assets, n_assets):
+                raise ValueError(f"correlation_matrix must be {n_assets}x{n_assets}")
+            if not np.allclose(correlation, correlation.T) or not np.allclose(np.diag(correlation), 1.0):
+                raise ValueError("correlation_matrix must be symmetric with a unit diagonal")
+            if np.abs(correlation).max() > 1:
+                raise ValueError("correlation_matrix entries must be between -1 and 1")
+            self._correlation_source = 'supplied'
+            return correlation
         
-        for t in range(1, months + 1):
-            returns = period_return + period_vol * shocks[:, t - 1]
-            paths[:, t] = paths[:, t - 1] * (1 + returns)
-            
-            if monthly_contribution > 0:
-                paths[:, t] += monthly_contribution
+        if not self.config.multi_asset:
+            self._correlation_source = None
+            return None
         
-        return paths
-    
-    def _calculate_percentiles(self, paths: np.ndarray, confidence_levels: List[float]) -> Dict[str, float]:
-        """Calculate percentile outcomes"""
-        final_values = paths[:, -1]
+        tickers = [h.get('ticker') for h in holdings]
+        if not all(tickers):
+            self._correlation_source = 'independent'
+            return np.eye(n_assets)
         
-        percentiles = {}
-        for level in confidence_levels:
-            percentiles[f'p{int(level * 100)}'] = float(np.percentile(final_values, level * 100))
+        from risk_models import historical_correlation
         
-        return percentiles
+        correlation, missing = historical_correlation(tickers)
+        if missing:
+            logger.warning(f"No price history for {missing}; treating them as uncorrelated")
+        self._correlation_source = 'historical' if len(missing) < len(set(tickers)) else 'independent'
+        return correlation
+    
+    def _calculate_percentiles(self, quantiles: Dict[float, np.ndarray], confidence_levels: List[float]) -> Dict[str, float]:
+        """Calculate percentile outcomes from per-timestep quantiles"""
+        return {f'p{int(level * 100)}': float(quantiles[level][-1]) for level in confidence_levels}
     
     def _calculate_statistics(self, paths: np.ndarray, initial_value: float) -> Dict[str, float]:
         """Calculate statistical measures"""
@@ -220,64 +1519,579 @@ class MonteCarloSimulator:
             'median_annualized_return': float(np.median(annualized_returns))
         }
     
-    def _calculate_risk_metrics(self, paths: np.ndarray, initial_value: float) -> Dict[str, float]:
-        """Calculate risk metrics"""
-        final_values = paths[:, -1]
-        returns = (final_values - initial_value) / initial_value
+    def _calculate_risk_metrics(
+        self, paths: np.ndarray, initial_value: float,
+        quantiles: Dict[float, np.ndarray], drawdowns: Dict[str, np.ndarray]
+    ) -> Dict[str, float]:
+        """Calculate risk metrics from precomputed quantiles and drawdown statistics"""
+        returns = paths[:, -1] / initial_value - 1
         
-        var_95 = np.percentile(returns, 5)
-        var_99 = np.percentile(returns, 1)
+        var_95 = quantiles[0.05][-1] / initial_value - 1
+        var_99 = quantiles[0.01][-1] / initial_value - 1
         
         cvar_95 = np.mean(returns[returns <= var_95])
         cvar_99 = np.mean(returns[returns <= var_99])
         
-        max_drawdowns = []
-        for path in paths:
-            running_max = np.maximum.accumulate(path)
-            drawdowns = (path - running_max) / running_max
-            max_drawdowns.append(np.min(drawdowns))
-        
         return {
             'value_at_risk_95': float(var_95),
             'value_at_risk_99': float(var_99),
             'conditional_var_95': float(cvar_95),
             'conditional_var_99': float(cvar_99),
-            'mean_max_drawdown': float(np.mean(max_drawdowns)),
-            'worst_drawdown': float(np.min(max_drawdowns))
+            'mean_max_drawdown': float(np.mean(drawdowns['max_drawdown'])),
+            'worst_drawdown': float(np.min(drawdowns['max_drawdown'])),
+            'mean_longest_underwater_months': float(np.mean(drawdowns['longest_underwater'])),
+            'max_longest_underwater_months': int(np.max(drawdowns['longest_underwater'])),
+            'mean_fraction_underwater': float(np.mean(drawdowns['fraction_underwater']))
         }
     
     def _calculate_probabilities(self, paths: np.ndarray, initial_value: float) -> Dict[str, float]:
         """Calculate probability of outcomes"""
         final_values = paths[:, -1]
+        num_paths = len(final_values)
         
         return {
-            'prob_gain': float(np.sum(final_values > initial_value) / self.config.num_simulations),
-            'prob_loss': float(np.sum(final_values < initial_value) / self.config.num_simulations),
-            'prob_double': float(np.sum(final_values >= initial_value * 2) / self.config.num_simulations),
-            'prob_triple': float(np.sum(final_values >= initial_value * 3) / self.config.num_simulations),
-            'prob_10pct_gain': float(np.sum(final_values >= initial_value * 1.1) / self.config.num_simulations),
-            'prob_25pct_gain': float(np.sum(final_values >= initial_value * 1.25) / self.config.num_simulations)
+            'prob_gain': float(np.sum(final_values > initial_value) / num_paths),
+            'prob_loss': float(np.sum(final_values < initial_value) / num_paths),
+            'prob_double': float(np.sum(final_values >= initial_value * 2) / num_paths),
+            'prob_triple': float(np.sum(final_values >= initial_value * 3) / num_paths),
+            'prob_10pct_gain': float(np.sum(final_values >= initial_value * 1.1) / num_paths),
+            'prob_25pct_gain': float(np.sum(final_values >= initial_value * 1.25) / num_paths)
         }
     
-    def _prepare_time_series(self, paths: np.ndarray) -> Dict[str, Any]:
+    def _prepare_time_series(
+        self, paths: np.ndarray, rng: Optional[np.random.Generator] = None,
+        quantiles: Optional[Dict[float, np.ndarray]] = None
+    ) -> Dict[str, Any]:
         """Prepare time series visualization data"""
-        sample_size = min(100, self.config.num_simulations)
-        sample_indices = np.random.choice(self.config.num_simulations, size=sample_size, replace=False)
+        rng = rng or np.random.default_rng(self.config.random_seed)
+        sample_size = min(self.config.sample_paths, len(paths))
+        sample_indices = rng.choice(len(paths), size=sample_size, replace=False)
+        
+        if quantiles is None:
+            quantiles = dict(zip(BAND_LEVELS, path_quantiles(paths, BAND_LEVELS)))
         
         percentile_bands = {
-            'p5': np.percentile(paths, 5, axis=0).tolist(),
-            'p25': np.percentile(paths, 25, axis=0).tolist(),
-            'p50': np.percentile(paths, 50, axis=0).tolist(),
-            'p75': np.percentile(paths, 75, axis=0).tolist(),
-            'p95': np.percentile(paths, 95, axis=0).tolist(),
-            'mean': np.mean(paths, axis=0).tolist()
+            **{f'p{int(round(level * 100))}': quantiles[level] for level in BAND_LEVELS},
+            'mean': np.mean(paths, axis=0)
         }
         
-        return {
-            'sample_paths': paths[sample_indices].tolist(),
-            'percentile_bands': percentile_bands,
-            'num_samples': sample_size
+        return format_time_series(paths[sample_indices], percentile_bands, **self.config.time_series_options())
+
+
+# ========================================
+# SCENARIO COMPARISON
+# ========================================
+
+def paired_differences(finals: np.ndarray, baseline: np.ndarray) -> Dict[str, float]:
+    """
+    Statistics of per-path final-value differences against a baseline.
+
+    Args:
+        finals: (paths,) scenario final values
+        baseline: (paths,) baseline final values on the same draws
+
+    Returns:
+        Median and mean differences, the paired standard error of the mean
+        difference, the standard error independent runs would give and the
+        probability the scenario ends above the baseline
+    """
+    n = len(finals)
+    delta = finals - baseline
+    paired_se = float(delta.std(ddof=1) / np.sqrt(n)) if n > 1 else 0.0
+    independent_se = float(np.sqrt((finals.var(ddof=1) + baseline.var(ddof=1)) / n)) if n > 1 else 0.0
+    
+    return {
+        'median_difference': float(np.median(finals) - np.median(baseline)),
+        'mean_difference': float(delta.mean()),
+        'mean_difference_se': paired_se,
+        'independent_se': independent_se,
+        'variance_reduction_factor': float(independent_se ** 2 / paired_se ** 2) if paired_se > 0 else None,
+        'median_path_difference': float(np.median(delta)),
+        'prob_outperform': float(np.mean(delta > 0))
+    }
+
+
+# Settings of the shared draws, which every compared scenario must agree on
+SHARED_SCENARIO_SETTINGS = ('variance_reduction', 'target_relative_error', 'block_size')
+
+
+def scenario_setting_conflicts(configs: List[SimulationConfig]) -> List[str]:
+    """
+    Shared-draw settings that differ across scenario configurations.
+
+    Args:
+        configs: SimulationConfig of every compared scenario
+
+    Returns:
+        Names from SHARED_SCENARIO_SETTINGS with more than one value
+    """
+    return [
+        name for name in SHARED_SCENARIO_SETTINGS
+        if len({getattr(config, name) for config in configs}) > 1
+    ]
+
+
+def simulate_scenarios(
+    scenarios: List[Dict[str, Any]],
+    random_seed: Optional[int] = 42,
+    baseline: int = 0,
+    workers: int = DEFAULT_WORKERS,
+    block_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Simulate several scenarios on common random numbers.
+
+    All scenarios run the same number of paths (the largest requested) on one
+    shared shock tensor per chunk, so differences between scenarios reflect
+    their inputs rather than sampling noise. Chunks are spread over the
+    process pool with every scenario evaluated on a chunk in the same task.
+    Per-scenario outputs use the bounded-memory streaming aggregates; paired
+    differences use the exact final values. The shared draws need one
+    variance reduction and chunk size, so scenarios must agree on them, and
+    adaptive stopping (target_relative_error) is not supported.
+
+    Args:
+        scenarios: Dicts with config (SimulationConfig), holdings and optional
+            contributions, correlation_matrix and confidence_levels
+        random_seed: Seed of the shared draws
+        baseline: Index of the scenario differences are measured against
+        workers: Worker processes
+        block_size: Paths per chunk (default: the scenarios' configured block_size)
+
+    Returns:
+        Dictionary with per-scenario results and paired differences
+    """
+    from monte_carlo_streaming import StreamingAggregator
+    
+    start_time = datetime.now()
+    mismatched = scenario_setting_conflicts([scenario['config'] for scenario in scenarios])
+    if mismatched:
+        raise ValueError(f"Compared scenarios must share {', '.join(mismatched)}")
+    config = scenarios[0]['config']
+    if config.target_relative_error is not None:
+        raise ValueError("target_relative_error is not supported when comparing scenarios")
+    
+    variance_reduction = VarianceReduction(config.variance_reduction).value
+    block_size = block_size or config.block_size
+    if variance_reduction == VarianceReduction.SOBOL.value:
+        # Sobol points are balanced in power-of-two batches
+        block_size = 1 << (block_size.bit_length() - 1)
+    n_paths = max(scenario['config'].num_simulations for scenario in scenarios)
+    
+    models, aggregator_params, stats_list = [], [], []
+    for scenario in scenarios:
+        config = scenario['config']
+        simulator = MonteCarloSimulator(config)
+        stats = simulator._calculate_portfolio_stats(scenario['holdings'], scenario.get('correlation_matrix'))
+        simulator._attach_history(stats, scenario['holdings'])
+        
+        confidence_levels = scenario.get('confidence_levels') or [0.05, 0.25, 0.50, 0.75, 0.95]
+        model = simulator._path_model(stats, scenario.get('contributions'))
+        models.append(model)
+        aggregator_params.append({
+            'n_steps': config.years * 12 + 1,
+            'initial_value': stats.initial_value,
+            'years': config.years,
+            'sample_size': min(config.sample_paths, n_paths),
+            'quantile_levels': list(confidence_levels),
+            'track_depletion': model.get('absorbing', False)
+        })
+        stats_list.append((stats, confidence_levels))
+    
+    root = np.random.SeedSequence(random_seed)
+    n_full, remainder = divmod(n_paths, block_size)
+    sizes = [block_size] * n_full + ([remainder] if remainder else [])
+    chunks = list(zip(sizes, root.spawn(len(sizes))))
+    
+    workers = min(workers, len(chunks))
+    if workers <= 1:
+        group_outputs = [_run_scenario_group(models, chunks, aggregator_params, variance_reduction)]
+    else:
+        n_groups = min(len(chunks), workers * 4)
+        bounds = np.linspace(0, len(chunks), n_groups + 1).astype(int)
+        groups = [chunks[bounds[i]:bounds[i + 1]] for i in range(n_groups)]
+        pool = _get_process_pool(workers)
+        group_outputs = list(pool.map(
+            _run_scenario_group, [models] * n_groups, groups, [aggregator_params] * n_groups,
+            [variance_reduction] * n_groups
+        ))
+    
+    results, finals = [], []
+    for index, (params, (stats, confidence_levels)) in enumerate(zip(aggregator_params, stats_list)):
+        aggregator = StreamingAggregator(**params)
+        scenario_finals = []
+        for outputs in group_outputs:
+            counts, partials, chunk_finals = outputs[index]
+            aggregator.sketch.counts += counts
+            for partial in partials:
+                aggregator.merge(partial)
+            scenario_finals.extend(chunk_finals)
+        finals.append(np.concatenate(scenario_finals))
+        
+        config = scenarios[index]['config']
+        results.append({
+            'metadata': {
+                'num_simulations': n_paths,
+                'years': config.years,
+                'method': config.method.value,
+                'distribution': DistributionType(config.distribution).value,
+                'initial_value': stats.initial_value,
+                'mean_annual_return': stats.mean_return,
+                'annual_volatility': stats.volatility,
+                'streaming': True
+            },
+            **aggregator.summary(confidence_levels, config.time_series_options()),
+            'portfolio_stats': stats.to_dict()
+        })
+    
+    differences = [
+        {'scenario_index': index, **paired_differences(finals[index], finals[baseline])}
+        for index in range(len(scenarios)) if index != baseline
+    ]
+    
+    return {
+        'scenarios': results,
+        'differences': differences,
+        'metadata': {
+            'common_random_numbers': True,
+            'paths': n_paths,
+            'baseline_index': baseline,
+            'random_seed': random_seed,
+            'variance_reduction': variance_reduction,
+            'block_size': block_size,
+            'simulation_time_seconds': (datetime.now() - start_time).total_seconds()
         }
+    }
+
+
+# ========================================
+# CASH-FLOW SOLVER
+# ========================================
+
+def critical_cash_flows(
+    initial_value: float,
+    period_returns: np.ndarray,
+    base_flows: np.ndarray,
+    unit_flows: np.ndarray,
+    target_final_value: float = 0.0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per-path break-even amount of a scaled cash flow on fixed return paths.
+
+    With flows base + x * unit, every path is affine in x:
+    V_t = G_t * (A_t + x * B_t), A_t = V_0 + sum_{s<=t} base_s / G_s and
+    B_t = sum_{s<=t} unit_s / G_s. A path never depletes (and ends at or above
+    the target) exactly while x stays on one side of a per-path threshold, so
+    the search over x needs no further path evaluations.
+
+    Args:
+        initial_value: Starting value
+        period_returns: (paths x steps) simple returns; consumed (used as scratch space)
+        base_flows: (steps,) cash flows that do not scale
+        unit_flows: (steps,) flows per unit of x - all <= 0 (withdrawal) or all >= 0 (contribution)
+        target_final_value: Final value a successful path must reach (0 = only avoid depletion)
+
+    Returns:
+        Tuple of (critical, final_base, final_unit): an outflow succeeds on a
+        path iff x <= critical, an inflow iff x >= critical; a successful
+        path ends at final_base + x * final_unit
+    """
+    growth = period_returns
+    growth += 1.0
+    np.cumprod(growth, axis=1, out=growth)
+    
+    discounted_base = initial_value + np.cumsum(base_flows / growth, axis=1)
+    discounted_unit = np.cumsum(unit_flows / growth, axis=1)
+    outflow = unit_flows.sum() < 0
+    
+    # A_t + x * B_t > 0 bounds x at -A_t / B_t; where B_t = 0 the step holds for every x or none
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bounds = -discounted_base / discounted_unit
+    always = (discounted_base > 0) == outflow
+    bounds = np.where(discounted_unit == 0, np.where(always, np.inf, -np.inf), bounds)
+    critical = bounds.min(axis=1) if outflow else bounds.max(axis=1)
+    
+    final_growth = growth[:, -1]
+    final_base = final_growth * discounted_base[:, -1]
+    final_unit = final_growth * discounted_unit[:, -1]
+    
+    if target_final_value > 0:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            final_bound = (target_final_value - final_base) / final_unit
+        always = (final_base >= target_final_value) == outflow
+        final_bound = np.where(final_unit == 0, np.where(always, np.inf, -np.inf), final_bound)
+        critical = np.minimum(critical, final_bound) if outflow else np.maximum(critical, final_bound)
+    
+    return critical, final_base, final_unit
+
+
+def _solve_amount(critical: np.ndarray, target_success: float, outflow: bool) -> float:
+    """Largest outflow (smallest inflow) whose success rate over sorted critical amounts reaches the target"""
+    needed = min(max(int(np.ceil(target_success * len(critical) - 1e-9)), 1), len(critical))
+    return float(critical[len(critical) - needed] if outflow else critical[needed - 1])
+
+
+def solve_cash_flow(
+    holdings: List[Dict[str, Any]],
+    solve_for: SolveFor = SolveFor.WITHDRAWAL,
+    target_success: float = 0.9,
+    config: Optional[SimulationConfig] = None,
+    contributions: Optional[Dict[str, Any]] = None,
+    target_final_value: float = 0.0,
+    correlation_matrix: Optional[List[List[float]]] = None,
+    success_levels: List[float] = [0.5, 0.75, 0.9, 0.95]
+) -> Dict[str, Any]:
+    """
+    Sustainable withdrawal or required contribution for a target success rate.
+
+    One set of return paths is simulated (the same draws /simulate uses for
+    this config); every candidate amount is then judged by re-evaluating cash
+    flows only. Because paths are affine in the amount, the bisection on the
+    success rate collapses to one per-path break-even amount and an order
+    statistic, so every success level is answered from the same pass.
+
+    Args:
+        holdings: Portfolio holdings
+        solve_for: WITHDRAWAL (monthly, today's money, from retirement_year) or
+            CONTRIBUTION (monthly, first year, until retirement_year)
+        target_success: Required probability of never depleting (and of
+            reaching target_final_value)
+        config: Simulation configuration (multi-asset runs use the portfolio-level model)
+        contributions: Other cash flows as in simulate_portfolio; the solved
+            amount replaces monthly_withdrawal or monthly_amount
+        target_final_value: Final value a successful path must reach
+        correlation_matrix: Optional holding correlation matrix
+        success_levels: Extra success rates to report amounts for
+
+    Returns:
+        Dictionary with the solved amount, achieved success rate, amounts by
+        success level, a success-rate curve and final-value percentiles
+    """
+    start_time = datetime.now()
+    solve_for = SolveFor(solve_for)
+    if not 0 < target_success < 1:
+        raise ValueError("target_success must be between 0 and 1")
+    
+    config = replace(config or SimulationConfig(), multi_asset=False)
+    config.validate()
+    simulator = MonteCarloSimulator(config)
+    stats = simulator._calculate_portfolio_stats(holdings, correlation_matrix)
+    if stats.initial_value <= 0:
+        raise ValueError("Portfolio initial value must be positive")
+    simulator._attach_history(stats, holdings)
+    
+    months = config.years * 12
+    flows = dict(contributions or {})
+    outflow = solve_for == SolveFor.WITHDRAWAL
+    if outflow:
+        flows['monthly_withdrawal'] = 0.0
+        if flows.get('retirement_year') is None:
+            flows['retirement_year'] = 0
+        unit = {'retirement_year': flows['retirement_year'], 'monthly_withdrawal': 1.0,
+                'inflation_rate': flows.get('inflation_rate', 0.0)}
+    else:
+        flows['monthly_amount'] = 0.0
+        unit = {'monthly_amount': 1.0, 'annual_increase': flows.get('annual_increase', 0.0),
+                'retirement_year': flows.get('retirement_year')}
+    
+    base_flows = simulator._cash_flow_schedule(flows, months)
+    unit_flows = simulator._cash_flow_schedule(unit, months)
+    if unit_flows is None:
+        raise ValueError(f"No months left to {'withdraw' if outflow else 'contribute'} within the horizon")
+    if base_flows is None:
+        base_flows = np.zeros(months)
+    
+    model = simulator._path_model(stats)
+    chunks, _ = simulator._chunk_plan()
+    critical, final_base, final_unit = (np.concatenate(parts) for parts in zip(*(
+        critical_cash_flows(
+            stats.initial_value, _period_returns(model, np.random.default_rng(seed), n_paths),
+            base_flows, unit_flows, target_final_value
+        )
+        for n_paths, seed in chunks
+    )))
+    
+    ordered = np.sort(critical)
+    
+    def success_rate(amount):
+        if outflow:
+            return float(1 - np.searchsorted(ordered, amount, side='left') / len(ordered))
+        return float(np.searchsorted(ordered, amount, side='right') / len(ordered))
+    
+    def feasible(value):
+        # A negative outflow means even zero withdrawals miss the target; an infinite inflow means no amount reaches it
+        return value >= 0 if outflow else value < np.inf
+    
+    def to_cents(value):
+        # Round toward the safe side so the reported amount still meets its success level
+        return max((np.floor if outflow else np.ceil)(value * 100) / 100, 0.0)
+    
+    raw = _solve_amount(ordered, target_success, outflow)
+    achievable = feasible(raw)
+    amount = to_cents(raw) if achievable else 0.0
+    
+    # Final values at the solved amount (depleted or short paths count as failures at 0)
+    succeeded = critical >= amount if outflow else critical <= amount
+    finals = np.where(succeeded, np.maximum(final_base + amount * final_unit, 0.0), 0.0) if achievable else None
+    
+    levels = sorted(set(success_levels) | {target_success})
+    by_level = {f"{level:.0%}": _solve_amount(ordered, level, outflow) for level in levels}
+    curve_max = amount * 2 if achievable and amount > 0 else float(np.max(np.abs(ordered[np.isfinite(ordered)]), initial=1.0))
+    grid = np.linspace(0.0, curve_max, 21)
+    
+    return {
+        'solve_for': solve_for.value,
+        'target_success': target_success,
+        'achievable': bool(achievable),
+        'monthly_amount': amount if achievable else None,
+        'success_probability': success_rate(amount) if achievable else success_rate(0.0),
+        'amounts_by_success': {
+            label: to_cents(value) if feasible(value) else None
+            for label, value in by_level.items()
+        },
+        'success_curve': {
+            'monthly_amounts': np.round(grid, 2).tolist(),
+            'success_probability': [success_rate(value) for value in grid]
+        },
+        'final_value_percentiles': (
+            dict(zip(['p10', 'p50', 'p90'], np.round(np.percentile(finals, [10, 50, 90]), 2).tolist()))
+            if finals is not None else None
+        ),
+        'metadata': {
+            'num_simulations': len(critical),
+            'years': config.years,
+            'method': config.method.value,
+            'distribution': DistributionType(config.distribution).value,
+            'initial_value': stats.initial_value,
+            'mean_annual_return': stats.mean_return,
+            'annual_volatility': stats.volatility,
+            'target_final_value': target_final_value,
+            'random_seed': config.random_seed,
+            'solve_time_seconds': (datetime.now() - start_time).total_seconds()
+        }
+    }
+
+
+# ========================================
+# ANALYTIC FORECASTS
+# ========================================
+
+@lru_cache(maxsize=1)
+def _hermite_rule(n_nodes: int = 64) -> Tuple[np.ndarray, np.ndarray]:
+    """Gauss-Hermite nodes and weights for expectations over a standard normal"""
+    nodes, weights = np.polynomial.hermite_e.hermegauss(n_nodes)
+    return nodes, weights / weights.sum()
+
+
+def analytic_forecast(
+    portfolio_value: float,
+    annual_return: float = 0.08,
+    volatility: float = 0.15,
+    years: int = 10,
+    confidence_levels: Optional[List[float]] = None,
+    tail_probability: float = 0.001
+) -> Dict[str, Any]:
+    """
+    Closed-form forecast for a single-asset GBM without cash flows.
+
+    The simulator compounds n monthly factors 1 + r with r ~ N(mu dt, sigma^2 dt).
+    The mean and variance of the final value follow exactly from the factor's
+    moments. log V_T is a sum of n i.i.d. terms whose mean and variance come
+    from Gauss-Hermite quadrature, so V_T is treated as lognormal with those
+    moments. Quantiles, threshold probabilities and CVaR follow from that
+    lognormal distribution.
+
+    Args:
+        portfolio_value: Initial value
+        annual_return: Annual mean return
+        volatility: Annual volatility
+        years: Horizon in years
+        confidence_levels: Final-value percentile levels
+        tail_probability: Quantile reported as worst case (and 1 - it as best case)
+
+    Returns:
+        Dictionary with the simulation layout for metadata, scenarios,
+        percentiles, statistics, probabilities and risk_metrics
+    """
+    from scipy.special import ndtr, ndtri
+    
+    confidence_levels = confidence_levels or [0.05, 0.25, 0.50, 0.75, 0.95]
+    v0 = float(portfolio_value)
+    n, dt = years * 12, 1 / 12
+    step_mean, step_std = annual_return * dt, volatility * np.sqrt(dt)
+    
+    nodes, node_weights = _hermite_rule()
+    # Growth factors are floored just above zero; only extreme volatilities reach the floor
+    factors = np.maximum(1 + step_mean + step_std * nodes, 1e-12)
+    log_factors = np.log(factors)
+    log_mean = node_weights @ log_factors
+    log_var = node_weights @ (log_factors - log_mean) ** 2
+    
+    mu = n * log_mean
+    sd = np.sqrt(n * log_var)
+    
+    def quantile(level):
+        return v0 * np.exp(mu + sd * ndtri(level))
+    
+    def prob_above(multiple):
+        if sd == 0:
+            return float(mu > np.log(multiple) if multiple == 1 else mu >= np.log(multiple))
+        return float(ndtr((mu - np.log(multiple)) / sd))
+    
+    def tail_mean(level):
+        # E[V | V <= q_level] for a lognormal
+        if sd == 0:
+            return v0 * np.exp(mu)
+        return v0 * np.exp(mu + sd ** 2 / 2) * ndtr(ndtri(level) - sd) / level
+    
+    mean_final = v0 * (1 + step_mean) ** n
+    second_moment = v0 ** 2 * ((1 + step_mean) ** 2 + step_std ** 2) ** n
+    std_final = np.sqrt(max(second_moment - mean_final ** 2, 0.0))
+    median_final = v0 * np.exp(mu)
+    annualized_mean = (node_weights @ factors ** (1 / years)) ** n - 1
+    
+    return {
+        'metadata': {
+            'engine': 'analytic',
+            'years': years,
+            'method': SimulationMethod.GEOMETRIC_BROWNIAN.value,
+            'initial_value': v0,
+            'mean_annual_return': annual_return,
+            'annual_volatility': volatility,
+            'tail_probability': tail_probability,
+            'timestamp': datetime.utcnow().isoformat()
+        },
+        'scenarios': {
+            'best_case': float(quantile(1 - tail_probability)),
+            'worst_case': float(quantile(tail_probability)),
+            'median': float(median_final),
+            'mean': float(mean_final)
+        },
+        'percentiles': {f'p{int(level * 100)}': float(quantile(level)) for level in confidence_levels},
+        'statistics': {
+            'mean_final_value': float(mean_final),
+            'median_final_value': float(median_final),
+            'std_final_value': float(std_final),
+            'mean_total_return': float(mean_final / v0 - 1),
+            'median_total_return': float(median_final / v0 - 1),
+            'mean_annualized_return': float(annualized_mean),
+            'median_annualized_return': float(np.exp(mu / years) - 1)
+        },
+        'probabilities': {
+            'prob_gain': prob_above(1.0),
+            'prob_loss': 1.0 - prob_above(1.0) if sd > 0 else float(mu < 0),
+            'prob_double': prob_above(2.0),
+            'prob_triple': prob_above(3.0),
+            'prob_10pct_gain': prob_above(1.1),
+            'prob_25pct_gain': prob_above(1.25)
+        },
+        'risk_metrics': {
+            'value_at_risk_95': float(quantile(0.05) / v0 - 1),
+            'value_at_risk_99': float(quantile(0.01) / v0 - 1),
+            'conditional_var_95': float(tail_mean(0.05) / v0 - 1),
+            'conditional_var_99': float(tail_mean(0.01) / v0 - 1)
+        }
+    }
 
 
 def get_simulator(num_simulations: int = 1000, config: Optional[SimulationConfig] = None) -> MonteCarloSimulator:
@@ -288,13 +2102,30 @@ def get_simulator(num_simulations: int = 1000, config: Optional[SimulationConfig
     return MonteCarloSimulator(config)
 
 
-def quick_simulate(portfolio_value: float, annual_return: float = 0.08, volatility: float = 0.15, years: int = 10, num_simulations: int = 1000) -> Dict[str, Any]:
-    """Quick simulation with minimal inputs"""
+def quick_simulate(
+    portfolio_value: float,
+    annual_return: float = 0.08,
+    volatility: float = 0.15,
+    years: int = 10,
+    num_simulations: int = 1000,
+    monthly_contribution: float = 0.0,
+    method: SimulationMethod = SimulationMethod.GEOMETRIC_BROWNIAN
+) -> Dict[str, Any]:
+    """
+    Quick forecast with minimal inputs.
+
+    Plain GBM without contributions is answered in closed form; simulation is
+    only run when contributions or another method require it.
+    """
+    if monthly_contribution <= 0 and method == SimulationMethod.GEOMETRIC_BROWNIAN:
+        return analytic_forecast(portfolio_value, annual_return, volatility, years)
+    
     holdings = [{
         'value': portfolio_value,
         'annual_return': annual_return,
         'volatility': volatility
     }]
     
-    simulator = get_simulator(num_simulations=num_simulations)
-    return simulator.simulate_portfolio(holdings, years=years)
+    simulator = MonteCarloSimulator(SimulationConfig(num_simulations=num_simulations, method=method))
+    contributions = {'monthly_amount': monthly_contribution} if monthly_contribution > 0 else None
+    return simulator.simulate_portfolio(holdings, years=years, contributions=contributions)
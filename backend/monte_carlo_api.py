@@ -4,10 +4,23 @@ Provides portfolio forecasting via Monte Carlo simulation with comprehensive opt
 """
 
 from fastapi import APIRouter, HTTPException, Query, Body, BackgroundTasks
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field, validator
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date
+from pathlib import Path
+import threading
+import hashlib
+import uuid
+import time
 import logging
+import json
+import gzip
+import os
+
+import numpy as np
 
 from monte_carlo import (
     get_simulator,
@@ -15,8 +28,18 @@ from monte_carlo import (
     SimulationConfig,
     DistributionType,
     SimulationMethod,
+    VarianceReduction,
+    SimulationCancelled,
+    SolveFor,
+    TimeSeriesResolution,
+    TimeSeriesEncoding,
+    analytic_forecast,
+    simulate_scenarios,
+    scenario_setting_conflicts,
+    solve_cash_flow,
     quick_simulate
 )
+from monte_carlo_kernels import kernel_info
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -39,10 +62,21 @@ class HoldingInput(BaseModel):
         return v.upper().strip()
 
 
+class CashFlowEventInput(BaseModel):
+    """Model for a one-off cash flow (negative = withdrawal)"""
+    year: float = Field(..., ge=0)
+    amount: float
+    label: Optional[str] = None
+
+
 class ContributionsInput(BaseModel):
-    """Model for regular contributions"""
+    """Model for regular contributions and retirement withdrawals"""
     monthly_amount: float = Field(..., ge=0)
     annual_increase: float = Field(0.0, ge=0, le=0.2)
+    retirement_year: Optional[float] = Field(None, ge=0)
+    monthly_withdrawal: float = Field(0.0, ge=0)
+    inflation_rate: float = Field(0.0, ge=0, le=0.2)
+    events: List[CashFlowEventInput] = Field(default_factory=list, max_items=100)
 
 
 class SimulationRequest(BaseModel):
@@ -55,6 +89,30 @@ class SimulationRequest(BaseModel):
     distribution: Optional[DistributionType] = Field(DistributionType.NORMAL)
     contributions: Optional[ContributionsInput] = None
     risk_free_rate: Optional[float] = Field(0.03, ge=0, le=0.2)
+    streaming: Optional[bool] = Field(None, description="Aggregate in fixed-size blocks (default: automatic for large runs)")
+    variance_reduction: VarianceReduction = Field(VarianceReduction.NONE)
+    target_relative_error: Optional[float] = Field(
+        None, gt=0, le=0.1,
+        description="Stop once every requested percentile's standard error is below this fraction of its value; num_simulations becomes the cap"
+    )
+    multi_asset: bool = Field(False, description="Simulate correlated holding-level paths")
+    correlation_matrix: Optional[List[List[float]]] = Field(
+        None, description="Holding correlation matrix in holdings order (default: estimated from price history in multi-asset mode)"
+    )
+    rebalance_months: Optional[int] = Field(None, ge=1, le=120, description="Rebalance to initial weights every N months (multi-asset only)")
+    degrees_of_freedom: float = Field(5.0, gt=2, le=100, description="Student-t degrees of freedom")
+    bootstrap_block_months: float = Field(6.0, ge=1, le=60, description="Mean block length of the historical bootstrap")
+    mean_reversion_speed: float = Field(1.0, gt=0, le=20, description="Annual Ornstein-Uhlenbeck reversion speed")
+    regimes: int = Field(2, ge=2, le=4, description="Markov regimes fitted by the regime-switching method")
+    random_seed: Optional[int] = Field(42, ge=0, description="Seed for reproducible results; null draws fresh randomness and bypasses the cache")
+    use_cache: bool = Field(True, description="Serve and store results in the result cache")
+    time_series_resolution: TimeSeriesResolution = Field(
+        TimeSeriesResolution.AUTO,
+        description="Point spacing of time_series; auto is monthly up to 10 years, quarterly up to 20 and yearly beyond (see months)"
+    )
+    sample_path_points: Optional[int] = Field(None, ge=3, le=601, description="LTTB-decimate each sample path to this many points")
+    time_series_digits: Optional[int] = Field(None, ge=1, le=15, description="Significant digits kept in time_series values (e.g. 7 for float32 precision)")
+    time_series_encoding: TimeSeriesEncoding = Field(TimeSeriesEncoding.JSON, description="json lists or base64 float32 arrays")
     
     @validator('confidence_levels')
     def validate_confidence_levels(cls, v):
@@ -63,12 +121,21 @@ class SimulationRequest(BaseModel):
         return sorted(v)
 
 
+class SolveRequest(SimulationRequest):
+    """Request model for the sustainable withdrawal / required contribution solver"""
+    num_simulations: int = Field(10000, ge=100, le=100000)
+    solve_for: SolveFor = Field(SolveFor.WITHDRAWAL)
+    target_success: float = Field(0.9, gt=0, lt=1, description="Required probability of never depleting the portfolio")
+    target_final_value: float = Field(0.0, ge=0, description="Final value a successful path must also reach")
+
+
 class QuickForecastRequest(BaseModel):
     """Simplified request for quick forecast"""
     portfolio_value: float = Field(..., gt=0)
     annual_return: float = Field(0.08, ge=-1, le=2)
     volatility: float = Field(0.15, ge=0, le=2)
     years: int = Field(10, ge=1, le=50)
+    monthly_contribution: float = Field(0.0, ge=0, description="Monthly contribution (forces simulation)")
 
 
 class QuickForecastResponse(BaseModel):
@@ -81,6 +148,429 @@ class QuickForecastResponse(BaseModel):
     prob_loss: float
     prob_double: float
     expected_return: float
+    engine: str = 'analytic'
+
+
+def _quick_response(results: Dict[str, Any]) -> QuickForecastResponse:
+    return QuickForecastResponse(
+        initial_value=results['metadata']['initial_value'],
+        median_outcome=results['scenarios']['median'],
+        best_case=results['scenarios']['best_case'],
+        worst_case=results['scenarios']['worst_case'],
+        prob_gain=results['probabilities']['prob_gain'],
+        prob_loss=results['probabilities']['prob_loss'],
+        prob_double=results['probabilities']['prob_double'],
+        expected_return=results['statistics']['mean_annualized_return'],
+        engine=results['metadata'].get('engine', 'simulation')
+    )
+
+
+def _build_config(request: SimulationRequest) -> SimulationConfig:
+    """Simulation configuration for a request"""
+    return SimulationConfig(
+        num_simulations=request.num_simulations,
+        years=request.years,
+        method=request.method,
+        distribution=request.distribution,
+        risk_free_rate=request.risk_free_rate,
+        streaming=request.streaming,
+        variance_reduction=request.variance_reduction,
+        target_relative_error=request.target_relative_error,
+        multi_asset=request.multi_asset,
+        rebalance_months=request.rebalance_months,
+        random_seed=request.random_seed,
+        degrees_of_freedom=request.degrees_of_freedom,
+        bootstrap_block_months=request.bootstrap_block_months,
+        mean_reversion_speed=request.mean_reversion_speed,
+        regimes=request.regimes,
+        time_series_resolution=request.time_series_resolution,
+        sample_path_points=request.sample_path_points,
+        time_series_digits=request.time_series_digits,
+        time_series_encoding=request.time_series_encoding
+    )
+
+
+# Result Cache
+
+# Bump whenever simulation output for an unchanged request changes, so stale entries stop matching
+RESULT_CACHE_VERSION = 2
+RESULT_CACHE_MAX_BYTES = int(os.getenv("MONTE_CARLO_CACHE_BYTES", 64 * 1024 * 1024))
+RESULT_CACHE_DIR = os.getenv("MONTE_CARLO_CACHE_DIR")
+RESULT_CACHE_DISK_MAX_BYTES = int(os.getenv("MONTE_CARLO_CACHE_DISK_BYTES", 512 * 1024 * 1024))
+
+# Fields that change how a run is executed but not what it returns
+_CACHE_EXCLUDED_FIELDS = {'use_cache'}
+
+
+def _json_default(value: Any) -> Any:
+    """JSON encoding for numpy values in simulation results"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def request_cache_key(request: SimulationRequest) -> Optional[str]:
+    """
+    Content address of a simulation request.
+
+    The key is a SHA-256 of the canonical JSON (sorted keys, enum values,
+    holdings in a fixed order unless their order affects the result) of
+    every field that affects the result. Runs that read price history also key
+    on the date, since the history they see changes daily.
+
+    Args:
+        request: Simulation request
+
+    Returns:
+        Hex digest, or None when the request is not reproducible (no seed)
+    """
+    if request.random_seed is None:
+        return None
+    
+    payload = request.dict(exclude=_CACHE_EXCLUDED_FIELDS)
+    # Holding order only matters when it lines up with a matrix or per-asset random streams
+    if request.correlation_matrix is None and not request.multi_asset:
+        payload['holdings'] = sorted(payload['holdings'], key=lambda h: json.dumps(h, sort_keys=True, default=str))
+    
+    config = _build_config(request)
+    if config.uses_history() or (request.multi_asset and request.correlation_matrix is None):
+        payload['history_date'] = date.today().isoformat()
+    
+    payload['cache_version'] = RESULT_CACHE_VERSION
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=lambda v: getattr(v, 'value', str(v)))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Byte-bounded LRU cache of serialized simulation results.
+
+    Entries are stored as gzipped JSON so the bound is on real memory, and every
+    hit returns a fresh copy. With a directory configured, entries are also
+    written there atomically, so other worker processes (and restarts) can
+    serve them; the directory is trimmed oldest-first to its own byte bound.
+    """
+    
+    def __init__(
+        self,
+        max_bytes: int = RESULT_CACHE_MAX_BYTES,
+        directory: Optional[str] = RESULT_CACHE_DIR,
+        disk_max_bytes: int = RESULT_CACHE_DISK_MAX_BYTES
+    ):
+        self.max_bytes = max_bytes
+        self.directory = Path(directory) if directory else None
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result for a key, or None"""
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is not None:
+                self._entries.move_to_end(key)
+        
+        if blob is None and self.directory:
+            blob = self._read_disk(key)
+            if blob is not None:
+                self._remember(key, blob)
+        
+        with self._lock:
+            if blob is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        
+        return json.loads(gzip.decompress(blob))
+    
+    def put(self, key: str, result: Dict[str, Any]):
+        """Store a result"""
+        blob = gzip.compress(json.dumps(result, default=_json_default).encode(), compresslevel=6)
+        self._remember(key, blob)
+        
+        if self.directory:
+            self._write_disk(key, blob)
+    
+    def clear(self):
+        """Drop every entry (memory and disk)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        
+        if self.directory:
+            for path in self.directory.glob('*.json.gz'):
+                path.unlink(missing_ok=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'persistent': self.directory is not None
+            }
+    
+    def _remember(self, key: str, blob: bytes):
+        if len(blob) > self.max_bytes:
+            return
+        
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = blob
+            self._bytes += len(blob)
+            
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+    
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        path = self.directory / f"{key}.json.gz"
+        try:
+            blob = path.read_bytes()
+            os.utime(path)  # recency for trimming
+            return blob
+        except OSError:
+            return None
+    
+    def _write_disk(self, key: str, blob: bytes):
+        path = self.directory / f"{key}.json.gz"
+        temp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            temp.write_bytes(blob)
+            os.replace(temp, path)
+            self._trim_disk()
+        except OSError as e:
+            logger.warning(f"Failed to persist cached result: {e}")
+            temp.unlink(missing_ok=True)
+    
+    def _trim_disk(self):
+        files = []
+        for path in self.directory.glob('*.json.gz'):
+            try:
+                stat = path.stat()
+                files.append((stat.st_mtime, stat.st_size, path))
+            except OSError:
+                continue
+        
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+_result_cache = None
+
+
+def get_result_cache() -> ResultCache:
+    """Get or create the result cache singleton"""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache()
+    return _result_cache
+
+
+def _contributions_data(request: SimulationRequest) -> Optional[Dict[str, Any]]:
+    if not request.contributions:
+        return None
+    return {
+        'monthly_amount': request.contributions.monthly_amount,
+        'annual_increase': request.contributions.annual_increase,
+        'retirement_year': request.contributions.retirement_year,
+        'monthly_withdrawal': request.contributions.monthly_withdrawal,
+        'inflation_rate': request.contributions.inflation_rate,
+        'events': [{'year': event.year, 'amount': event.amount} for event in request.contributions.events],
+        'years': request.years
+    }
+
+
+def _simulate_request(
+    request: SimulationRequest,
+    progress_callback: Optional[Any] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> Dict[str, Any]:
+    """Run a simulation request, serving and filling the result cache"""
+    key = request_cache_key(request) if request.use_cache else None
+    cache = get_result_cache()
+    
+    if key:
+        cached = cache.get(key)
+        if cached is not None:
+            cached['metadata']['cache'] = {'hit': True, 'key': key}
+            return cached
+    
+    simulator = MonteCarloSimulator(_build_config(request), progress_callback, cancel_event)
+    results = simulator.simulate_portfolio(
+        holdings=[h.dict() for h in request.holdings],
+        years=request.years,
+        confidence_levels=request.confidence_levels,
+        contributions=_contributions_data(request),
+        correlation_matrix=request.correlation_matrix
+    )
+    
+    if key:
+        cache.put(key, results)
+    results['metadata']['cache'] = {'hit': False, 'key': key}
+    return results
+
+
+# Simulation Jobs
+
+JOB_WORKERS = int(os.getenv("MONTE_CARLO_JOB_WORKERS", 2))
+JOB_RETENTION_SECONDS = int(os.getenv("MONTE_CARLO_JOB_RETENTION", 3600))
+
+JOB_TERMINAL_STATES = {'completed', 'failed', 'cancelled'}
+
+
+class SimulationJobManager:
+    """
+    Background simulation jobs on a small thread pool.
+
+    Jobs report progress per completed chunk and are cancelled cooperatively:
+    the simulator checks the job's flag after every chunk. Finished jobs (and
+    their results) are kept for the retention window, then dropped.
+    """
+    
+    def __init__(self, max_workers: int = JOB_WORKERS, retention_seconds: int = JOB_RETENTION_SECONDS):
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="monte-carlo-job")
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+    
+    def submit(self, request: SimulationRequest) -> Dict[str, Any]:
+        """Queue a simulation and return its status"""
+        self._purge_expired()
+        
+        job_id = uuid.uuid4().hex
+        job = {
+            'job_id': job_id,
+            'status': 'queued',
+            'completed_chunks': 0,
+            'total_chunks': None,
+            'submitted_at': datetime.utcnow().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'finished_monotonic': None,
+            'error': None,
+            'result': None,
+            'cancel_event': threading.Event(),
+            'num_simulations': request.num_simulations,
+            'years': request.years
+        }
+        
+        with self._lock:
+            self._jobs[job_id] = job
+            job['future'] = self._executor.submit(self._run, job, request)
+        
+        return self.status(job_id)
+    
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Public view of a job, or None if unknown or expired"""
+        self._purge_expired()
+        
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            total = job['total_chunks']
+            return {
+                'job_id': job_id,
+                'status': job['status'],
+                'progress': 1.0 if job['status'] == 'completed' else (job['completed_chunks'] / total if total else 0.0),
+                'completed_chunks': job['completed_chunks'],
+                'total_chunks': total,
+                'num_simulations': job['num_simulations'],
+                'years': job['years'],
+                'submitted_at': job['submitted_at'],
+                'started_at': job['started_at'],
+                'finished_at': job['finished_at'],
+                'error': job['error']
+            }
+    
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The job record including its result, or None if unknown or expired"""
+        self._purge_expired()
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Request cancellation; queued jobs never start, running jobs stop after their current chunk"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job['status'] not in JOB_TERMINAL_STATES:
+                job['cancel_event'].set()
+                if job['future'].cancel():
+                    self._finish(job, 'cancelled')
+        return self.status(job_id)
+    
+    def _run(self, job: Dict[str, Any], request: SimulationRequest):
+        with self._lock:
+            if job['cancel_event'].is_set():
+                self._finish(job, 'cancelled')
+                return
+            job['status'] = 'running'
+            job['started_at'] = datetime.utcnow().isoformat()
+        
+        def on_progress(completed: int, total: int):
+            with self._lock:
+                job['completed_chunks'] = completed
+                job['total_chunks'] = total
+        
+        try:
+            result = _simulate_request(request, on_progress, job['cancel_event'])
+            with self._lock:
+                job['result'] = result
+                self._finish(job, 'completed')
+        except SimulationCancelled:
+            with self._lock:
+                self._finish(job, 'cancelled')
+        except Exception as e:
+            logger.error(f"Simulation job {job['job_id']} failed: {e}", exc_info=True)
+            with self._lock:
+                job['error'] = str(e)
+                self._finish(job, 'failed')
+    
+    def _finish(self, job: Dict[str, Any], status: str):
+        # Caller holds the lock
+        job['status'] = status
+        job['finished_at'] = datetime.utcnow().isoformat()
+        job['finished_monotonic'] = time.monotonic()
+    
+    def _purge_expired(self):
+        cutoff = time.monotonic() - self.retention_seconds
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job['finished_monotonic'] is not None and job['finished_monotonic'] < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+
+_job_manager = None
+
+
+def get_job_manager() -> SimulationJobManager:
+    """Get or create the simulation job manager singleton"""
+    global _job_manager
+    if _job_manager is None:
+        _job_manager = SimulationJobManager()
+    return _job_manager
 
 
 # Main Endpoints
@@ -91,7 +581,7 @@ async def run_monte_carlo_simulation(request: SimulationRequest, background_task
     Run comprehensive Monte Carlo simulation for portfolio forecasting.
     
     **Features**:
-    - Multiple simulation methods (GBM, Bootstrap, Mean Reversion)
+    - Multiple simulation methods (GBM, Bootstrap, Mean Reversion, Regime Switching)
     - Various distribution types (Normal, Student-t, Historical)
     - Support for regular contributions with annual increases
     - Comprehensive risk metrics (VaR, CVaR, Sharpe, Sortino)
@@ -104,37 +594,13 @@ async def run_monte_carlo_simulation(request: SimulationRequest, background_task
         if not request.holdings:
             raise HTTPException(status_code=400, detail="Holdings list cannot be empty")
         
-        config = SimulationConfig(
-            num_simulations=request.num_simulations,
-            years=request.years,
-            method=request.method,
-            distribution=request.distribution,
-            risk_free_rate=request.risk_free_rate
-        )
-        
-        simulator = MonteCarloSimulator(config)
-        
-        holdings_data = [h.dict() for h in request.holdings]
-        
-        contributions_data = None
-        if request.contributions:
-            contributions_data = {
-                'monthly_amount': request.contributions.monthly_amount,
-                'annual_increase': request.contributions.annual_increase,
-                'years': request.years
-            }
-        
-        results = simulator.simulate_portfolio(
-            holdings=holdings_data,
-            years=request.years,
-            confidence_levels=request.confidence_levels,
-            contributions=contributions_data
-        )
+        # Compute runs off the event loop so other requests keep being served
+        results = await run_in_threadpool(_simulate_request, request)
         
         elapsed = (datetime.now() - start_time).total_seconds()
         logger.info(f"Simulation complete in {elapsed:.2f}s. Median: ${results['scenarios']['median']:,.2f}")
         
-        background_tasks.add_task(_log_simulation_analytics, request.num_simulations, request.years, len(holdings_data), elapsed)
+        background_tasks.add_task(_log_simulation_analytics, request.num_simulations, request.years, len(request.holdings), elapsed)
         
         return results
         
@@ -146,6 +612,53 @@ async def run_monte_carlo_simulation(request: SimulationRequest, background_task
         raise HTTPException(status_code=500, detail=f"Simulation failed: {str(e)}")
 
 
+@router.post('/monte-carlo/jobs', tags=["Monte Carlo"], status_code=202)
+async def submit_simulation_job(request: SimulationRequest):
+    """
+    Submit a simulation to run in the background.
+    
+    Poll `/monte-carlo/jobs/{job_id}` for progress and fetch the output from
+    `/monte-carlo/jobs/{job_id}/result` once the status is `completed`.
+    """
+    try:
+        _build_config(request).validate()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return get_job_manager().submit(request)
+
+
+@router.get('/monte-carlo/jobs/{job_id}', tags=["Monte Carlo"])
+async def get_simulation_job(job_id: str):
+    """Status and progress of a simulation job"""
+    status = get_job_manager().status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return status
+
+
+@router.get('/monte-carlo/jobs/{job_id}/result', tags=["Monte Carlo"])
+async def get_simulation_job_result(job_id: str):
+    """Result of a completed simulation job"""
+    job = get_job_manager().result(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    if job['status'] == 'failed':
+        raise HTTPException(status_code=500, detail=f"Simulation failed: {job['error']}")
+    if job['status'] != 'completed':
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return job['result']
+
+
+@router.delete('/monte-carlo/jobs/{job_id}', tags=["Monte Carlo"])
+async def cancel_simulation_job(job_id: str):
+    """Cancel a queued or running simulation job"""
+    status = get_job_manager().cancel(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return status
+
+
 @router.post('/monte-carlo/quick-forecast', response_model=QuickForecastResponse, tags=["Monte Carlo"])
 async def quick_forecast(request: QuickForecastRequest):
     """Run a fast portfolio forecast with simplified inputs and outputs"""
@@ -157,19 +670,11 @@ async def quick_forecast(request: QuickForecastRequest):
             annual_return=request.annual_return,
             volatility=request.volatility,
             years=request.years,
-            num_simulations=500
+            num_simulations=500,
+            monthly_contribution=request.monthly_contribution
         )
         
-        response = QuickForecastResponse(
-            initial_value=results['metadata']['initial_value'],
-            median_outcome=results['scenarios']['median'],
-            best_case=results['scenarios']['best_case'],
-            worst_case=results['scenarios']['worst_case'],
-            prob_gain=results['probabilities']['prob_gain'],
-            prob_loss=results['probabilities']['prob_loss'],
-            prob_double=results['probabilities']['prob_double'],
-            expected_return=results['statistics']['mean_annualized_return']
-        )
+        response = _quick_response(results)
         
         logger.info(f"Quick forecast complete. Median: ${response.median_outcome:,.2f}")
         
@@ -197,16 +702,7 @@ async def simple_forecast(
             num_simulations=500
         )
         
-        return QuickForecastResponse(
-            initial_value=results['metadata']['initial_value'],
-            median_outcome=results['scenarios']['median'],
-            best_case=results['scenarios']['best_case'],
-            worst_case=results['scenarios']['worst_case'],
-            prob_gain=results['probabilities']['prob_gain'],
-            prob_loss=results['probabilities']['prob_loss'],
-            prob_double=results['probabilities']['prob_double'],
-            expected_return=results['statistics']['mean_annualized_return']
-        )
+        return _quick_response(results)
         
     except Exception as e:
         logger.error(f"Simple forecast failed: {e}")
@@ -214,49 +710,123 @@ async def simple_forecast(
 
 
 @router.post('/monte-carlo/compare', tags=["Monte Carlo"])
-async def compare_scenarios(scenarios: List[SimulationRequest] = Body(..., min_items=2, max_items=5)):
-    """Compare multiple simulation scenarios side-by-side"""
+async def compare_scenarios(
+    scenarios: List[SimulationRequest] = Body(..., min_items=2, max_items=5),
+    baseline: int = Query(1, ge=1, le=5, description="Scenario (1-based) that differences are measured against")
+):
+    """
+    Compare multiple simulation scenarios side-by-side on common random numbers.
+    
+    Every scenario is evaluated on the same simulated shocks (using the largest
+    requested path count and the first scenario's seed), so the reported
+    differences are paired and far less noisy than independent runs. The
+    shared shocks use one variance reduction and chunk size, so scenarios
+    must agree on them; adaptive stopping is not available here.
+    """
     try:
         if len(scenarios) < 2 or len(scenarios) > 5:
             raise HTTPException(status_code=400, detail="2-5 scenarios required")
+        if baseline > len(scenarios):
+            raise HTTPException(status_code=400, detail="baseline must refer to a submitted scenario")
         
         logger.info(f"Comparing {len(scenarios)} scenarios")
         
-        results = []
+        random_seed = scenarios[0].random_seed
+        configs = [_build_config(scenario) for scenario in scenarios]
         
-        for i, scenario in enumerate(scenarios):
-            config = SimulationConfig(
-                num_simulations=scenario.num_simulations,
-                years=scenario.years,
-                method=scenario.method,
-                distribution=scenario.distribution
-            )
-            
-            simulator = MonteCarloSimulator(config)
-            holdings_data = [h.dict() for h in scenario.holdings]
-            
-            result = simulator.simulate_portfolio(holdings=holdings_data, years=scenario.years, confidence_levels=scenario.confidence_levels)
+        mismatched = scenario_setting_conflicts(configs)
+        if mismatched:
+            raise HTTPException(status_code=422, detail=f"Compared scenarios must share {', '.join(mismatched)}")
+        if configs[0].target_relative_error is not None:
+            raise HTTPException(status_code=422, detail="target_relative_error is not supported when comparing scenarios")
+        
+        # The whole comparison is content-addressed: unchanged requests are served from the cache
+        keys = [request_cache_key(scenario) for scenario in scenarios]
+        cache_key = None
+        if all(keys) and all(scenario.use_cache for scenario in scenarios):
+            cache_key = hashlib.sha256(f"compare:{baseline}:{','.join(keys)}".encode()).hexdigest()
+            cached = get_result_cache().get(cache_key)
+            if cached is not None:
+                cached['metadata']['cache'] = {'hit': True, 'key': cache_key}
+                return cached
+        
+        scenario_inputs = [
+            {
+                'config': config,
+                'holdings': [h.dict() for h in scenario.holdings],
+                'contributions': _contributions_data(scenario),
+                'correlation_matrix': scenario.correlation_matrix,
+                'confidence_levels': scenario.confidence_levels
+            }
+            for scenario, config in zip(scenarios, configs)
+        ]
+        
+        outcome = await run_in_threadpool(
+            simulate_scenarios, scenario_inputs, random_seed, baseline - 1, block_size=configs[0].block_size
+        )
+        
+        results = outcome['scenarios']
+        for i, result in enumerate(results):
             result['scenario_id'] = i + 1
-            results.append(result)
         
         comparison = {
             'scenarios': results,
             'summary': {
                 'best_median': max(r['scenarios']['median'] for r in results),
-                'worst_median': min(r['scenarios']['median'] for r in results)
+                'worst_median': min(r['scenarios']['median'] for r in results),
+                'baseline_scenario_id': baseline,
+                'differences': [
+                    {'scenario_id': d.pop('scenario_index') + 1, **d} for d in outcome['differences']
+                ]
             },
+            'metadata': outcome['metadata'],
             'timestamp': datetime.utcnow().isoformat()
         }
         
+        if cache_key:
+            get_result_cache().put(cache_key, comparison)
+        comparison['metadata']['cache'] = {'hit': False, 'key': cache_key}
+        
         return comparison
         
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Scenario comparison failed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post('/monte-carlo/solve', tags=["Monte Carlo"])
+async def solve_sustainable_amount(request: SolveRequest):
+    """
+    Solve for the monthly withdrawal (or contribution) that meets a target success rate.
+    
+    One set of return paths is simulated and every candidate amount is judged
+    by re-evaluating cash flows only, so the answer comes back in one call.
+    Other cash flows in `contributions` stay fixed; the solved amount replaces
+    monthly_withdrawal (from retirement_year, default now) or monthly_amount
+    (until retirement_year).
+    """
+    try:
+        return await run_in_threadpool(
+            solve_cash_flow,
+            [h.dict() for h in request.holdings],
+            request.solve_for,
+            request.target_success,
+            _build_config(request),
+            _contributions_data(request),
+            request.target_final_value,
+            request.correlation_matrix
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Cash-flow solve failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get('/monte-carlo/methods', tags=["Monte Carlo"])
 async def get_simulation_methods():
     """Get information about available simulation methods and distributions"""
@@ -271,20 +841,32 @@ async def get_simulation_methods():
             {
                 'id': SimulationMethod.HISTORICAL_BOOTSTRAP.value,
                 'name': 'Historical Bootstrap',
-                'description': 'Samples from historical returns',
+                'description': 'Stationary block bootstrap of monthly portfolio returns from price history',
                 'use_case': 'When historical data available'
             },
             {
                 'id': SimulationMethod.MEAN_REVERSION.value,
                 'name': 'Mean Reversion',
-                'description': 'Ornstein-Uhlenbeck process',
+                'description': 'Log value reverts to its growth trend (exact Ornstein-Uhlenbeck steps)',
                 'use_case': 'Markets with mean reversion'
+            },
+            {
+                'id': SimulationMethod.REGIME_SWITCHING.value,
+                'name': 'Regime Switching',
+                'description': 'Markov bear/bull regimes with transition matrix, means and covariances fitted to price history',
+                'use_case': 'Volatility clustering and prolonged downturns'
             }
         ],
         'distributions': [
             {'id': DistributionType.NORMAL.value, 'name': 'Normal (Gaussian)'},
             {'id': DistributionType.STUDENT_T.value, 'name': 'Student-t'},
-            {'id': DistributionType.LOGNORMAL.value, 'name': 'Log-Normal'}
+            {'id': DistributionType.LOGNORMAL.value, 'name': 'Log-Normal'},
+            {'id': DistributionType.HISTORICAL.value, 'name': 'Historical (bootstrap)'}
+        ],
+        'variance_reduction': [
+            {'id': VarianceReduction.NONE.value, 'name': 'Plain Monte Carlo'},
+            {'id': VarianceReduction.ANTITHETIC.value, 'name': 'Antithetic Variates'},
+            {'id': VarianceReduction.SOBOL.value, 'name': 'Scrambled Sobol (Brownian bridge)'}
         ],
         'default_config': {
             'num_simulations': 1000,
@@ -294,27 +876,38 @@ async def get_simulation_methods():
     }
 
 
+@router.get('/monte-carlo/cache', tags=["Monte Carlo"])
+async def get_cache_stats():
+    """Result cache size and hit statistics"""
+    return get_result_cache().stats()
+
+
+@router.delete('/monte-carlo/cache', tags=["Monte Carlo"])
+async def clear_result_cache():
+    """Drop all cached simulation results"""
+    get_result_cache().clear()
+    return {'status': 'cleared', 'timestamp': datetime.utcnow().isoformat()}
+
+
 @router.get('/monte-carlo/health', tags=["Monte Carlo"])
 async def check_health():
     """Health check for Monte Carlo simulation service"""
     try:
         test_start = datetime.now()
         
-        test_result = quick_simulate(
-            portfolio_value=100000,
-            annual_return=0.08,
-            volatility=0.15,
-            years=5,
-            num_simulations=100
-        )
+        # The closed-form engine exercises the forecast path without burning CPU
+        test_result = analytic_forecast(portfolio_value=100000, annual_return=0.08, volatility=0.15, years=5)
+        if not np.isfinite(test_result['scenarios']['median']):
+            raise ValueError("Analytic forecast returned a non-finite median")
         
         test_time = (datetime.now() - test_start).total_seconds()
         
         return {
             'status': 'healthy',
             'service': 'Monte Carlo Simulation',
-            'test_simulation_time': f"{test_time:.3f}s",
+            'test_simulation_time': f"{test_time:.6f}s",
             'max_simulations': 100000,
+            'kernels': kernel_info(),
             'timestamp': datetime.utcnow().isoformat()
         }
         
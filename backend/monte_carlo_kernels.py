@@ -0,0 +1,348 @@
+"""
+Compiled Kernels for Path-Dependent Monte Carlo Logic
+Guardrail withdrawals, threshold rebalancing, stop-loss rules and mean-reverting
+deviations, compiled with Numba when it is installed and run as NumPy time loops
+(vectorized over paths) otherwise
+"""
+
+import numpy as np
+from typing import Dict, Optional
+import logging
+import os
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    numba = None
+    NUMBA_AVAILABLE = False
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 'auto' (Numba when available), 'numba' or 'numpy'
+KERNEL_BACKEND = os.getenv("MONTE_CARLO_KERNELS", "auto")
+
+
+def _jit(function):
+    """Compile with Numba when available; the plain function is the reference otherwise"""
+    if NUMBA_AVAILABLE:
+        return numba.njit(cache=True, nogil=True)(function)
+    return function
+
+
+def use_numba(backend: Optional[str] = None) -> bool:
+    """
+    Whether a call should run the compiled kernel.
+
+    Args:
+        backend: 'auto', 'numba' or 'numpy' (default: KERNEL_BACKEND)
+
+    Returns:
+        True for the Numba kernel, False for the NumPy implementation
+    """
+    backend = backend or KERNEL_BACKEND
+    if backend == 'numpy':
+        return False
+    if backend == 'numba':
+        if not NUMBA_AVAILABLE:
+            raise ValueError("numba is not installed")
+        return True
+    if backend != 'auto':
+        raise ValueError(f"Unknown kernel backend: {backend}")
+    return NUMBA_AVAILABLE
+
+
+def kernel_info() -> Dict[str, str]:
+    """Backend in use, for metadata and health checks"""
+    return {
+        'backend': 'numba' if use_numba() else 'numpy',
+        'numba_version': numba.__version__ if NUMBA_AVAILABLE else None
+    }
+
+
+# ========================================
+# GUARDRAIL WITHDRAWALS
+# ========================================
+
+@_jit
+def _guardrail_loop(returns, initial_value, withdrawal, inflation, upper, lower, adjustment, paths, paid):
+    n_paths, n_steps = returns.shape
+    initial_rate = withdrawal / initial_value
+    for i in range(n_paths):
+        value = initial_value
+        amount = withdrawal
+        paths[i, 0] = value
+        for t in range(n_steps):
+            if t > 0 and t % 12 == 0:
+                amount *= 1.0 + inflation
+                if value > 0.0:
+                    rate = amount / value
+                    if rate > initial_rate * (1.0 + upper):
+                        amount *= 1.0 - adjustment
+                    elif rate < initial_rate * (1.0 - lower):
+                        amount *= 1.0 + adjustment
+            value *= 1.0 + returns[i, t]
+            taken = min(amount, value)
+            value -= taken
+            paid[i, t] = taken
+            paths[i, t + 1] = value
+
+
+def _guardrail_numpy(returns, initial_value, withdrawal, inflation, upper, lower, adjustment, paths, paid):
+    n_paths, n_steps = returns.shape
+    initial_rate = withdrawal / initial_value
+    value = np.full(n_paths, float(initial_value))
+    amount = np.full(n_paths, float(withdrawal))
+    paths[:, 0] = value
+    for t in range(n_steps):
+        if t > 0 and t % 12 == 0:
+            amount *= 1.0 + inflation
+            rate = np.divide(amount, value, out=np.full(n_paths, initial_rate), where=value > 0)
+            amount *= np.where(rate > initial_rate * (1.0 + upper), 1.0 - adjustment,
+                               np.where(rate < initial_rate * (1.0 - lower), 1.0 + adjustment, 1.0))
+        value *= 1.0 + returns[:, t]
+        taken = np.minimum(amount, value)
+        value -= taken
+        paid[:, t] = taken
+        paths[:, t + 1] = value
+
+
+def guardrail_withdrawals(
+    returns: np.ndarray,
+    initial_value: float,
+    monthly_withdrawal: float,
+    inflation_rate: float = 0.0,
+    upper_guardrail: float = 0.2,
+    lower_guardrail: float = 0.2,
+    adjustment: float = 0.1,
+    backend: Optional[str] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Paths under guardrail (Guyton-Klinger style) withdrawals.
+
+    Each year the withdrawal is indexed by inflation; if it then exceeds the
+    initial withdrawal rate by more than upper_guardrail it is cut by
+    adjustment, and if it is below it by more than lower_guardrail it is
+    raised by adjustment. Withdrawals come out at the end of each month and
+    never exceed the remaining value, so depletion is absorbing.
+
+    Args:
+        returns: (paths x months) simple returns
+        initial_value: Starting value
+        monthly_withdrawal: Initial monthly withdrawal
+        inflation_rate: Yearly withdrawal indexation
+        upper_guardrail: Relative rate increase that triggers a cut
+        lower_guardrail: Relative rate decrease that triggers a raise
+        adjustment: Relative size of a cut or raise
+        backend: 'auto', 'numba' or 'numpy'
+
+    Returns:
+        Dictionary with paths (paths x months + 1) and withdrawals (paths x months)
+    """
+    returns = np.ascontiguousarray(returns, dtype=float)
+    paths = np.empty((returns.shape[0], returns.shape[1] + 1))
+    paid = np.empty_like(returns)
+    kernel = _guardrail_loop if use_numba(backend) else _guardrail_numpy
+    kernel(returns, float(initial_value), float(monthly_withdrawal), float(inflation_rate),
+           float(upper_guardrail), float(lower_guardrail), float(adjustment), paths, paid)
+    return {'paths': paths, 'withdrawals': paid}
+
+
+# ========================================
+# THRESHOLD REBALANCING
+# ========================================
+
+@_jit
+def _rebalance_loop(returns, initial_values, weights, band, paths, rebalances):
+    n_paths, n_steps, n_assets = returns.shape
+    holdings = np.empty(n_assets)
+    for i in range(n_paths):
+        total = 0.0
+        for a in range(n_assets):
+            holdings[a] = initial_values[a]
+            total += holdings[a]
+        paths[i, 0] = total
+        count = 0
+        for t in range(n_steps):
+            total = 0.0
+            for a in range(n_assets):
+                holdings[a] *= 1.0 + returns[i, t, a]
+                total += holdings[a]
+            paths[i, t + 1] = total
+            if total > 0.0:
+                drifted = False
+                for a in range(n_assets):
+                    if abs(holdings[a] / total - weights[a]) > band:
+                        drifted = True
+                if drifted:
+                    for a in range(n_assets):
+                        holdings[a] = total * weights[a]
+                    count += 1
+        rebalances[i] = count
+
+
+def _rebalance_numpy(returns, initial_values, weights, band, paths, rebalances):
+    n_paths, n_steps, _ = returns.shape
+    holdings = np.tile(initial_values, (n_paths, 1))
+    paths[:, 0] = holdings.sum(axis=1)
+    rebalances[:] = 0
+    target = np.empty_like(holdings)
+    for t in range(n_steps):
+        holdings *= 1.0 + returns[:, t, :]
+        total = holdings.sum(axis=1)
+        paths[:, t + 1] = total
+        # |h / total - w| > band  <=>  |h - w * total| > band * total (for positive totals)
+        np.multiply(total[:, None], weights, out=target)
+        drifted = (np.abs(holdings - target) > band * total[:, None]).any(axis=1) & (total > 0)
+        np.copyto(holdings, target, where=drifted[:, None])
+        rebalances += drifted
+
+
+def threshold_rebalance(
+    returns: np.ndarray,
+    initial_values: np.ndarray,
+    weights: np.ndarray,
+    band: float = 0.05,
+    backend: Optional[str] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Portfolio paths rebalanced whenever any weight drifts outside a band.
+
+    Args:
+        returns: (paths x months x assets) simple returns
+        initial_values: (assets,) starting holdings
+        weights: (assets,) target weights
+        band: Absolute weight tolerance (0.05 = +/- 5 percentage points)
+        backend: 'auto', 'numba' or 'numpy'
+
+    Returns:
+        Dictionary with paths (paths x months + 1) and rebalances (paths,) counts
+    """
+    returns = np.ascontiguousarray(returns, dtype=float)
+    paths = np.empty((returns.shape[0], returns.shape[1] + 1))
+    rebalances = np.zeros(returns.shape[0], dtype=np.int64)
+    kernel = _rebalance_loop if use_numba(backend) else _rebalance_numpy
+    kernel(returns, np.asarray(initial_values, dtype=float), np.asarray(weights, dtype=float), float(band), paths, rebalances)
+    return {'paths': paths, 'rebalances': rebalances}
+
+
+# ========================================
+# STOP-LOSS
+# ========================================
+
+@_jit
+def _stop_loss_loop(returns, initial_value, stop, cash_return, cooldown, paths, triggers):
+    n_paths, n_steps = returns.shape
+    for i in range(n_paths):
+        value = initial_value
+        peak = initial_value
+        out_since = -1
+        count = 0
+        paths[i, 0] = value
+        for t in range(n_steps):
+            if out_since >= 0:
+                value *= 1.0 + cash_return
+                if cooldown > 0 and t + 1 - out_since >= cooldown:
+                    out_since = -1
+                    peak = value
+            else:
+                value *= 1.0 + returns[i, t]
+                if value > peak:
+                    peak = value
+                elif value <= peak * (1.0 - stop):
+                    out_since = t + 1
+                    count += 1
+            paths[i, t + 1] = value
+        triggers[i] = count
+
+
+def _stop_loss_numpy(returns, initial_value, stop, cash_return, cooldown, paths, triggers):
+    n_paths, n_steps = returns.shape
+    value = np.full(n_paths, float(initial_value))
+    peak = value.copy()
+    out_since = np.full(n_paths, -1, dtype=np.int64)
+    triggers[:] = 0
+    paths[:, 0] = value
+    for t in range(n_steps):
+        out = out_since >= 0
+        value *= 1.0 + np.where(out, cash_return, returns[:, t])
+
+        if cooldown > 0:
+            resume = out & (t + 1 - out_since >= cooldown)
+            out_since[resume] = -1
+            peak[resume] = value[resume]
+
+        invested = ~out
+        np.maximum(peak, np.where(invested, value, peak), out=peak)
+        hit = invested & (value <= peak * (1.0 - stop))
+        out_since[hit] = t + 1
+        triggers += hit
+        paths[:, t + 1] = value
+
+
+def stop_loss_paths(
+    returns: np.ndarray,
+    initial_value: float,
+    stop: float = 0.2,
+    cash_return: float = 0.0,
+    cooldown_months: int = 0,
+    backend: Optional[str] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Paths that move to cash once the drawdown from the running peak reaches a stop.
+
+    Args:
+        returns: (paths x months) simple returns while invested
+        initial_value: Starting value
+        stop: Drawdown from the peak that triggers the exit (0.2 = 20%)
+        cash_return: Monthly return while out of the market
+        cooldown_months: Months in cash before re-entering (0 = stay out)
+        backend: 'auto', 'numba' or 'numpy'
+
+    Returns:
+        Dictionary with paths (paths x months + 1) and triggers (paths,) counts
+    """
+    returns = np.ascontiguousarray(returns, dtype=float)
+    paths = np.empty((returns.shape[0], returns.shape[1] + 1))
+    triggers = np.zeros(returns.shape[0], dtype=np.int64)
+    kernel = _stop_loss_loop if use_numba(backend) else _stop_loss_numpy
+    kernel(returns, float(initial_value), float(stop), float(cash_return), int(cooldown_months), paths, triggers)
+    return {'paths': paths, 'triggers': triggers}
+
+
+# ========================================
+# MEAN REVERSION
+# ========================================
+
+@_jit
+def _ou_loop(shocks, phi, step_std, deviation):
+    n_paths, n_steps = shocks.shape
+    for i in range(n_paths):
+        x = 0.0
+        for t in range(n_steps):
+            x = phi * x + step_std * shocks[i, t]
+            deviation[i, t] = x
+
+
+def ou_deviation(shocks: np.ndarray, phi: float, step_std: float, backend: Optional[str] = None) -> np.ndarray:
+    """
+    AR(1) deviations X_t = phi X_{t-1} + step_std z_t with X_0 = 0.
+
+    Args:
+        shocks: (paths x steps) unit-variance shocks
+        phi: Autoregressive coefficient
+        step_std: Innovation scale
+        backend: 'auto', 'numba' or 'numpy' (NumPy runs one scipy linear filter)
+
+    Returns:
+        (paths x steps) deviations
+    """
+    if use_numba(backend):
+        deviation = np.empty(shocks.shape)
+        _ou_loop(np.ascontiguousarray(shocks, dtype=float), float(phi), float(step_std), deviation)
+        return deviation
+
+    from scipy.signal import lfilter
+
+    return lfilter([step_std], [1.0, -phi], shocks, axis=1)
@@ -0,0 +1,267 @@
+"""
+Markov Regime-Switching Return Model
+Gaussian hidden-Markov regimes (bear/bull) estimated from stored return history by
+expectation-maximization, and regime paths sampled for every simulated path at once
+"""
+
+import numpy as np
+from typing import Dict, List, Any, Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REGIME_LABELS = {1: ['normal'], 2: ['bear', 'bull'], 3: ['bear', 'neutral', 'bull']}
+
+
+# ========================================
+# ESTIMATION
+# ========================================
+
+def _log_densities(x: np.ndarray, means: np.ndarray, covariances: np.ndarray) -> np.ndarray:
+    """(T x K) multivariate normal log densities of every observation under every regime"""
+    n_obs, n_assets = x.shape
+    log_density = np.empty((n_obs, len(means)))
+    for k, (mean, covariance) in enumerate(zip(means, covariances)):
+        factor = np.linalg.cholesky(covariance)
+        standardized = np.linalg.solve(factor, (x - mean).T)
+        log_det = 2 * np.log(np.diag(factor)).sum()
+        log_density[:, k] = -0.5 * (np.einsum('ij,ij->j', standardized, standardized) + log_det + n_assets * np.log(2 * np.pi))
+    return log_density
+
+
+def _weighted_moments(x: np.ndarray, weights: np.ndarray) -> tuple:
+    """Weighted mean and covariance, shrunk toward a scaled identity by assets / (assets + effective observations)"""
+    n_assets = x.shape[1]
+    total = max(weights.sum(), 1e-12)
+    mean = weights @ x / total
+    centered = x - mean
+    covariance = (centered * weights[:, None]).T @ centered / total
+
+    intensity = n_assets / (n_assets + total) if n_assets > 1 else 0.0
+    target = np.trace(covariance) / n_assets
+    covariance = (1 - intensity) * covariance + intensity * target * np.eye(n_assets)
+    covariance += 1e-10 * np.eye(n_assets)
+    return mean, covariance
+
+
+def fit_regime_model(
+    returns: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    n_regimes: int = 2,
+    max_iter: int = 200,
+    tol: float = 1e-7
+) -> Dict[str, Any]:
+    """
+    Estimate a Gaussian hidden-Markov regime model with expectation-maximization.
+
+    Regimes are initialized from quantiles of the portfolio return, fitted by
+    scaled forward-backward passes, and ordered by portfolio mean return
+    (regime 0 is the weakest, e.g. 'bear').
+
+    Args:
+        returns: (months x assets) simple returns, or (months,) for one series
+        weights: (assets,) portfolio weights used to order the regimes (default: equal)
+        n_regimes: Number of regimes
+        max_iter: Maximum EM iterations
+        tol: Stop when the log-likelihood improves by less than this
+
+    Returns:
+        Dictionary with transition (K x K), means (K x N), covariances
+        (K x N x N), filtered (K,) probabilities of the last month,
+        log_likelihood and iterations
+    """
+    x = np.asarray(returns, dtype=float)
+    if x.ndim == 1:
+        x = x[:, None]
+    n_obs, n_assets = x.shape
+    weights = np.full(n_assets, 1.0 / n_assets) if weights is None else np.asarray(weights, dtype=float)
+
+    if n_obs < 12 * n_regimes:
+        raise ValueError(f"Regime model needs at least {12 * n_regimes} months of history")
+
+    # Start from portfolio-return quantile groups with sticky transitions
+    portfolio = x @ weights
+    groups = np.minimum((np.argsort(np.argsort(portfolio)) * n_regimes) // n_obs, n_regimes - 1)
+    responsibilities = np.eye(n_regimes)[groups]
+    moments = [_weighted_moments(x, responsibilities[:, k]) for k in range(n_regimes)]
+    means = np.array([m for m, _ in moments])
+    covariances = np.array([c for _, c in moments])
+    stay = 0.9 if n_regimes > 1 else 1.0
+    transition = np.full((n_regimes, n_regimes), (1 - stay) / max(n_regimes - 1, 1))
+    np.fill_diagonal(transition, stay)
+    initial = np.full(n_regimes, 1.0 / n_regimes)
+
+    previous = -np.inf
+    for iteration in range(1, max_iter + 1):
+        # E-step: scaled forward-backward
+        log_density = _log_densities(x, means, covariances)
+        offset = log_density.max(axis=1, keepdims=True)
+        density = np.exp(log_density - offset)
+
+        alpha = np.empty((n_obs, n_regimes))
+        scale = np.empty(n_obs)
+        alpha[0] = initial * density[0]
+        scale[0] = alpha[0].sum()
+        alpha[0] /= scale[0]
+        for t in range(1, n_obs):
+            alpha[t] = (alpha[t - 1] @ transition) * density[t]
+            scale[t] = alpha[t].sum()
+            alpha[t] /= scale[t]
+
+        beta = np.ones((n_obs, n_regimes))
+        for t in range(n_obs - 2, -1, -1):
+            beta[t] = transition @ (density[t + 1] * beta[t + 1]) / scale[t + 1]
+
+        log_likelihood = float(np.log(scale).sum() + offset.sum())
+        responsibilities = alpha * beta
+        responsibilities /= responsibilities.sum(axis=1, keepdims=True)
+        pair_counts = transition * (alpha[:-1].T @ (density[1:] * beta[1:] / scale[1:, None]))
+
+        # M-step
+        initial = responsibilities[0]
+        transition = pair_counts / np.maximum(pair_counts.sum(axis=1, keepdims=True), 1e-300)
+        moments = [_weighted_moments(x, responsibilities[:, k]) for k in range(n_regimes)]
+        means = np.array([m for m, _ in moments])
+        covariances = np.array([c for _, c in moments])
+
+        if log_likelihood - previous < tol:
+            break
+        previous = log_likelihood
+
+    order = np.argsort(means @ weights)
+    filtered = alpha[-1]
+
+    return {
+        'transition': transition[np.ix_(order, order)],
+        'means': means[order],
+        'covariances': covariances[order],
+        'filtered': filtered[order],
+        'log_likelihood': log_likelihood,
+        'iterations': iteration
+    }
+
+
+def portfolio_regime_model(fit: Dict[str, Any], weights: np.ndarray) -> Dict[str, Any]:
+    """
+    Project a fitted asset-level regime model onto a portfolio.
+
+    Monthly-rebalanced portfolio returns are w'r, so each regime's portfolio
+    mean is w'mu_k and its variance w' Sigma_k w. Simulation draws lognormal
+    returns matching those two moments.
+
+    Args:
+        fit: Output of fit_regime_model
+        weights: (assets,) portfolio weights
+
+    Returns:
+        Picklable model with transition, initial probabilities (next month),
+        monthly means and volatilities, and log-return parameters per regime
+    """
+    weights = np.asarray(weights, dtype=float)
+    mean = fit['means'] @ weights
+    variance = np.einsum('i,kij,j->k', weights, fit['covariances'], weights)
+
+    gross = np.maximum(1 + mean, 1e-6)
+    log_variance = np.log1p(variance / gross ** 2)
+
+    return {
+        'transition': fit['transition'],
+        'initial_probabilities': fit['filtered'] @ fit['transition'],
+        'regime_means': mean,
+        'regime_vols': np.sqrt(variance),
+        'log_means': np.log(gross) - 0.5 * log_variance,
+        'log_vols': np.sqrt(log_variance)
+    }
+
+
+def describe_regime_model(model: Dict[str, Any]) -> Dict[str, Any]:
+    """Annualized, labeled summary of a portfolio regime model for result metadata"""
+    transition = np.asarray(model['transition'])
+    n_regimes = len(transition)
+    labels = REGIME_LABELS.get(n_regimes, [f'regime_{k}' for k in range(n_regimes)])
+
+    # Stationary distribution: left eigenvector for eigenvalue 1
+    eigenvalues, eigenvectors = np.linalg.eig(transition.T)
+    stationary = np.real(eigenvectors[:, np.argmin(np.abs(eigenvalues - 1))])
+    stationary = stationary / stationary.sum()
+    stay = np.diag(transition)
+
+    return {
+        'labels': labels,
+        'transition_matrix': np.round(transition, 6).tolist(),
+        'annual_returns': [float((1 + m) ** 12 - 1) for m in model['regime_means']],
+        'annual_volatilities': [float(v * np.sqrt(12)) for v in model['regime_vols']],
+        'expected_duration_months': [float(1 / (1 - p)) if p < 1 else None for p in stay],
+        'stationary_probabilities': stationary.tolist(),
+        'next_month_probabilities': np.asarray(model['initial_probabilities']).tolist()
+    }
+
+
+# ========================================
+# SIMULATION
+# ========================================
+
+def sample_regimes(
+    uniforms: np.ndarray,
+    transition: np.ndarray,
+    initial_probabilities: np.ndarray
+) -> np.ndarray:
+    """
+    Regime paths for every path by inverse-CDF sampling of the Markov chain.
+
+    Each period takes one vectorized step: the next regime is the number of
+    cumulative transition probabilities (row of the current regime) that
+    the period's uniform exceeds.
+
+    Args:
+        uniforms: (paths x periods) U(0, 1) draws
+        transition: (K x K) row-stochastic transition matrix
+        initial_probabilities: (K,) regime distribution of the first period
+
+    Returns:
+        (paths x periods) int8 regime indices
+    """
+    n_paths, n_periods = uniforms.shape
+    n_regimes = len(initial_probabilities)
+    cumulative = np.cumsum(transition, axis=1)[:, :-1]
+
+    regimes = np.empty((n_paths, n_periods), dtype=np.int8)
+    if n_regimes == 1:
+        regimes[:] = 0
+        return regimes
+
+    state = np.searchsorted(np.cumsum(initial_probabilities)[:-1], uniforms[:, 0], side='right')
+    regimes[:, 0] = state
+
+    if n_regimes == 2:
+        # Two regimes: move to regime 1 iff the uniform exceeds P(state -> 0)
+        stay_low = cumulative[:, 0]
+        for t in range(1, n_periods):
+            state = (uniforms[:, t] > stay_low[state]).astype(np.int8)
+            regimes[:, t] = state
+        return regimes
+
+    for t in range(1, n_periods):
+        state = (uniforms[:, t, None] > cumulative[state]).sum(axis=1)
+        regimes[:, t] = state
+    return regimes
+
+
+def regime_period_returns(shocks: np.ndarray, uniforms: np.ndarray, model: Dict[str, Any]) -> np.ndarray:
+    """
+    Simple returns of regime-switching lognormal paths.
+
+    Args:
+        shocks: (paths x periods) unit-variance shocks; consumed (used as scratch space)
+        uniforms: (paths x periods) U(0, 1) draws driving the regime chain
+        model: Output of portfolio_regime_model
+
+    Returns:
+        (paths x periods) simple returns
+    """
+    regimes = sample_regimes(uniforms, np.asarray(model['transition']), np.asarray(model['initial_probabilities']))
+    log_returns = shocks
+    log_returns *= np.asarray(model['log_vols'])[regimes]
+    log_returns += np.asarray(model['log_means'])[regimes]
+    return np.expm1(log_returns, out=log_returns)
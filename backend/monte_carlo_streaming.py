@@ -0,0 +1,340 @@
+"""
+Streaming Aggregation for Monte Carlo Simulation
+Folds blocks of simulated paths into per-timestep quantile sketches, running
+moments and a reservoir of sample paths so memory stays bounded for any path count
+"""
+
+import numpy as np
+from typing import Dict, List, Optional, Any
+import logging
+
+from monte_carlo import drawdown_statistics, depletion_summary, format_time_series
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class QuantileSketch:
+    """
+    Per-timestep quantile sketch with relative-error guarantees.
+
+    Values are bucketed on a logarithmic grid (as in DDSketch): every bucket
+    spans a factor gamma = (1 + a) / (1 - a), so any reported quantile is
+    within relative error a of a true sample value. All timesteps share one
+    counts matrix that is updated with a single bincount per block.
+
+    Values at or below zero fall into a dedicated zero bucket; values are
+    measured relative to a scale (the initial portfolio value) and clipped
+    to [scale * min_ratio, scale * max_ratio].
+    """
+
+    def __init__(
+        self,
+        n_steps: int,
+        scale: float = 1.0,
+        relative_accuracy: float = 0.005,
+        min_ratio: float = 1e-6,
+        max_ratio: float = 1e6
+    ):
+        self.n_steps = n_steps
+        self.scale = float(scale)
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self._min_key = int(np.floor(np.log(min_ratio) / self._log_gamma))
+        self._max_key = int(np.ceil(np.log(max_ratio) / self._log_gamma))
+        # Bucket 0 holds non-positive values; 1.. hold the log grid
+        self.n_buckets = self._max_key - self._min_key + 2
+        self.counts = np.zeros((n_steps, self.n_buckets), dtype=np.int64)
+        self.count = 0
+
+    def bucket_counts(self, values: np.ndarray) -> np.ndarray:
+        """
+        Bucket counts for a block of paths, without adding them to the sketch.
+
+        Args:
+            values: (paths x n_steps) values
+
+        Returns:
+            (n_steps x n_buckets) integer counts
+        """
+        keys = values / self.scale
+        positive = keys > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            np.log(keys, out=keys)
+        keys /= self._log_gamma
+        np.ceil(keys, out=keys)
+        np.clip(keys, self._min_key, self._max_key, out=keys)
+        keys -= self._min_key - 1
+
+        buckets = keys.astype(np.int64)
+        buckets[~positive] = 0
+        del keys
+
+        buckets += (np.arange(self.n_steps) * self.n_buckets)[None, :]
+        return np.bincount(buckets.ravel(), minlength=self.counts.size).reshape(self.counts.shape)
+
+    def update(self, values: np.ndarray):
+        """
+        Add a block of paths.
+
+        Args:
+            values: (paths x n_steps) values
+        """
+        self.counts += self.bucket_counts(values)
+        self.count += values.shape[0]
+
+    def bucket_values(self) -> np.ndarray:
+        """Representative value of every bucket"""
+        keys = np.arange(self._min_key, self._max_key + 1)
+        values = 2 * self.gamma ** keys / (self.gamma + 1) * self.scale
+        return np.concatenate(([0.0], values))
+
+    def quantiles(self, levels: List[float]) -> np.ndarray:
+        """
+        Quantile estimates for every timestep.
+
+        Args:
+            levels: Quantile levels in [0, 1]
+
+        Returns:
+            (len(levels) x n_steps) array
+        """
+        cumulative = np.cumsum(self.counts, axis=1)
+        representative = self.bucket_values()
+        result = np.empty((len(levels), self.n_steps))
+
+        for i, level in enumerate(levels):
+            rank = level * (self.count - 1)
+            index = np.argmax(cumulative > rank, axis=1)
+            result[i] = representative[index]
+
+        return result
+
+    def tail_mean(self, level: float, step: int = -1) -> float:
+        """Mean of the values at or below the given quantile at one timestep"""
+        counts = self.counts[step]
+        cumulative = np.cumsum(counts)
+        cutoff = int(np.argmax(cumulative > level * (self.count - 1)))
+        tail_counts = counts[:cutoff + 1]
+        total = tail_counts.sum()
+        return float(tail_counts @ self.bucket_values()[:cutoff + 1] / total) if total else 0.0
+
+
+class StreamingAggregator:
+    """
+    Bounded-memory accumulator for simulation outputs.
+
+    Tracks per-timestep quantile sketches and moments, exact final-value
+    extremes and threshold counts, per-path drawdown and time-under-water totals and a uniform
+    sample of full paths (the paths with the smallest random keys).
+    """
+
+    def __init__(
+        self,
+        n_steps: int,
+        initial_value: float,
+        years: float,
+        sample_size: int = 100,
+        relative_accuracy: float = 0.005,
+        rng: Optional[np.random.Generator] = None,
+        quantile_levels: Optional[List[float]] = None,
+        track_depletion: bool = False
+    ):
+        self.n_steps = n_steps
+        self.initial_value = float(initial_value)
+        self.years = years
+        self.sample_size = sample_size
+        self.rng = rng or np.random.default_rng()
+        self.quantile_levels = quantile_levels
+        self.track_depletion = track_depletion
+
+        self.sketch = QuantileSketch(n_steps, scale=initial_value, relative_accuracy=relative_accuracy)
+        self.count = 0
+        self.sum = np.zeros(n_steps)
+        self.sum_sq = np.zeros(n_steps)
+        self.final_min = np.inf
+        self.final_max = -np.inf
+        self.sum_annualized = 0.0
+        self.drawdown_sum = 0.0
+        self.drawdown_min = 0.0
+        self.underwater_sum = 0.0
+        self.underwater_max = 0
+        self.underwater_fraction_sum = 0.0
+        self.thresholds = np.array([1.0, 2.0, 3.0, 1.1, 1.25]) * self.initial_value
+        self.threshold_counts = np.zeros(len(self.thresholds), dtype=np.int64)
+        self.loss_count = 0
+        self.depleted_counts = np.zeros(n_steps, dtype=np.int64)
+        self.reservoir = np.empty((0, n_steps))
+        self.reservoir_keys = np.empty(0)
+
+    def partial(self, paths: np.ndarray, sample_keys: Optional[np.ndarray] = None, include_counts: bool = True) -> Dict[str, Any]:
+        """
+        Aggregates of one block of paths, ready to merge.
+
+        Integer counts merge exactly in any grouping; floating-point partials
+        are merged one block at a time in block order, so results do not depend
+        on how blocks were distributed across workers.
+
+        Args:
+            paths: (block x n_steps) values, first column the initial value
+            sample_keys: Per-path uniform keys for the bottom-k path sample
+            include_counts: Include the sketch bucket counts
+
+        Returns:
+            Dictionary of block aggregates
+        """
+        final = paths[:, -1]
+        if sample_keys is None:
+            sample_keys = self.rng.random(paths.shape[0])
+
+        ratio = np.clip(final / self.initial_value, 0.0, None)
+
+        drawdowns = drawdown_statistics(paths)
+
+        keep = np.argsort(sample_keys, kind='stable')[:self.sample_size]
+
+        return {
+            'count': paths.shape[0],
+            'counts': self.sketch.bucket_counts(paths) if include_counts else None,
+            'sum': paths.sum(axis=0),
+            'sum_sq': np.einsum('ij,ij->j', paths, paths),
+            'final_min': float(final.min()),
+            'final_max': float(final.max()),
+            'sum_annualized': float(np.sum(ratio ** (1 / self.years) - 1)),
+            'threshold_counts': np.concatenate((
+                [np.sum(final > self.thresholds[0])],
+                (final[:, None] >= self.thresholds[None, 1:]).sum(axis=0)
+            )).astype(np.int64),
+            'loss_count': int(np.sum(final < self.initial_value)),
+            'drawdown_sum': float(drawdowns['max_drawdown'].sum()),
+            'drawdown_min': float(drawdowns['max_drawdown'].min()),
+            'underwater_sum': float(drawdowns['longest_underwater'].sum()),
+            'underwater_max': int(drawdowns['longest_underwater'].max()),
+            'underwater_fraction_sum': float(drawdowns['fraction_underwater'].sum()),
+            'samples': paths[keep],
+            'sample_keys': sample_keys[keep],
+            # Per-block final-value quantiles feed batch-means precision estimates
+            'final_quantiles': np.quantile(final, self.quantile_levels) if self.quantile_levels else None,
+            'depleted_counts': (paths <= 0).sum(axis=0) if self.track_depletion else None
+        }
+
+    def merge(self, partial: Dict[str, Any]):
+        """Fold one block's aggregates into the running totals"""
+        if partial['counts'] is not None:
+            self.sketch.counts += partial['counts']
+        self.sketch.count += partial['count']
+        self.count += partial['count']
+
+        self.sum += partial['sum']
+        self.sum_sq += partial['sum_sq']
+        self.final_min = min(self.final_min, partial['final_min'])
+        self.final_max = max(self.final_max, partial['final_max'])
+        self.sum_annualized += partial['sum_annualized']
+        self.threshold_counts += partial['threshold_counts']
+        self.loss_count += partial['loss_count']
+        self.drawdown_sum += partial['drawdown_sum']
+        self.drawdown_min = min(self.drawdown_min, partial['drawdown_min'])
+        self.underwater_sum += partial['underwater_sum']
+        self.underwater_max = max(self.underwater_max, partial['underwater_max'])
+        self.underwater_fraction_sum += partial['underwater_fraction_sum']
+        if partial.get('depleted_counts') is not None:
+            self.depleted_counts += partial['depleted_counts']
+
+        # Bottom-k by random key is a uniform sample and merges independently of grouping
+        keys = np.concatenate((self.reservoir_keys, partial['sample_keys']))
+        paths = np.vstack((self.reservoir, partial['samples']))
+        keep = np.argsort(keys, kind='stable')[:self.sample_size]
+        self.reservoir_keys = keys[keep]
+        self.reservoir = paths[keep]
+
+    def update(self, paths: np.ndarray, sample_keys: Optional[np.ndarray] = None):
+        """
+        Fold a block of simulated paths into the running aggregates.
+
+        Args:
+            paths: (block x n_steps) values, first column the initial value
+            sample_keys: Per-path uniform keys for the path sample (drawn if omitted)
+        """
+        self.merge(self.partial(paths, sample_keys))
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self.sum / max(self.count, 1)
+
+    @property
+    def std(self) -> np.ndarray:
+        mean = self.mean
+        return np.sqrt(np.clip(self.sum_sq / max(self.count, 1) - mean * mean, 0.0, None))
+
+    def summary(self, confidence_levels: List[float], time_series_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Results in the same layout as MonteCarloSimulator's exact mode.
+
+        Args:
+            confidence_levels: Final-value percentile levels
+            time_series_options: Keyword arguments of format_time_series
+
+        Returns:
+            Dictionary with scenarios, percentiles, statistics, probabilities,
+            risk_metrics and time_series
+        """
+        v0 = self.initial_value
+        n = max(self.count, 1)
+
+        final_levels = self.sketch.quantiles(list(confidence_levels) + [0.01, 0.05, 0.5])[:, -1]
+        final_quantiles = dict(zip(confidence_levels, final_levels[:len(confidence_levels)]))
+        q01, q05, median = final_levels[-3:]
+
+        mean_final = float(self.mean[-1])
+        bands = self.sketch.quantiles([0.05, 0.25, 0.50, 0.75, 0.95])
+
+        result = {
+            'scenarios': {
+                'best_case': self.final_max,
+                'worst_case': self.final_min,
+                'median': float(median),
+                'mean': mean_final
+            },
+            'percentiles': {f'p{int(level * 100)}': float(value) for level, value in final_quantiles.items()},
+            'statistics': {
+                'mean_final_value': mean_final,
+                'median_final_value': float(median),
+                'std_final_value': float(self.std[-1]),
+                'min_final_value': self.final_min,
+                'max_final_value': self.final_max,
+                'mean_total_return': mean_final / v0 - 1,
+                'median_total_return': float(median) / v0 - 1,
+                'mean_annualized_return': self.sum_annualized / n,
+                'median_annualized_return': float(max(median / v0, 0.0) ** (1 / self.years) - 1)
+            },
+            'probabilities': {
+                'prob_gain': float(self.threshold_counts[0] / n),
+                'prob_loss': float(self.loss_count / n),
+                'prob_double': float(self.threshold_counts[1] / n),
+                'prob_triple': float(self.threshold_counts[2] / n),
+                'prob_10pct_gain': float(self.threshold_counts[3] / n),
+                'prob_25pct_gain': float(self.threshold_counts[4] / n)
+            },
+            'risk_metrics': {
+                'value_at_risk_95': float(q05 / v0 - 1),
+                'value_at_risk_99': float(q01 / v0 - 1),
+                'conditional_var_95': self.sketch.tail_mean(0.05) / v0 - 1,
+                'conditional_var_99': self.sketch.tail_mean(0.01) / v0 - 1,
+                'mean_max_drawdown': self.drawdown_sum / n,
+                'worst_drawdown': self.drawdown_min,
+                'mean_longest_underwater_months': self.underwater_sum / n,
+                'max_longest_underwater_months': self.underwater_max,
+                'mean_fraction_underwater': self.underwater_fraction_sum / n
+            },
+            'time_series': format_time_series(
+                self.reservoir,
+                {'p5': bands[0], 'p25': bands[1], 'p50': bands[2], 'p75': bands[3], 'p95': bands[4], 'mean': self.mean},
+                **(time_series_options or {})
+            )
+        }
+        
+        if self.track_depletion:
+            result['depletion'] = depletion_summary(self.depleted_counts, self.count)
+        
+        return result
@@ -11,7 +11,14 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy import func
 from db import get_db, SessionLocal
 from models import User, Portfolio, Holding
+from wash_sale import WashSaleIndex
+import returns_engine
+import attribution
+import stress_test
+import factor_shocks
 from datetime import datetime
+import pandas as pd
+import analytics
 import json
 import logging
 
@@ -115,6 +122,56 @@ class BulkHoldingOperation(BaseModel):
     holding_ids: List[int] = Field(..., min_items=1, max_items=100)
 
 
+class BenchmarkConstituentIn(BaseModel):
+    """Benchmark constituent for attribution"""
+    symbol: str = Field(..., min_length=1, max_length=10)
+    weight: float = Field(..., gt=0)
+    group: str = Field('Other')
+
+    @validator('symbol')
+    def validate_symbol(cls, v):
+        return v.upper().strip()
+
+
+class AttributionRequest(BaseModel):
+    """Request model for Brinson attribution"""
+    benchmark: List[BenchmarkConstituentIn] = Field(..., min_items=1)
+    group_by: str = Field('asset_type', pattern='^(asset_type|sector)$')
+    years: int = Field(5, ge=1, le=20)
+    frequency: str = Field('M', pattern='^(M|W)$')
+    linking: str = Field('carino', pattern='^(carino|grap)$')
+
+
+class StressWindowIn(BaseModel):
+    """Custom historical stress window"""
+    name: str = Field(..., min_length=1, max_length=60)
+    start: str = Field(..., description="First date (YYYY-MM-DD), e.g. the pre-crisis peak")
+    end: str = Field(..., description="Last date (YYYY-MM-DD)")
+    description: str = Field('')
+
+
+class StressTestRequest(BaseModel):
+    """Request model for historical stress tests"""
+    scenarios: Optional[List[str]] = Field(None, description="Library scenario keys (default: all)")
+    custom_windows: List[StressWindowIn] = Field(default_factory=list, max_items=20)
+    benchmark: str = Field('SPY', min_length=1, max_length=10)
+    include_paths: bool = Field(False)
+
+
+class ShockScenarioIn(BaseModel):
+    """Custom factor shock scenario"""
+    name: str = Field(..., min_length=1, max_length=60)
+    shocks: Dict[str, float] = Field(..., description="Factor -> shock, e.g. {'sector:technology': -0.2, 'rates': 100}")
+
+
+class ShockRunRequest(BaseModel):
+    """Request model for firm-wide factor shock runs"""
+    scenarios: Optional[List[str]] = Field(None, description="Library scenario keys (default: all)")
+    custom_scenarios: List[ShockScenarioIn] = Field(default_factory=list, max_items=50)
+    portfolio_ids: Optional[List[int]] = Field(None, description="Portfolios to shock (default: all active)")
+    include_exposures: bool = Field(False)
+
+
 # Portfolio Endpoints
 
 @router.post('/portfolio', response_model=PortfolioOut, tags=["Portfolio"], status_code=201)
@@ -515,6 +572,226 @@ def delete_holdings_bulk(portfolio_id: int, operation: BulkHoldingOperation, ses
         raise HTTPException(status_code=500, detail="Error deleting holdings")
 
 
+# Tax Endpoints
+
+@router.get('/portfolio/{portfolio_id}/wash-sales', tags=["Tax"])
+def get_wash_sales(
+    portfolio_id: int,
+    tax_threshold: float = Query(-1000, le=0, description="Minimum unrealized loss to suggest harvesting"),
+    session: Session = Depends(get_db)
+):
+    """Detect wash sales in the transaction history and screen harvesting suggestions against it"""
+    try:
+        portfolio = session.get(Portfolio, portfolio_id)
+
+        if not portfolio:
+            raise HTTPException(status_code=404, detail=f"Portfolio {portfolio_id} not found")
+
+        index = WashSaleIndex.from_db(session, portfolio_id=portfolio_id)
+        result = index.detect()
+
+        rows = []
+        for holding in portfolio.holdings:
+            value = holding.quantity * holding.price
+            cost_value = holding.quantity * (holding.cost_basis or 0.0)
+            rows.append({
+                'Symbol': holding.ticker,
+                'Description': holding.description or '',
+                'Quantity': holding.quantity,
+                'Value ($)': value,
+                'NFS G/L ($)': value - cost_value,
+                'NFS G/L (%)': ((value - cost_value) / cost_value * 100) if cost_value > 0 else 0.0
+            })
+
+        result['harvest_opportunities'] = []
+        if rows:
+            result['harvest_opportunities'] = analytics.identify_tax_loss_harvesting(
+                pd.DataFrame(rows), tax_threshold=tax_threshold, wash_sale_index=index
+            )
+
+        return result
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error detecting wash sales: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Error detecting wash sales")
+
+
+@router.get('/portfolio/{portfolio_id}/returns', tags=["Performance"])
+def get_portfolio_returns(
+    portfolio_id: int,
+    as_of: Optional[str] = Query(None, description="Reporting date (YYYY-MM-DD), default today"),
+    session: Session = Depends(get_db)
+):
+    """Time-weighted and money-weighted returns (MTD/QTD/YTD/1Y/3Y/SI) from the transaction history"""
+    try:
+        portfolio = session.get(Portfolio, portfolio_id)
+
+        if not portfolio:
+            raise HTTPException(status_code=404, detail=f"Portfolio {portfolio_id} not found")
+
+        transactions = returns_engine.load_transactions(session, portfolio_id=portfolio_id)
+        result = returns_engine.calculate_portfolio_returns(transactions, as_of=as_of)
+        result['portfolio_id'] = portfolio_id
+
+        return result
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error calculating portfolio returns: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Error calculating portfolio returns")
+
+
+@router.post('/portfolio/{portfolio_id}/attribution', tags=["Performance"])
+def get_portfolio_attribution(
+    portfolio_id: int,
+    payload: AttributionRequest,
+    session: Session = Depends(get_db)
+):
+    """Brinson-Fachler allocation/selection/interaction effects against a benchmark"""
+    try:
+        portfolio = session.get(Portfolio, portfolio_id)
+
+        if not portfolio:
+            raise HTTPException(status_code=404, detail=f"Portfolio {portfolio_id} not found")
+
+        group_column = 'Sector' if payload.group_by == 'sector' else 'Asset Type'
+        holdings = pd.DataFrame([
+            {
+                'Symbol': h.ticker,
+                'Value ($)': h.quantity * h.price,
+                group_column: (h.sector if payload.group_by == 'sector' else h.asset_type) or 'Other'
+            }
+            for h in portfolio.holdings
+        ])
+
+        if holdings.empty:
+            raise HTTPException(status_code=400, detail="Portfolio has no holdings")
+
+        benchmark = pd.DataFrame([b.dict() for b in payload.benchmark]).rename(columns={'group': group_column})
+
+        result = attribution.calculate_brinson_attribution(
+            holdings, benchmark,
+            group_by=group_column,
+            years=payload.years,
+            frequency=payload.frequency,
+            linking=payload.linking
+        )
+        result['portfolio_id'] = portfolio_id
+
+        return result
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error calculating attribution: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Error calculating attribution")
+
+
+@router.get('/stress-test/scenarios', tags=["Risk"])
+def get_stress_scenarios():
+    """Library of named historical stress windows"""
+    return {
+        'scenarios': [{'key': key, **definition} for key, definition in stress_test.STRESS_SCENARIOS.items()]
+    }
+
+
+@router.post('/portfolio/{portfolio_id}/stress-test', tags=["Risk"])
+def get_portfolio_stress_test(
+    portfolio_id: int,
+    payload: StressTestRequest,
+    session: Session = Depends(get_db)
+):
+    """Replay historical crises against the current holdings (proxy ETFs for holdings without history)"""
+    try:
+        portfolio = session.get(Portfolio, portfolio_id)
+
+        if not portfolio:
+            raise HTTPException(status_code=404, detail=f"Portfolio {portfolio_id} not found")
+
+        holdings = [
+            {'symbol': h.ticker, 'value': h.quantity * h.price, 'asset_type': h.asset_type, 'sector': h.sector}
+            for h in portfolio.holdings
+        ]
+
+        if not holdings:
+            raise HTTPException(status_code=400, detail="Portfolio has no holdings")
+
+        scenarios = list(payload.scenarios or ([] if payload.custom_windows else stress_test.STRESS_SCENARIOS))
+        scenarios += [w.dict() for w in payload.custom_windows]
+
+        result = stress_test.run_stress_tests(
+            holdings,
+            scenarios=scenarios,
+            benchmark=payload.benchmark.upper().strip(),
+            include_paths=payload.include_paths
+        )
+        result['portfolio_id'] = portfolio_id
+
+        return result
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error running stress test: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Error running stress test")
+
+
+@router.get('/stress-test/shock-scenarios', tags=["Risk"])
+def get_shock_scenarios():
+    """Library of hypothetical factor shocks and the factors they can move"""
+    return {
+        'factors': factor_shocks.FACTORS,
+        'scenarios': [{'key': key, **definition} for key, definition in factor_shocks.SHOCK_SCENARIOS.items()]
+    }
+
+
+@router.post('/stress-test/shocks', tags=["Risk"])
+def run_factor_shocks(
+    payload: ShockRunRequest,
+    session: Session = Depends(get_db)
+):
+    """P&L of every portfolio under every factor shock scenario (cached per portfolio version)"""
+    try:
+        query = session.query(
+            Holding.portfolio_id, Holding.ticker, Holding.quantity, Holding.price,
+            Holding.asset_type, Holding.sector, Holding.currency, Holding.meta_json
+        ).join(Portfolio, Portfolio.id == Holding.portfolio_id)
+
+        if payload.portfolio_ids:
+            query = query.filter(Holding.portfolio_id.in_(payload.portfolio_ids))
+        else:
+            query = query.filter(Portfolio.is_active.isnot(False), Portfolio.deleted_at.is_(None))
+
+        portfolios: Dict[int, List[Dict[str, Any]]] = {pid: [] for pid in payload.portfolio_ids or []}
+        for pid, ticker, quantity, price, asset_type, sector, currency, meta_json in query.all():
+            try:
+                metadata = json.loads(meta_json or '{}')
+            except ValueError:
+                metadata = {}
+            portfolios.setdefault(pid, []).append({
+                'symbol': ticker, 'quantity': quantity or 0.0, 'price': price or 0.0,
+                'asset_type': asset_type, 'sector': sector, 'currency': currency, 'metadata': metadata
+            })
+
+        scenarios = list(payload.scenarios or ([] if payload.custom_scenarios else factor_shocks.SHOCK_SCENARIOS))
+        scenarios += [s.dict() for s in payload.custom_scenarios]
+
+        return factor_shocks.get_shock_engine().run(
+            portfolios, scenarios=scenarios, include_exposures=payload.include_exposures
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error running factor shocks: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Error running factor shocks")
+
+
 # Helper Functions
 
 def _build_portfolio_response(portfolio: Portfolio, include_metadata: bool = True) -> PortfolioOut:
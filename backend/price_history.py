@@ -0,0 +1,192 @@
+"""
+Price History Store for VisionWealth
+Caches daily close prices per symbol so analytics (returns, risk, attribution,
+benchmarks) share one batched download instead of refetching per feature
+"""
+
+import yfinance as yf
+import pandas as pd
+from typing import Dict, List, Optional, Union
+from datetime import datetime, timedelta
+import threading
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+DateLike = Union[str, datetime, pd.Timestamp]
+
+
+class PriceHistoryStore:
+    """
+    In-memory store of daily close prices keyed by symbol.
+
+    Features:
+    - One batched yfinance download for all missing symbols
+    - Coverage tracking so wider date ranges trigger a refetch
+    - TTL so recent prices are refreshed
+    - Manual seeding (put) for tests and offline use
+    """
+
+    def __init__(self, cache_ttl_seconds: int = 3600):
+        """
+        Initialize price store.
+
+        Args:
+            cache_ttl_seconds: How long fetched series stay fresh (default 1 hour)
+        """
+        self.cache_ttl = cache_ttl_seconds
+        self._series: Dict[str, pd.Series] = {}
+        self._coverage: Dict[str, tuple] = {}
+        self._fetched_at: Dict[str, Optional[datetime]] = {}
+        self._lock = threading.Lock()
+
+    def put(self, symbol: str, prices: pd.Series):
+        """
+        Seed the store with a price series (never expires).
+
+        Args:
+            symbol: Ticker symbol
+            prices: Close prices indexed by date
+        """
+        series = pd.Series(prices, dtype=float).dropna()
+        series.index = pd.to_datetime(series.index).tz_localize(None).normalize()
+        symbol = symbol.upper().strip()
+
+        with self._lock:
+            self._series[symbol] = series.sort_index()
+            self._coverage[symbol] = (series.index.min(), series.index.max())
+            self._fetched_at[symbol] = None
+
+    def clear(self):
+        """Drop all cached series"""
+        with self._lock:
+            self._series.clear()
+            self._coverage.clear()
+            self._fetched_at.clear()
+
+    def _is_covered(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> bool:
+        if symbol not in self._series:
+            return False
+
+        fetched_at = self._fetched_at.get(symbol)
+        if fetched_at is not None and (datetime.now() - fetched_at).total_seconds() > self.cache_ttl:
+            return False
+
+        first, last = self._coverage[symbol]
+        # Allow a few days of slack for weekends/holidays at either edge
+        return first <= start + timedelta(days=5) and last >= end - timedelta(days=5)
+
+    def _fetch(self, symbols: List[str], start: pd.Timestamp, end: pd.Timestamp):
+        """Download missing symbols in one batch and merge them into the store"""
+        logger.info(f"Fetching price history for {len(symbols)} symbols ({start.date()} to {end.date()})")
+
+        try:
+            data = yf.download(symbols, start=start, end=end + timedelta(days=1), progress=False, auto_adjust=True)
+        except Exception as e:
+            logger.error(f"Price history download failed: {e}")
+            return
+
+        if data is None or data.empty:
+            return
+
+        closes = data['Close'] if 'Close' in data.columns else data
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(symbols[0])
+        closes.index = pd.to_datetime(closes.index).tz_localize(None).normalize()
+
+        now = datetime.now()
+        with self._lock:
+            for symbol in symbols:
+                if symbol not in closes.columns:
+                    continue
+                series = closes[symbol].dropna()
+                if series.empty:
+                    continue
+
+                existing = self._series.get(symbol)
+                if existing is not None:
+                    series = series.combine_first(existing)
+
+                self._series[symbol] = series.sort_index()
+                self._coverage[symbol] = (min(start, series.index.min()), max(end, series.index.max()))
+                self._fetched_at[symbol] = now
+
+    def get_prices(self, symbols: List[str], start: DateLike, end: Optional[DateLike] = None) -> pd.DataFrame:
+        """
+        Get daily close prices for symbols over a date range.
+
+        Args:
+            symbols: Ticker symbols
+            start: First date
+            end: Last date (default today)
+
+        Returns:
+            DataFrame of close prices (dates x symbols); symbols without data are omitted
+        """
+        start = pd.Timestamp(start).tz_localize(None).normalize()
+        end = pd.Timestamp(end or datetime.now()).tz_localize(None).normalize()
+        symbols = list(dict.fromkeys(s.upper().strip() for s in symbols if s))
+
+        with self._lock:
+            missing = [s for s in symbols if not self._is_covered(s, start, end)]
+
+        if missing:
+            self._fetch(missing, start, end)
+
+        with self._lock:
+            columns = {s: self._series[s].loc[start:end] for s in symbols if s in self._series}
+
+        if not columns:
+            return pd.DataFrame()
+
+        return pd.DataFrame(columns).sort_index()
+
+    def get_returns(
+        self,
+        symbols: List[str],
+        start: DateLike,
+        end: Optional[DateLike] = None,
+        frequency: str = 'D'
+    ) -> pd.DataFrame:
+        """
+        Get simple returns for symbols over a date range.
+
+        Args:
+            symbols: Ticker symbols
+            start: First date
+            end: Last date (default today)
+            frequency: 'D' for daily, 'W' for weekly, 'M' for month-end returns
+
+        Returns:
+            DataFrame of returns (dates x symbols); NaN where a symbol has no price that
+            day (other trading calendar) or no history yet
+        """
+        prices = self.get_prices(symbols, start, end)
+
+        if prices.empty:
+            return prices
+
+        if frequency == 'M':
+            prices = prices.resample('ME').last()
+        elif frequency == 'W':
+            prices = prices.resample('W-FRI').last()
+
+        # Each symbol's return runs from its own previous price, so calendars that
+        # differ (weekend-trading crypto next to equities) don't blank out returns
+        columns = {symbol: prices[symbol].dropna().pct_change().iloc[1:] for symbol in prices.columns}
+        returns = pd.DataFrame(columns).reindex(prices.index[1:])
+        return returns[list(prices.columns)]
+
+
+# Singleton instance
+_store_instance = None
+
+
+def get_price_store() -> PriceHistoryStore:
+    """Get or create PriceHistoryStore singleton"""
+    global _store_instance
+    if _store_instance is None:
+        _store_instance = PriceHistoryStore()
+    return _store_instance
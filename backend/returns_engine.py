@@ -0,0 +1,409 @@
+"""
+Returns Engine for VisionWealth
+Rebuilds daily portfolio value from transaction cash flows and cached prices,
+then computes chain-linked time-weighted (TWR) and money-weighted (IRR) returns
+for all standard reporting periods from a single valuation series
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Any, Optional, Union
+from datetime import datetime
+import logging
+
+from price_history import get_price_store
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# ========================================
+# CONSTANTS
+# ========================================
+
+STANDARD_PERIODS = ['MTD', 'QTD', 'YTD', '1Y', '3Y', 'SI']
+
+_EXTERNAL_TYPES = {'deposit', 'withdrawal'}
+
+
+# ========================================
+# VALUATION
+# ========================================
+
+def _normalize_transactions(transactions: Union[pd.DataFrame, List[Dict[str, Any]]]) -> pd.DataFrame:
+    """Coerce transaction rows into typed columns"""
+    df = transactions.copy() if isinstance(transactions, pd.DataFrame) else pd.DataFrame(list(transactions))
+
+    if df.empty:
+        return df
+
+    for column in ['symbol', 'quantity', 'price', 'amount', 'fees']:
+        if column not in df.columns:
+            df[column] = None
+
+    df['transaction_type'] = df['transaction_type'].map(lambda t: str(getattr(t, 'value', t)).lower())
+    df['symbol'] = df['symbol'].where(df['symbol'].notna(), None).map(lambda s: s.upper().strip() if isinstance(s, str) else s)
+    df['date'] = pd.to_datetime(df['transaction_date'], utc=True).dt.tz_localize(None).dt.normalize()
+    df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce').fillna(0.0).abs()
+    df['price'] = pd.to_numeric(df['price'], errors='coerce').fillna(0.0)
+    df['fees'] = pd.to_numeric(df['fees'], errors='coerce').fillna(0.0)
+
+    amount = pd.to_numeric(df['amount'], errors='coerce').abs()
+    df['amount'] = amount.where(amount > 0, df['quantity'] * df['price']).fillna(0.0)
+
+    return df.sort_values('date', kind='mergesort')
+
+
+def build_valuation_series(
+    transactions: Union[pd.DataFrame, List[Dict[str, Any]]],
+    prices: Optional[pd.DataFrame] = None,
+    end_date: Optional[Union[str, datetime]] = None
+) -> pd.DataFrame:
+    """
+    Rebuild a daily valuation series from transactions.
+
+    When deposits/withdrawals are recorded, the portfolio includes a cash account and
+    only deposits/withdrawals are external flows. Otherwise buys are treated as
+    contributions and sells/dividends as distributions.
+
+    Args:
+        transactions: Transaction rows (transaction_type, symbol, quantity, price,
+            amount, fees, transaction_date)
+        prices: Daily close prices (dates x symbols); fetched from the price store if omitted
+        end_date: Last valuation date (default today)
+
+    Returns:
+        DataFrame indexed by business day with 'value' (end of day, after flows)
+        and 'flow' (net external cash flow into the portfolio)
+    """
+    df = _normalize_transactions(transactions)
+    end = pd.Timestamp(end_date or datetime.now()).tz_localize(None).normalize()
+
+    # Transactions after the valuation date have not happened yet as of that date
+    df = df[df['date'] <= end]
+
+    if df.empty:
+        return pd.DataFrame(columns=['value', 'flow'])
+
+    start = df['date'].iloc[0]
+    days = pd.bdate_range(start, end)
+
+    # Snap each transaction to the first business day on or after it; weekend
+    # trades after the last business day up to end stay on that last day
+    df['slot'] = np.minimum(days.searchsorted(df['date'].values), len(days) - 1)
+
+    ttype = df['transaction_type'].values
+    is_buy = ttype == 'buy'
+    is_sell = ttype == 'sell'
+    has_cash_account = bool(np.isin(ttype, list(_EXTERNAL_TYPES)).any())
+
+    # Position quantities: signed share changes pivoted to (day x symbol), cumulated once
+    trades = df[is_buy | is_sell]
+    symbols = sorted(trades['symbol'].dropna().unique().tolist())
+    value = np.zeros(len(days))
+
+    if symbols:
+        signed_qty = np.where(trades['transaction_type'].values == 'buy', 1.0, -1.0) * trades['quantity'].values
+        column = pd.Index(symbols).get_indexer(trades['symbol'].values)
+        changes = np.zeros((len(days), len(symbols)))
+        np.add.at(changes, (trades['slot'].values, column), signed_qty)
+        quantities = np.cumsum(changes, axis=0)
+
+        if prices is None:
+            prices = get_price_store().get_prices(symbols, days[0], days[-1])
+
+        price_panel = (
+            prices.reindex(columns=symbols)
+            .reindex(days.union(prices.index)).ffill().reindex(days)
+        )
+
+        # Fall back to the last transaction price where no market history exists
+        trade_prices = np.full((len(days), len(symbols)), np.nan)
+        trade_prices[trades['slot'].values, column] = trades['price'].values
+        trade_prices = pd.DataFrame(trade_prices, index=days, columns=symbols).ffill()
+        price_panel = price_panel.fillna(trade_prices).fillna(0.0)
+
+        value += (quantities * price_panel.values).sum(axis=1)
+
+    # Cash flows per transaction, then bucketed per day with bincount
+    amount = df['amount'].values
+    fees = df['fees'].values
+
+    if has_cash_account:
+        cash_delta = np.select(
+            [ttype == 'deposit', ttype == 'withdrawal', is_buy, is_sell, ttype == 'dividend', ttype == 'fee'],
+            [amount, -amount, -(amount + fees), amount - fees, amount, -(amount + fees)],
+            default=0.0
+        )
+        external = np.select([ttype == 'deposit', ttype == 'withdrawal'], [amount, -amount], default=0.0)
+        value += np.cumsum(np.bincount(df['slot'].values, weights=cash_delta, minlength=len(days)))
+    else:
+        external = np.select(
+            [is_buy, is_sell, ttype == 'dividend'],
+            [amount + fees, -(amount - fees), -amount],
+            default=0.0
+        )
+
+    flow = np.bincount(df['slot'].values, weights=external, minlength=len(days))
+
+    return pd.DataFrame({'value': value, 'flow': flow}, index=days)
+
+
+# ========================================
+# RETURNS
+# ========================================
+
+def daily_twr_returns(valuation: pd.DataFrame) -> pd.Series:
+    """
+    Daily time-weighted sub-period returns (flows assumed at end of day).
+
+    r_t = (V_t - F_t) / V_{t-1} - 1
+    """
+    value = valuation['value'].values
+    flow = valuation['flow'].values
+    previous = np.concatenate(([0.0], value[:-1]))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.where(previous > 0, (value - flow) / previous - 1, 0.0)
+
+    return pd.Series(returns, index=valuation.index)
+
+
+def _period_start(label: str, as_of: pd.Timestamp, inception: pd.Timestamp) -> Optional[pd.Timestamp]:
+    """
+    First day of a standard period.
+
+    Calendar-to-date periods and since-inception clip to the inception date;
+    trailing periods (1Y, 3Y) that reach back before inception return None,
+    since a shorter history would be mislabelled as a full period.
+    """
+    if label == 'MTD':
+        start = as_of.replace(day=1)
+    elif label == 'QTD':
+        start = pd.Timestamp(year=as_of.year, month=3 * ((as_of.month - 1) // 3) + 1, day=1)
+    elif label == 'YTD':
+        start = pd.Timestamp(year=as_of.year, month=1, day=1)
+    elif label == '1Y':
+        start = as_of - pd.DateOffset(years=1) + pd.Timedelta(days=1)
+    elif label == '3Y':
+        start = as_of - pd.DateOffset(years=3) + pd.Timedelta(days=1)
+    else:
+        return inception
+    if label in ('1Y', '3Y') and start < inception:
+        return None
+    return max(start, inception)
+
+
+def solve_irr(
+    amounts: np.ndarray,
+    times: np.ndarray,
+    tol: float = 1e-10,
+    max_iter: int = 100
+) -> np.ndarray:
+    """
+    Solve many IRR problems at once with a bracketed Newton iteration.
+
+    Each row is one cash-flow stream: NPV(r) = sum(amounts * (1 + r) ** -times) = 0.
+    Newton steps that leave the bracket fall back to bisection, so every row
+    converges like rtsafe/Brent without a Python loop over problems.
+
+    Args:
+        amounts: (problems x flows) cash flows, zero-padded
+        times: (problems x flows) flow times in years
+        tol: Convergence tolerance on the rate
+        max_iter: Iteration cap
+
+    Returns:
+        Annual IRR per row (NaN where no sign change brackets a root)
+    """
+    amounts = np.atleast_2d(amounts)
+    times = np.atleast_2d(times)
+
+    def npv(rate):
+        discount = (1.0 + rate[:, None]) ** -times
+        return (amounts * discount).sum(axis=1), (-times * amounts * discount / (1.0 + rate[:, None])).sum(axis=1)
+
+    lo = np.full(len(amounts), -0.9999)
+    hi = np.full(len(amounts), 100.0)
+    f_lo, _ = npv(lo)
+    f_hi, _ = npv(hi)
+    valid = np.sign(f_lo) != np.sign(f_hi)
+
+    rate = np.zeros(len(amounts))
+    for _ in range(max_iter):
+        f, df = npv(rate)
+
+        # Shrink the bracket around the root
+        same_as_lo = np.sign(f) == np.sign(f_lo)
+        lo = np.where(same_as_lo, rate, lo)
+        f_lo = np.where(same_as_lo, f, f_lo)
+        hi = np.where(same_as_lo, hi, rate)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = rate - f / df
+        inside = np.isfinite(newton) & (newton > lo) & (newton < hi)
+        new_rate = np.where(inside, newton, 0.5 * (lo + hi))
+
+        converged = np.abs(new_rate - rate) < tol
+        rate = new_rate
+        if converged[valid].all():
+            break
+
+    return np.where(valid, rate, np.nan)
+
+
+def calculate_period_returns(
+    valuation: pd.DataFrame,
+    periods: Optional[List[str]] = None,
+    as_of: Optional[Union[str, datetime]] = None
+) -> Dict[str, Any]:
+    """
+    Compute TWR and IRR for standard periods from one valuation series.
+
+    The TWR growth index is built once; each period's TWR is a ratio of two
+    index points. All period IRRs are solved together as one batched problem.
+    Returns for periods of a year or longer are also annualized.
+    Trailing periods longer than the history (e.g. 3Y on a two-year-old
+    account) are omitted rather than clipped to inception.
+
+    Args:
+        valuation: Output of build_valuation_series
+        periods: Period labels (default MTD, QTD, YTD, 1Y, 3Y, SI)
+        as_of: Reporting date (default last valuation date)
+
+    Returns:
+        Dictionary keyed by period label
+    """
+    periods = periods or STANDARD_PERIODS
+    valuation = valuation[valuation.index <= pd.Timestamp(as_of)] if as_of is not None else valuation
+
+    if valuation.empty:
+        return {}
+
+    days = valuation.index
+    value = valuation['value'].values
+    flow = valuation['flow'].values
+    growth = np.cumprod(1.0 + daily_twr_returns(valuation).values)
+
+    inception = days[np.argmax(value > 0)] if (value > 0).any() else days[0]
+    as_of_day = days[-1]
+
+    results = {}
+    rows = []
+
+    for label in periods:
+        start = _period_start(label, as_of_day, inception)
+        if start is None:
+            continue
+        first = int(days.searchsorted(start))
+        if first >= len(days):
+            continue
+
+        # The period opens with the prior day's value as the initial investment
+        base = first - 1
+        start_value = value[base] if base >= 0 else 0.0
+        start_growth = growth[base] if base >= 0 else 1.0
+        years = max((as_of_day - (days[base] if base >= 0 else days[first])).days, 1) / 365.25
+
+        twr = growth[-1] / start_growth - 1
+
+        results[label] = {
+            'start_date': days[first].strftime('%Y-%m-%d'),
+            'end_date': as_of_day.strftime('%Y-%m-%d'),
+            'start_value': round(float(start_value), 2),
+            'end_value': round(float(value[-1]), 2),
+            'net_flows': round(float(flow[first:].sum()), 2),
+            'twr': round(float(twr), 6),
+            'twr_annualized': round(float((1 + twr) ** (1 / years) - 1), 6) if years >= 1 else None,
+            'years': round(years, 4)
+        }
+        rows.append((label, base, first, years))
+
+    # Batched IRR: -V_start, -flows, +V_end per period, padded to the longest period
+    if rows:
+        width = max(len(days) - first for _, _, first, _ in rows) + 2
+        amounts = np.zeros((len(rows), width))
+        times = np.zeros((len(rows), width))
+
+        for i, (label, base, first, years) in enumerate(rows):
+            origin = days[base] if base >= 0 else days[first]
+            span = len(days) - first
+            amounts[i, 0] = -(value[base] if base >= 0 else 0.0)
+            amounts[i, 1:span + 1] = -flow[first:]
+            amounts[i, span] += value[-1]
+            times[i, 1:span + 1] = (days[first:] - origin).days.values / 365.25
+
+        irr = solve_irr(amounts, times)
+
+        for (label, _, _, years), rate in zip(rows, irr):
+            if np.isnan(rate):
+                results[label]['mwr'] = None
+                results[label]['mwr_annualized'] = None
+                continue
+            results[label]['mwr'] = round(float((1 + rate) ** years - 1), 6)
+            results[label]['mwr_annualized'] = round(float(rate), 6) if years >= 1 else None
+
+    return results
+
+
+def load_transactions(db, portfolio_id: Optional[int] = None, user_id: Optional[int] = None) -> pd.DataFrame:
+    """
+    Load transaction rows needed for valuation from the database.
+
+    Args:
+        db: SQLAlchemy session
+        portfolio_id: Restrict to one portfolio
+        user_id: Restrict to one user
+
+    Returns:
+        DataFrame of transactions
+    """
+    from models import Transaction
+
+    columns = ['transaction_type', 'symbol', 'quantity', 'price', 'amount', 'fees', 'transaction_date']
+    query = db.query(
+        Transaction.transaction_type, Transaction.symbol, Transaction.quantity, Transaction.price,
+        Transaction.amount, Transaction.fees, Transaction.transaction_date
+    )
+
+    if portfolio_id is not None:
+        query = query.filter(Transaction.portfolio_id == portfolio_id)
+    if user_id is not None:
+        query = query.filter(Transaction.user_id == user_id)
+
+    return pd.DataFrame(query.all(), columns=columns)
+
+
+def calculate_portfolio_returns(
+    transactions: Union[pd.DataFrame, List[Dict[str, Any]]],
+    prices: Optional[pd.DataFrame] = None,
+    periods: Optional[List[str]] = None,
+    as_of: Optional[Union[str, datetime]] = None
+) -> Dict[str, Any]:
+    """
+    Build the valuation series and compute all period returns.
+
+    Args:
+        transactions: Transaction rows
+        prices: Optional daily close prices (fetched from the price store if omitted)
+        periods: Period labels
+        as_of: Reporting date
+
+    Returns:
+        Dictionary with period returns and valuation summary
+    """
+    valuation = build_valuation_series(transactions, prices, end_date=as_of)
+
+    if valuation.empty:
+        return {'periods': {}, 'valuation': {'dates': [], 'values': []}}
+
+    return {
+        'periods': calculate_period_returns(valuation, periods),
+        'valuation': {
+            'start_date': valuation.index[0].strftime('%Y-%m-%d'),
+            'end_date': valuation.index[-1].strftime('%Y-%m-%d'),
+            'current_value': round(float(valuation['value'].iloc[-1]), 2),
+            'total_net_flows': round(float(valuation['flow'].sum()), 2),
+            'data_points': len(valuation)
+        }
+    }
@@ -0,0 +1,248 @@
+"""
+Risk Models for VisionWealth
+Shrinkage covariance/correlation estimation that scales to full portfolios,
+compact matrix encoding for API payloads, and correlation-based cluster ordering
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Any, Optional, Tuple
+import base64
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# ========================================
+# SHRINKAGE ESTIMATION
+# ========================================
+
+def ledoit_wolf_covariance(
+    returns: np.ndarray,
+    block_size: int = 256
+) -> Tuple[np.ndarray, float]:
+    """
+    Ledoit-Wolf shrinkage covariance towards a scaled identity target.
+
+    Sigma = delta * mu * I + (1 - delta) * S, with the optimal intensity delta
+    estimated from the data. The sample covariance is accumulated in column
+    blocks so peak temporary memory stays at (observations x block_size).
+
+    Missing observations (NaN) are treated as the asset's mean return.
+
+    Args:
+        returns: (observations x assets) return matrix
+        block_size: Number of assets per block
+
+    Returns:
+        Tuple of (shrunk covariance matrix, shrinkage intensity)
+    """
+    X = np.asarray(returns, dtype=float)
+    n, p = X.shape
+
+    X = X - np.nanmean(X, axis=0)
+    X = np.nan_to_num(X, nan=0.0)
+
+    S = np.empty((p, p))
+    for start in range(0, p, block_size):
+        stop = min(start + block_size, p)
+        S[start:stop] = X[:, start:stop].T @ X / n
+
+    mu = np.trace(S) / p
+
+    # ||S - mu I||^2 and sum_k ||x_k x_k' - S||^2 without forming per-observation outer products
+    s_norm2 = np.einsum('ij,ij->', S, S)
+    d2 = (s_norm2 - 2 * mu * np.trace(S) + mu * mu * p) / p
+    b2_bar = (np.sum(np.einsum('ij,ij->i', X, X) ** 2) - n * s_norm2) / (n * n) / p
+    b2 = min(max(b2_bar, 0.0), d2)
+
+    delta = float(b2 / d2) if d2 > 0 else 1.0
+
+    S *= (1 - delta)
+    S[np.diag_indices(p)] += delta * mu
+
+    return S, delta
+
+
+def covariance_to_correlation(covariance: np.ndarray) -> np.ndarray:
+    """Convert a covariance matrix to a correlation matrix"""
+    std = np.sqrt(np.clip(np.diag(covariance), 1e-300, None))
+    correlation = covariance / std[:, None] / std[None, :]
+    np.fill_diagonal(correlation, 1.0)
+    return np.clip(correlation, -1.0, 1.0)
+
+
+def cluster_order(correlation: np.ndarray, method: str = 'average') -> np.ndarray:
+    """
+    Order assets so that highly correlated ones sit next to each other.
+
+    Uses hierarchical clustering on the correlation distance sqrt((1 - rho) / 2).
+
+    Args:
+        correlation: Correlation matrix
+        method: scipy linkage method
+
+    Returns:
+        Permutation of asset indices
+    """
+    from scipy.cluster.hierarchy import linkage, leaves_list
+    from scipy.spatial.distance import squareform
+
+    p = len(correlation)
+    if p < 3:
+        return np.arange(p)
+
+    distance = np.sqrt(np.clip((1.0 - correlation) / 2.0, 0.0, None))
+    np.fill_diagonal(distance, 0.0)
+    condensed = squareform(distance, checks=False)
+
+    return leaves_list(linkage(condensed, method=method))
+
+
+# ========================================
+# COMPACT ENCODING
+# ========================================
+
+def pack_upper_triangle(matrix: np.ndarray, include_diagonal: bool = False) -> Dict[str, Any]:
+    """
+    Encode a symmetric matrix as its upper triangle in base64 float32.
+
+    Args:
+        matrix: Symmetric (p x p) matrix
+        include_diagonal: Keep the diagonal (not needed for correlations)
+
+    Returns:
+        Dictionary with size, dtype, diagonal flag and base64 payload
+    """
+    p = len(matrix)
+    rows, cols = np.triu_indices(p, k=0 if include_diagonal else 1)
+    values = np.ascontiguousarray(matrix[rows, cols], dtype='<f4')
+
+    return {
+        'encoding': 'upper_triangle',
+        'size': p,
+        'dtype': 'float32',
+        'include_diagonal': include_diagonal,
+        'data': base64.b64encode(values.tobytes()).decode('ascii')
+    }
+
+
+def unpack_upper_triangle(payload: Dict[str, Any], diagonal: float = 1.0) -> np.ndarray:
+    """
+    Decode a matrix produced by pack_upper_triangle.
+
+    Args:
+        payload: Encoded matrix
+        diagonal: Diagonal value when the diagonal was not stored
+
+    Returns:
+        Dense symmetric (p x p) float32 matrix
+    """
+    p = payload['size']
+    include_diagonal = payload.get('include_diagonal', False)
+    values = np.frombuffer(base64.b64decode(payload['data']), dtype='<f4')
+
+    matrix = np.full((p, p), diagonal, dtype=np.float32)
+    rows, cols = np.triu_indices(p, k=0 if include_diagonal else 1)
+    matrix[rows, cols] = values
+    matrix[cols, rows] = values
+
+    return matrix
+
+
+# ========================================
+# REPORTING
+# ========================================
+
+def select_usable_assets(returns: pd.DataFrame, min_observations: int = 20) -> Tuple[List[str], List[str]]:
+    """Split symbols into those with enough history and those without"""
+    counts = returns.notna().sum()
+    usable = counts[counts >= min_observations].index.tolist()
+    excluded = [s for s in returns.columns if s not in set(usable)]
+    return usable, excluded
+
+
+def build_correlation_report(
+    covariance: np.ndarray,
+    labels: List[str],
+    shrinkage: Optional[float] = None,
+    cluster: bool = False,
+    dense_limit: int = 50
+) -> Dict[str, Any]:
+    """
+    JSON-ready correlation report for an estimated covariance matrix.
+
+    Args:
+        covariance: (p x p) covariance matrix
+        labels: Asset labels in matrix order
+        shrinkage: Shrinkage intensity used for the estimate
+        cluster: Reorder assets by hierarchical clustering
+        dense_limit: Also include the dense 'values' list when there are at most this many assets
+
+    Returns:
+        Dictionary with labels, packed upper triangle (float32) and, for
+        small universes, dense rounded values
+    """
+    correlation = covariance_to_correlation(covariance)
+    labels = list(labels)
+
+    report = {
+        'labels': labels,
+        'size': len(labels),
+        'shrinkage': round(shrinkage, 4) if shrinkage is not None else None,
+        'clustered': cluster
+    }
+
+    if cluster:
+        order = cluster_order(correlation)
+        correlation = correlation[np.ix_(order, order)]
+        report['labels'] = [labels[i] for i in order]
+        report['order'] = order.tolist()
+
+    report['packed'] = pack_upper_triangle(correlation)
+
+    if len(labels) <= dense_limit:
+        report['values'] = np.round(correlation, 2).tolist()
+
+    return report
+
+
+def historical_correlation(
+    symbols: List[str],
+    years: int = 3,
+    min_observations: int = 60
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Shrinkage correlation of daily returns from the shared price store.
+
+    Symbols without enough history are uncorrelated with everything else.
+
+    Args:
+        symbols: Ticker symbols (matrix order)
+        years: Look-back window
+        min_observations: Minimum daily returns per symbol
+
+    Returns:
+        Tuple of (correlation matrix in symbol order, symbols lacking history)
+    """
+    from datetime import datetime, timedelta
+    from price_history import get_price_store
+
+    symbols = [s.upper().strip() for s in symbols]
+    unique = list(dict.fromkeys(symbols))
+    end_date = datetime.now()
+    returns = get_price_store().get_returns(unique, end_date - timedelta(days=int(365.25 * years)), end_date)
+
+    unique_corr = np.eye(len(unique))
+    usable = []
+    if not returns.empty:
+        usable, _ = select_usable_assets(returns.reindex(columns=unique), min_observations)
+        if usable:
+            covariance, _ = ledoit_wolf_covariance(returns[usable].values)
+            index = [unique.index(s) for s in usable]
+            unique_corr[np.ix_(index, index)] = covariance_to_correlation(covariance)
+
+    # Expand back to the requested order (repeated symbols are perfectly correlated)
+    position = np.array([unique.index(s) for s in symbols], dtype=int)
+    return unique_corr[np.ix_(position, position)], [s for s in unique if s not in set(usable)]
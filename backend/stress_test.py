@@ -0,0 +1,362 @@
+"""
+Historical Stress Tests for VisionWealth
+Replays named market crises (2008, March 2020, the 2022 rates shock, ...) against
+current holdings from stored daily prices, substituting benchmark ETFs for assets
+without history, with every scenario evaluated in one batched matrix product
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Any, Optional, Union
+import logging
+
+from benchmark import BenchmarkIndex, BENCHMARK_NAMES
+from price_history import get_price_store
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# ========================================
+# SCENARIO LIBRARY
+# ========================================
+
+STRESS_SCENARIOS: Dict[str, Dict[str, str]] = {
+    'dotcom_crash': {
+        'name': 'Dot-com crash',
+        'start': '2000-03-24',
+        'end': '2002-10-09',
+        'description': 'S&P 500 peak to trough after the technology bubble'
+    },
+    'global_financial_crisis': {
+        'name': '2008 global financial crisis',
+        'start': '2007-10-09',
+        'end': '2009-03-09',
+        'description': 'S&P 500 peak to trough through the Lehman collapse'
+    },
+    'lehman_collapse': {
+        'name': 'Lehman collapse',
+        'start': '2008-09-12',
+        'end': '2008-11-20',
+        'description': 'Lehman Brothers bankruptcy to the November 2008 low'
+    },
+    'euro_debt_crisis': {
+        'name': 'Euro debt crisis',
+        'start': '2011-07-22',
+        'end': '2011-10-03',
+        'description': 'US downgrade and European sovereign debt sell-off'
+    },
+    'taper_tantrum': {
+        'name': '2013 taper tantrum',
+        'start': '2013-05-21',
+        'end': '2013-06-24',
+        'description': 'Bond sell-off after the Fed signalled slower asset purchases'
+    },
+    'q4_2018_selloff': {
+        'name': 'Q4 2018 sell-off',
+        'start': '2018-09-20',
+        'end': '2018-12-24',
+        'description': 'Rate-hike and trade-war drawdown'
+    },
+    'covid_crash': {
+        'name': 'March 2020 COVID crash',
+        'start': '2020-02-19',
+        'end': '2020-03-23',
+        'description': 'Fastest 30% drawdown in S&P 500 history'
+    },
+    'rates_shock_2022': {
+        'name': '2022 rates shock',
+        'start': '2022-01-03',
+        'end': '2022-10-12',
+        'description': 'Simultaneous stock and bond losses as rates rose'
+    }
+}
+
+# Keywords in asset type / sector -> proxy benchmark (first match wins, asset type before sector)
+PROXY_KEYWORDS = [
+    (('tips', 'inflation'), BenchmarkIndex.TIPS),
+    (('bond', 'fixed income', 'treasury', 'debt', 'credit', 'municipal'), BenchmarkIndex.BONDS),
+    (('reit', 'real estate'), BenchmarkIndex.REITS),
+    (('gold', 'precious', 'commodit'), BenchmarkIndex.GOLD),
+    (('emerging',), BenchmarkIndex.EMERGING),
+    (('international', 'foreign', 'global', 'developed'), BenchmarkIndex.INTERNATIONAL),
+    (('small cap', 'small-cap', 'smallcap'), BenchmarkIndex.RUSSELL2000),
+    (('technology', 'tech', 'crypto'), BenchmarkIndex.NASDAQ),
+]
+
+DEFAULT_PROXY = BenchmarkIndex.SP500
+
+# A holding whose first return falls this many days into a window still counts as trading there
+LISTING_SLACK_DAYS = 5
+
+# Proxies launched after some windows fall back to an older index; chains end at
+# indices whose absence means the holding is treated as flat (cash-like)
+PROXY_FALLBACKS = {
+    BenchmarkIndex.INTERNATIONAL.value: BenchmarkIndex.EMERGING.value,
+    BenchmarkIndex.EMERGING.value: BenchmarkIndex.SP500.value,
+    BenchmarkIndex.TOTAL_MARKET.value: BenchmarkIndex.SP500.value,
+    BenchmarkIndex.NASDAQ.value: BenchmarkIndex.SP500.value,
+    BenchmarkIndex.DOW.value: BenchmarkIndex.SP500.value,
+    BenchmarkIndex.RUSSELL2000.value: BenchmarkIndex.SP500.value,
+    BenchmarkIndex.REITS.value: BenchmarkIndex.SP500.value,
+    BenchmarkIndex.TIPS.value: BenchmarkIndex.BONDS.value,
+}
+
+
+def resolve_scenarios(scenarios: Optional[List[Union[str, Dict[str, str]]]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Look up library scenarios by key and validate custom windows.
+
+    Args:
+        scenarios: Library keys and/or dicts with name, start and end (default: whole library)
+
+    Returns:
+        Ordered mapping of scenario key to name, description and start/end Timestamps
+    """
+    resolved = {}
+    for scenario in scenarios or list(STRESS_SCENARIOS):
+        if isinstance(scenario, str):
+            if scenario not in STRESS_SCENARIOS:
+                raise ValueError(f"Unknown stress scenario: {scenario}")
+            key, definition = scenario, STRESS_SCENARIOS[scenario]
+        else:
+            definition = scenario
+            key = definition.get('key') or definition.get('name')
+            if not key:
+                raise ValueError("Custom stress scenarios need a name")
+
+        start, end = pd.Timestamp(definition['start']), pd.Timestamp(definition['end'])
+        if end <= start:
+            raise ValueError(f"Stress scenario {key} ends before it starts")
+
+        resolved[key] = {
+            'name': definition.get('name', key),
+            'description': definition.get('description', ''),
+            'start': start,
+            'end': end
+        }
+    return resolved
+
+
+def proxy_for(asset_type: Optional[str] = None, sector: Optional[str] = None) -> str:
+    """
+    Benchmark ETF standing in for a holding without price history.
+
+    Args:
+        asset_type: Holding asset type, e.g. 'Bond' or 'ETF'
+        sector: Holding sector, e.g. 'Real Estate'
+
+    Returns:
+        BenchmarkIndex ticker
+    """
+    for label in (asset_type, sector):
+        text = (label or '').lower()
+        if not text:
+            continue
+        for keywords, index in PROXY_KEYWORDS:
+            if any(keyword in text for keyword in keywords):
+                return index.value
+    return DEFAULT_PROXY.value
+
+
+def _proxy_chain(proxy: str) -> List[str]:
+    chain = [proxy]
+    while chain[-1] in PROXY_FALLBACKS:
+        chain.append(PROXY_FALLBACKS[chain[-1]])
+    return chain
+
+
+# ========================================
+# CORE KERNELS
+# ========================================
+
+def replay_windows(growth_blocks: List[np.ndarray], weights: np.ndarray) -> List[np.ndarray]:
+    """
+    Buy-and-hold value paths of one portfolio across many windows in one product.
+
+    Args:
+        growth_blocks: Per window, (days x holdings) cumulative growth of each holding
+        weights: (holdings,) starting weights, or (holdings x portfolios)
+
+    Returns:
+        Per window, (days,) or (days x portfolios) portfolio value relative to the start
+    """
+    if not growth_blocks:
+        return []
+    offsets = np.cumsum([len(block) for block in growth_blocks])[:-1]
+    return np.split(np.vstack(growth_blocks) @ weights, offsets)
+
+
+def path_metrics(values: np.ndarray) -> Dict[str, Any]:
+    """
+    Return, drawdown and worst day of a relative value path starting at 1.
+
+    Args:
+        values: (days,) portfolio value relative to the window start
+
+    Returns:
+        Dictionary with total_return, max_drawdown, trough index and worst_day return
+    """
+    path = np.concatenate([[1.0], values])
+    drawdown = path / np.maximum.accumulate(path) - 1
+    daily = path[1:] / path[:-1] - 1
+    return {
+        'total_return': float(path[-1] - 1),
+        'max_drawdown': float(drawdown.min()),
+        'trough': int(np.argmin(path)),
+        'worst_day': float(daily.min()) if len(daily) else 0.0
+    }
+
+
+# ========================================
+# HIGH-LEVEL API
+# ========================================
+
+def _holdings_frame(holdings: Union[pd.DataFrame, List[Dict[str, Any]]]) -> pd.DataFrame:
+    """Normalize holdings to symbol / value / asset_type / sector columns"""
+    df = holdings.copy() if isinstance(holdings, pd.DataFrame) else pd.DataFrame(list(holdings))
+    df = df.rename(columns={'ticker': 'symbol', 'Symbol': 'symbol', 'Value ($)': 'value',
+                            'Asset Type': 'asset_type', 'Sector': 'sector'})
+
+    df['symbol'] = df['symbol'].astype(str).str.upper().str.strip()
+    df['value'] = pd.to_numeric(df['value'], errors='coerce').fillna(0.0)
+    for column in ('asset_type', 'sector'):
+        df[column] = df[column].fillna('') if column in df.columns else ''
+
+    df = df[df['value'] > 0]
+    return df.groupby('symbol', sort=False, as_index=False).agg(
+        {'value': 'sum', 'asset_type': 'first', 'sector': 'first'}
+    )
+
+
+def run_stress_tests(
+    holdings: Union[pd.DataFrame, List[Dict[str, Any]]],
+    scenarios: Optional[List[Union[str, Dict[str, str]]]] = None,
+    returns: Optional[pd.DataFrame] = None,
+    benchmark: str = BenchmarkIndex.SP500.value,
+    include_paths: bool = False
+) -> Dict[str, Any]:
+    """
+    Replay historical stress windows against the current holdings.
+
+    Prices for all holdings and proxies are loaded once over the union of the
+    windows. In each window a holding uses its own daily returns if it traded
+    on the first day, otherwise the first proxy ETF in its fallback chain that
+    did (holdings with neither are held flat). The per-window growth matrices
+    are stacked and multiplied by the weights in a single product, so weights
+    drift with prices (buy and hold) over every window.
+
+    Args:
+        holdings: Holdings with symbol (or ticker), value, and optional asset_type / sector
+        scenarios: Library keys and/or custom {name, start, end} windows (default: whole library)
+        returns: Optional daily returns panel (dates x symbols); fetched from the price store if omitted
+        benchmark: Ticker replayed alongside the portfolio for comparison
+        include_paths: Include the daily value path of every scenario
+
+    Returns:
+        Dictionary with per-scenario return, P&L, drawdown, contributions and proxy usage
+    """
+    frame = _holdings_frame(holdings)
+    if frame.empty:
+        raise ValueError("Stress tests need holdings with positive value")
+
+    windows = resolve_scenarios(scenarios)
+    total_value = float(frame['value'].sum())
+    weights = (frame['value'] / total_value).values
+    symbols = frame['symbol'].tolist()
+    chains = [_proxy_chain(proxy_for(a, s)) for a, s in zip(frame['asset_type'], frame['sector'])]
+
+    if returns is None:
+        universe = list(dict.fromkeys(symbols + [t for chain in chains for t in chain] + [benchmark]))
+        first = min(w['start'] for w in windows.values()) - pd.Timedelta(days=10)
+        last = max(w['end'] for w in windows.values())
+        returns = get_price_store().get_returns(universe, first, last)
+
+    returns = returns.sort_index()
+    first_traded = returns.apply(lambda column: column.first_valid_index())
+
+    growth_blocks, window_info = [], []
+    for key, window in windows.items():
+        days = returns.loc[(returns.index > window['start']) & (returns.index <= window['end'])]
+        if days.empty:
+            window_info.append(None)
+            continue
+
+        # A series covers the window if it trades within its first days; the slack
+        # keeps equities covered when the window opens on a weekend-only (crypto) row
+        covered = first_traded.notna() & (first_traded <= days.index[0] + pd.Timedelta(days=LISTING_SLACK_DAYS))
+        sources = []
+        for symbol, chain in zip(symbols, chains):
+            source = next((s for s in [symbol] + chain if covered.get(s, False)), None)
+            sources.append(source)
+
+        columns = [s for s in dict.fromkeys(sources) if s is not None]
+        panel = np.hstack([days.reindex(columns=columns).fillna(0.0).values, np.zeros((len(days), 1))])
+        position = {s: i for i, s in enumerate(columns)}
+        mapping = [position.get(s, len(columns)) if s is not None else len(columns) for s in sources]
+
+        growth_blocks.append(np.cumprod(1.0 + panel, axis=0)[:, mapping])
+        bench = days[benchmark].fillna(0.0).values if benchmark in days.columns and covered.get(benchmark, False) else None
+        window_info.append({'dates': days.index, 'sources': sources, 'benchmark': bench})
+
+    values = iter(replay_windows(growth_blocks, weights))
+    growth = iter(growth_blocks)
+
+    results = []
+    for (key, window), info in zip(windows.items(), window_info):
+        base = {
+            'scenario': key,
+            'name': window['name'],
+            'description': window['description'],
+            'start': window['start'].strftime('%Y-%m-%d'),
+            'end': window['end'].strftime('%Y-%m-%d')
+        }
+        if info is None:
+            results.append({**base, 'error': 'No price history in window'})
+            continue
+
+        path, block = next(values), next(growth)
+        metrics = path_metrics(path)
+        contributions = weights * (block[-1] - 1)
+        proxied = [s is not None and s != symbol for s, symbol in zip(info['sources'], symbols)]
+        own = np.array([s == symbol for s, symbol in zip(info['sources'], symbols)])
+
+        result = {
+            **base,
+            'trading_days': len(path),
+            'portfolio_return': round(metrics['total_return'], 6),
+            'pnl': round(metrics['total_return'] * total_value, 2),
+            'max_drawdown': round(metrics['max_drawdown'], 6),
+            'trough_date': info['dates'][metrics['trough'] - 1].strftime('%Y-%m-%d') if metrics['trough'] else base['start'],
+            'worst_day': round(metrics['worst_day'], 6),
+            'benchmark_return': round(float(np.prod(1 + info['benchmark']) - 1), 6) if info['benchmark'] is not None else None,
+            'history_coverage': round(float(weights[own].sum()), 6),
+            'holdings': [
+                {
+                    'symbol': symbol,
+                    'source': source,
+                    'proxy': is_proxy,
+                    'weight': round(float(weight), 6),
+                    'return': round(float(block[-1, i] - 1), 6),
+                    'contribution': round(float(contributions[i]), 6),
+                    'pnl': round(float(contributions[i] * total_value), 2)
+                }
+                for i, (symbol, source, is_proxy, weight) in enumerate(zip(symbols, info['sources'], proxied, weights))
+            ]
+        }
+        if include_paths:
+            result['path'] = {
+                'dates': [d.strftime('%Y-%m-%d') for d in info['dates']],
+                'values': np.round(path * total_value, 2).tolist()
+            }
+        results.append(result)
+
+    evaluated = [r for r in results if 'error' not in r]
+    worst = min(evaluated, key=lambda r: r['portfolio_return']) if evaluated else None
+
+    return {
+        'portfolio_value': round(total_value, 2),
+        'benchmark': {'ticker': benchmark, 'name': BENCHMARK_NAMES.get(benchmark, benchmark)},
+        'scenarios': results,
+        'worst_scenario': worst['scenario'] if worst else None
+    }
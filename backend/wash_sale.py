@@ -0,0 +1,463 @@
+"""
+Wash-Sale Detection for VisionWealth
+Indexes BUY/SELL transaction history per symbol so the IRS 30-day wash-sale rule
+can be applied to realized losses and to proposed tax-loss harvesting trades
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Any, Optional, Iterable, Union
+from datetime import datetime
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# ========================================
+# CONSTANTS
+# ========================================
+
+WASH_SALE_WINDOW_DAYS = 30
+
+_COLUMNS = ['id', 'symbol', 'transaction_type', 'quantity', 'price', 'amount', 'fees', 'transaction_date', 'meta_json']
+
+
+# ========================================
+# INDEX
+# ========================================
+
+class _SymbolLedger:
+    """Sorted purchase and sale arrays for a single symbol"""
+
+    def __init__(self, buys: pd.DataFrame, sells: pd.DataFrame):
+        self.buy_ids = buys['id'].to_numpy()
+        self.buy_dates = buys['day'].to_numpy().astype('datetime64[D]')
+        self.buy_qty = buys['quantity'].to_numpy(dtype=float)
+        self.buy_cost = buys['cost'].to_numpy(dtype=float)
+
+        self.sell_ids = sells['id'].to_numpy()
+        self.sell_dates = sells['day'].to_numpy().astype('datetime64[D]')
+        self.sell_qty = sells['quantity'].to_numpy(dtype=float)
+        self.sell_proceeds = sells['proceeds'].to_numpy(dtype=float)
+        self.sell_basis = sells['reported_basis'].to_numpy(dtype=float)
+
+    def window(self, day: np.datetime64, before: int = WASH_SALE_WINDOW_DAYS, after: int = WASH_SALE_WINDOW_DAYS):
+        """Index range [lo, hi) of purchases dated within [day - before, day + after]"""
+        lo = int(np.searchsorted(self.buy_dates, day - np.timedelta64(before, 'D'), side='left'))
+        hi = int(np.searchsorted(self.buy_dates, day + np.timedelta64(after, 'D'), side='right'))
+        return lo, hi
+
+
+class WashSaleIndex:
+    """
+    Per-symbol index over BUY/SELL transactions.
+
+    Purchases are kept as date-sorted numpy arrays so every ±30-day lookup is a
+    binary search instead of a scan over the whole purchase history.
+    """
+
+    def __init__(self, transactions: Union[pd.DataFrame, Iterable[Dict[str, Any]]]):
+        """
+        Build the index.
+
+        Args:
+            transactions: DataFrame or iterable of dicts with transaction columns
+                (symbol, transaction_type, quantity, price, amount, fees,
+                transaction_date and optionally id, meta_json)
+        """
+        df = transactions.copy() if isinstance(transactions, pd.DataFrame) else pd.DataFrame(list(transactions))
+        self._ledgers: Dict[str, _SymbolLedger] = {}
+        self.transaction_count = len(df)
+
+        if df.empty:
+            return
+
+        for column in _COLUMNS:
+            if column not in df.columns:
+                df[column] = None
+
+        df['transaction_type'] = df['transaction_type'].map(_normalize_type)
+        df = df[df['transaction_type'].isin(['buy', 'sell']) & df['symbol'].notna()].copy()
+
+        if df.empty:
+            return
+
+        df['id'] = df['id'].where(df['id'].notna(), pd.Series(range(len(df)), index=df.index))
+        df['symbol'] = df['symbol'].astype(str).str.upper().str.strip()
+        df['day'] = pd.to_datetime(df['transaction_date'], utc=True).dt.tz_localize(None).values.astype('datetime64[D]')
+        df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce').fillna(0.0).abs()
+        df['price'] = pd.to_numeric(df['price'], errors='coerce').fillna(0.0)
+        df['fees'] = pd.to_numeric(df['fees'], errors='coerce').fillna(0.0)
+
+        amount = pd.to_numeric(df['amount'], errors='coerce').abs()
+        gross = amount.where(amount > 0, df['quantity'] * df['price'])
+        df['cost'] = gross + df['fees']
+        df['proceeds'] = gross - df['fees']
+        df['reported_basis'] = df['meta_json'].map(_reported_basis)
+
+        df = df[df['quantity'] > 0]
+
+        # Buys sort ahead of same-day sells so a same-day repurchase is visible to the sale
+        df['order'] = (df['transaction_type'] == 'sell').astype(int)
+        df = df.sort_values(['symbol', 'day', 'order', 'id'], kind='mergesort')
+
+        is_buy = (df['transaction_type'] == 'buy').to_numpy()
+        symbols = df['symbol'].to_numpy()
+        boundaries = np.flatnonzero(symbols[1:] != symbols[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(df)]))
+
+        for start, end in zip(starts, ends):
+            chunk = df.iloc[start:end]
+            chunk_is_buy = is_buy[start:end]
+            self._ledgers[symbols[start]] = _SymbolLedger(chunk[chunk_is_buy], chunk[~chunk_is_buy])
+
+        logger.info(f"WashSaleIndex built: {self.transaction_count} transactions, {len(self._ledgers)} symbols")
+
+    @classmethod
+    def from_db(cls, db, user_id: Optional[int] = None, portfolio_id: Optional[int] = None) -> 'WashSaleIndex':
+        """
+        Build the index straight from the transactions table.
+
+        Args:
+            db: SQLAlchemy session
+            user_id: Restrict to one user's transactions
+            portfolio_id: Restrict to one portfolio's transactions
+
+        Returns:
+            WashSaleIndex
+        """
+        from models import Transaction, TransactionType
+
+        query = db.query(
+            Transaction.id, Transaction.symbol, Transaction.transaction_type,
+            Transaction.quantity, Transaction.price, Transaction.amount,
+            Transaction.fees, Transaction.transaction_date, Transaction.meta_json
+        ).filter(Transaction.transaction_type.in_([TransactionType.BUY, TransactionType.SELL]))
+
+        if user_id is not None:
+            query = query.filter(Transaction.user_id == user_id)
+        if portfolio_id is not None:
+            query = query.filter(Transaction.portfolio_id == portfolio_id)
+
+        return cls(pd.DataFrame(query.all(), columns=_COLUMNS))
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._ledgers.keys())
+
+    def purchases_near(self, symbol: str, date: Union[datetime, str], days: int = WASH_SALE_WINDOW_DAYS) -> List[Dict[str, Any]]:
+        """
+        List purchases of a symbol dated within ±days of a date.
+
+        Args:
+            symbol: Ticker symbol
+            date: Reference date
+            days: Window half-width in days
+
+        Returns:
+            Purchases in the window (id, date, quantity)
+        """
+        ledger = self._ledgers.get(str(symbol).upper().strip())
+        if ledger is None:
+            return []
+
+        lo, hi = ledger.window(_to_day(date), days, days)
+        return [
+            {'transaction_id': _py(ledger.buy_ids[j]), 'date': str(ledger.buy_dates[j]), 'quantity': float(ledger.buy_qty[j])}
+            for j in range(lo, hi)
+        ]
+
+    def detect(self) -> Dict[str, Any]:
+        """
+        Replay every symbol's history FIFO and apply the wash-sale rule.
+
+        A loss sale is (partly) disallowed when replacement shares are bought
+        within 30 days before or after it. Each replacement share can absorb
+        only one disallowed loss, and the disallowed amount is added to the
+        replacement lot's cost basis.
+
+        Returns:
+            Dictionary with flagged sales, basis adjustments and totals
+        """
+        wash_sales = []
+        adjustments = []
+        total_realized_loss = 0.0
+        total_disallowed = 0.0
+
+        for symbol, ledger in self._ledgers.items():
+            flagged, adjusted, realized_loss, _ = _replay_symbol(symbol, ledger)
+            wash_sales.extend(flagged)
+            adjustments.extend(adjusted)
+            total_realized_loss += realized_loss
+            total_disallowed += sum(w['disallowed_loss'] for w in flagged)
+
+        wash_sales.sort(key=lambda w: (w['date'], w['symbol']))
+        adjustments.sort(key=lambda a: (a['date'], a['symbol']))
+
+        return {
+            'wash_sales': wash_sales,
+            'basis_adjustments': adjustments,
+            'summary': {
+                'transactions_indexed': self.transaction_count,
+                'symbols': len(self._ledgers),
+                'wash_sale_count': len(wash_sales),
+                'total_realized_loss': round(total_realized_loss, 2),
+                'total_disallowed_loss': round(total_disallowed, 2),
+                'total_allowed_loss': round(total_realized_loss + total_disallowed, 2)
+            }
+        }
+
+    def screen_sale(
+        self,
+        symbol: str,
+        as_of: Optional[Union[datetime, str]] = None,
+        quantity: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Check whether selling a symbol at a loss on a date would be a wash sale.
+
+        The sale is replayed FIFO against the lots still held, so purchases in
+        the 30 days before it only count as replacement shares if they are
+        still held afterwards (and have not already replaced an earlier loss).
+        The 30 days after are under the user's control, so the result also
+        carries the first date a repurchase is safe.
+
+        Args:
+            symbol: Ticker symbol
+            as_of: Proposed sale date (default today)
+            quantity: Shares to sell (default: the whole position in the index)
+
+        Returns:
+            Screening result for the proposed sale
+        """
+        day = _to_day(as_of or datetime.utcnow())
+        symbol = str(symbol).upper().strip()
+        ledger = self._ledgers.get(symbol)
+
+        conflicts = []
+        shares_sold = float(quantity) if quantity is not None else 0.0
+        if ledger is not None:
+            _, _, _, (remaining, used_as_replacement) = _replay_symbol(symbol, ledger, until=day)
+            held = int(np.searchsorted(ledger.buy_dates, day, side='right'))
+            if quantity is None:
+                shares_sold = float(sum(remaining[:held]))
+
+            # The proposed sale consumes the oldest lots first
+            to_sell = shares_sold
+            for j in range(held):
+                if to_sell <= 1e-9:
+                    break
+                take = min(to_sell, remaining[j])
+                remaining[j] -= take
+                to_sell -= take
+
+            lo, hi = ledger.window(day, WASH_SALE_WINDOW_DAYS, 0)
+            for j in range(lo, hi):
+                shares = remaining[j] - used_as_replacement[j]
+                if shares > 1e-9:
+                    conflicts.append({'transaction_id': _py(ledger.buy_ids[j]), 'date': str(ledger.buy_dates[j]), 'quantity': round(shares, 6)})
+
+        replacement_shares = min(sum(c['quantity'] for c in conflicts), shares_sold)
+        if conflicts:
+            clear_day = np.datetime64(conflicts[-1]['date']) + np.timedelta64(WASH_SALE_WINDOW_DAYS + 1, 'D')
+        else:
+            clear_day = day
+
+        return {
+            'symbol': symbol,
+            'wash_sale_risk': replacement_shares > 1e-9,
+            'quantity': round(shares_sold, 6),
+            'replacement_shares': round(replacement_shares, 6),
+            'disallowed_fraction': round(replacement_shares / shares_sold, 6) if shares_sold > 0 else 0.0,
+            'conflicting_purchases': conflicts,
+            'safe_to_sell_on': str(clear_day),
+            'safe_to_repurchase_on': str(day + np.timedelta64(WASH_SALE_WINDOW_DAYS + 1, 'D'))
+        }
+
+
+# ========================================
+# HELPERS
+# ========================================
+
+def _replay_symbol(symbol: str, ledger: _SymbolLedger, until: Optional[np.datetime64] = None):
+    """
+    FIFO lot replay for one symbol, matching loss sales to replacement purchases.
+
+    Sales after `until` are left out. Besides the flagged sales, basis
+    adjustments and realized loss, returns the per-lot (remaining shares,
+    shares already used as replacements) left by the replay.
+    """
+    window = np.timedelta64(WASH_SALE_WINDOW_DAYS, 'D')
+    sales = len(ledger.sell_dates) if until is None else int(np.searchsorted(ledger.sell_dates, until, side='right'))
+
+    # One vectorized binary search per boundary for all sales of the symbol
+    held_until = np.searchsorted(ledger.buy_dates, ledger.sell_dates, side='right').tolist()
+    window_lo = np.searchsorted(ledger.buy_dates, ledger.sell_dates - window, side='left').tolist()
+    window_hi = np.searchsorted(ledger.buy_dates, ledger.sell_dates + window, side='right').tolist()
+
+    buy_qty = ledger.buy_qty.tolist()
+    buy_cost = ledger.buy_cost.tolist()
+    remaining = list(buy_qty)
+    used_as_replacement = [0.0] * len(buy_qty)
+    basis_adjustment = [0.0] * len(buy_qty)
+    head = 0
+
+    flagged = []
+    realized_loss = 0.0
+
+    for k, (qty, proceeds, reported) in enumerate(zip(
+        ledger.sell_qty[:sales].tolist(), ledger.sell_proceeds[:sales].tolist(), ledger.sell_basis[:sales].tolist()
+    )):
+        held = held_until[k]
+
+        # Consume FIFO lots held on the sale date
+        to_sell = qty
+        fifo_basis = 0.0
+        while to_sell > 1e-9 and head < held:
+            take = min(to_sell, remaining[head])
+            if take > 0:
+                fifo_basis += take * (buy_cost[head] + basis_adjustment[head]) / buy_qty[head]
+                remaining[head] -= take
+                to_sell -= take
+            if remaining[head] <= 1e-9:
+                head += 1
+
+        basis = fifo_basis if reported != reported else reported
+        gain = proceeds - basis
+
+        if gain >= 0:
+            continue
+
+        realized_loss += gain
+        loss_per_share = -gain / qty
+        matched = 0.0
+        replacements = []
+
+        for j in range(window_lo[k], window_hi[k]):
+            if matched >= qty - 1e-9:
+                break
+            capacity = (remaining[j] if j < held else buy_qty[j]) - used_as_replacement[j]
+            if capacity <= 1e-9:
+                continue
+
+            shares = min(capacity, qty - matched)
+            used_as_replacement[j] += shares
+            basis_adjustment[j] += shares * loss_per_share
+            matched += shares
+            replacements.append({
+                'transaction_id': _py(ledger.buy_ids[j]),
+                'date': str(ledger.buy_dates[j]),
+                'shares': round(shares, 6),
+                'basis_added': round(shares * loss_per_share, 2)
+            })
+
+        if matched > 0:
+            flagged.append({
+                'transaction_id': _py(ledger.sell_ids[k]),
+                'symbol': symbol,
+                'date': str(ledger.sell_dates[k]),
+                'quantity': qty,
+                'realized_loss': round(gain, 2),
+                'disallowed_loss': round(matched * loss_per_share, 2),
+                'allowed_loss': round(gain + matched * loss_per_share, 2),
+                'replacement_shares': round(matched, 6),
+                'replacements': replacements
+            })
+
+    adjusted = []
+    for j, adjustment in enumerate(basis_adjustment):
+        if adjustment <= 0:
+            continue
+        original = buy_cost[j]
+        adjusted.append({
+            'transaction_id': _py(ledger.buy_ids[j]),
+            'symbol': symbol,
+            'date': str(ledger.buy_dates[j]),
+            'quantity': buy_qty[j],
+            'original_cost_basis': round(original, 2),
+            'basis_adjustment': round(adjustment, 2),
+            'adjusted_cost_basis': round(original + adjustment, 2),
+            'adjusted_cost_per_share': round((original + adjustment) / buy_qty[j], 4)
+        })
+
+    return flagged, adjusted, realized_loss, (remaining, used_as_replacement)
+
+
+def _normalize_type(value: Any) -> str:
+    """Map TransactionType enums and raw strings to lowercase type names"""
+    if value is None:
+        return ''
+    return str(getattr(value, 'value', value)).lower()
+
+
+def _reported_basis(meta: Any) -> float:
+    """Broker-reported cost basis of a sale, if stored in meta_json"""
+    if isinstance(meta, dict) and meta.get('cost_basis') is not None:
+        try:
+            return float(meta['cost_basis'])
+        except (TypeError, ValueError):
+            pass
+    return np.nan
+
+
+def _to_day(value: Union[datetime, str, np.datetime64]) -> np.datetime64:
+    """Normalize a date-like value to numpy day precision"""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert(None)
+    return np.datetime64(ts.date(), 'D')
+
+
+def _py(value: Any) -> Any:
+    """Convert numpy scalars to native Python types for JSON responses"""
+    return value.item() if hasattr(value, 'item') else value
+
+
+# ========================================
+# HARVEST SCREENING
+# ========================================
+
+def screen_harvest_opportunities(
+    opportunities: List[Dict[str, Any]],
+    index: WashSaleIndex,
+    as_of: Optional[Union[datetime, str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Annotate tax-loss harvesting suggestions with wash-sale checks.
+
+    Args:
+        opportunities: Output of analytics.identify_tax_loss_harvesting
+        index: WashSaleIndex over the user's transactions
+        as_of: Proposed sale date (default today)
+
+    Returns:
+        Opportunities with wash-sale fields; blocked ones carry no tax benefit
+    """
+    screened = []
+
+    for opportunity in opportunities:
+        check = index.screen_sale(opportunity['symbol'], as_of, opportunity.get('quantity'))
+        item = dict(opportunity)
+        item['wash_sale_risk'] = check['wash_sale_risk']
+        item['safe_to_repurchase_on'] = check['safe_to_repurchase_on']
+
+        if check['wash_sale_risk']:
+            # Only recent shares still held after the sale replace it; the rest of the loss stays deductible
+            item['conflicting_purchases'] = check['conflicting_purchases']
+            item['disallowed_fraction'] = check['disallowed_fraction']
+            item['recommendation'] = (
+                f"Recent purchase would trigger a wash sale on {check['replacement_shares']:g} shares; "
+                f"wait until {check['safe_to_sell_on']} to harvest the full loss"
+            )
+            item['estimated_tax_benefit'] = round(item.get('estimated_tax_benefit', 0.0) * (1 - check['disallowed_fraction']), 2)
+        else:
+            item['recommendation'] = (
+                f"{opportunity.get('recommendation', 'Consider selling to realize loss for tax purposes')}; "
+                f"do not repurchase before {check['safe_to_repurchase_on']}"
+            )
+
+        screened.append(item)
+
+    return screened
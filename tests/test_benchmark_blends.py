@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from benchmark import BenchmarkBlend, BenchmarkService, parse_benchmark, blended_returns, period_start, MAX_PERIOD_START
+from price_history import get_price_store
+
+
+def _loop_blend(returns, weights, codes):
+    out, holdings = [], None
+    for t in range(len(returns)):
+        if t == 0 or codes[t] != codes[t - 1]:
+            holdings = weights * (1.0 if t == 0 else value)
+        before = holdings.sum()
+        holdings = holdings * (1 + returns[t])
+        value = holdings.sum()
+        out.append(value / before - 1)
+    return np.array(out)
+
+
+def test_vectorized_rebalancing_matches_loop():
+    rng = np.random.default_rng(5)
+    index = pd.bdate_range('2020-01-01', periods=700)
+    returns = rng.normal(0.0003, 0.01, (700, 3))
+    weights = np.array([0.6, 0.3, 0.1])
+
+    for frequency in ('M', 'Q', 'Y'):
+        codes = index.to_period(frequency).asi8
+        assert np.allclose(blended_returns(returns, weights, codes), _loop_blend(returns, weights, codes))
+
+    assert np.allclose(blended_returns(returns, weights, np.arange(700)), returns @ weights)
+    buy_and_hold = blended_returns(returns, weights, np.zeros(700))
+    assert np.isclose(np.prod(1 + buy_and_hold), np.cumprod(1 + returns, axis=0)[-1] @ weights)
+
+
+def test_blend_definitions_normalize_and_parse():
+    blend = parse_benchmark('spy:60, agg:40@Q')
+    assert blend == BenchmarkBlend.create({'AGG': 2, 'SPY': 3}, rebalance='Q')
+    assert blend.key == 'AGG:0.4,SPY:0.6@Q'
+    assert blend.display_name == '40% US Bonds / 60% S&P 500'
+    assert parse_benchmark('qqq') == 'QQQ'
+    assert parse_benchmark({'SPY': 1, 'VXUS': 1}).weights.tolist() == [0.5, 0.5]
+
+    assert parse_benchmark('SPY:60,AGG:40@q').rebalance == 'Q'
+    assert parse_benchmark('SPY:60,AGG:40@None').rebalance == 'none'
+
+    with pytest.raises(ValueError):
+        parse_benchmark('SPY:60,AGG:40@W')
+    with pytest.raises(ValueError):
+        BenchmarkBlend.create({'SPY': 0})
+
+
+def test_lookback_periods_are_explicit():
+    end = datetime(2024, 6, 28)
+    assert period_start('1Y', end) == datetime(2023, 6, 29)
+    assert period_start('ytd', end) == datetime(2024, 1, 1)
+    assert period_start('max', end) == MAX_PERIOD_START
+    with pytest.raises(ValueError):
+        period_start('7w', end)
+    with pytest.raises(ValueError):
+        BenchmarkService().get_blended_benchmark_data(parse_benchmark('SPY:60,AGG:40'), '7w')
+
+
+def test_blended_comparison_is_memoized_per_definition():
+    rng = np.random.default_rng(6)
+    dates = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=400)
+    for symbol, mu, sigma in [('BLNDA', 0.0005, 0.012), ('BLNDB', 0.0001, 0.004)]:
+        get_price_store().put(symbol, pd.Series(100 * np.exp(np.cumsum(rng.normal(mu, sigma, 400))), index=dates))
+
+    service = BenchmarkService()
+    blend = parse_benchmark('BLNDA:60,BLNDB:40')
+    start = dates[-260]
+    first = service.get_blended_returns(blend, start)
+    assert service.get_blended_returns(parse_benchmark({'BLNDB': 0.4, 'BLNDA': 0.6}), start) is first
+
+    prices = get_price_store().get_prices(['BLNDA', 'BLNDB'], start)
+    daily = prices.pct_change().iloc[1:]
+    expected = _loop_blend(daily.values, np.array([0.6, 0.4]), daily.index.to_period('M').asi8)
+    assert np.allclose(first.values, expected)
+
+    values = (100 * np.cumprod(1 + rng.normal(0.0004, 0.01, 250))).tolist()
+    comparison = service.compare_portfolio_to_benchmark(
+        [d.strftime('%Y-%m-%d') for d in dates[-250:]], values, 'BLNDA:60,BLNDB:40', period='1y'
+    )
+    assert comparison['benchmark']['ticker'] == 'BLNDA:0.6,BLNDB:0.4@M'
+    assert -1 <= comparison['comparison']['correlation'] <= 1
+
+
+def test_invalid_blends_do_not_break_the_comparison():
+    from analytics import calculate_benchmark_comparison
+
+    portfolio = pd.DataFrame([{'Symbol': 'BLNDA', 'Value ($)': 1000.0}])
+    assert calculate_benchmark_comparison(portfolio, 'SPY:abc') == {}
+    with pytest.raises(ValueError):
+        parse_benchmark('SPY:abc')
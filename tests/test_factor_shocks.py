@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from backend.factor_shocks import ShockEngine, holding_exposures, exposure_matrix, shock_matrix, portfolio_version, FACTORS
+
+
+def _book(n_portfolios, seed=0):
+    rng = np.random.default_rng(seed)
+    types = ['Stock', 'Stock', 'ETF', 'Bond', 'Corporate Bond', 'International ETF', 'REIT', 'Gold', 'Cash']
+    sectors = ['Technology', 'Healthcare', 'Financial Services', 'Energy', '']
+    return {
+        p: [
+            {
+                'symbol': f'S{rng.integers(2000)}',
+                'quantity': float(rng.integers(1, 100)),
+                'price': float(rng.uniform(10, 500)),
+                'asset_type': types[rng.integers(len(types))],
+                'sector': sectors[rng.integers(len(sectors))],
+                'currency': 'EUR' if rng.random() < 0.05 else 'USD'
+            }
+            for _ in range(30)
+        ]
+        for p in range(n_portfolios)
+    }
+
+
+def test_exposures_and_single_portfolio_pnl():
+    assert holding_exposures('Stock', 'Information Technology') == {'equity': 1.0, 'sector:technology': 1.0}
+    assert holding_exposures('Corporate Bond', duration=4) == {'rates': -4e-4, 'credit': -4e-4}
+    assert holding_exposures('Stock', 'Energy', currency='EUR')['usd'] == -1.0
+    assert holding_exposures('Cash') == {}
+
+    holdings = [
+        {'symbol': 'TECH', 'value': 60000, 'asset_type': 'Stock', 'sector': 'Technology'},
+        {'symbol': 'BND', 'value': 30000, 'asset_type': 'Bond'},
+        {'symbol': 'EFA', 'value': 10000, 'asset_type': 'International ETF'}
+    ]
+    result = ShockEngine().run({'p1': holdings}, ['risk_committee_base'])
+
+    # Tech -20%, rates +100bp on 6y duration, USD +5% on the international sleeve
+    expected = 60000 * -0.20 + 30000 * -0.06 + 10000 * -0.05
+    assert np.isclose(result['portfolios'][0]['pnl']['risk_committee_base'], expected)
+    assert np.isclose(result['scenarios'][0]['total_return'], expected / 100000)
+
+
+def test_sparse_product_matches_per_holding_loop_and_caches_by_version():
+    book = _book(300)
+    descriptors, shocks = shock_matrix()
+
+    expected = np.array([
+        [
+            sum(h['quantity'] * h['price'] * sum(
+                x * shocks[s, FACTORS.index(f)]
+                for f, x in holding_exposures(h['asset_type'], h['sector'], h['currency']).items()
+            ) for h in holdings)
+            for s in range(len(descriptors))
+        ]
+        for holdings in book.values()
+    ])
+    assert np.allclose(exposure_matrix(list(book.values())) @ shocks.T, expected, atol=1.0)  # values are kept to the cent
+
+    engine = ShockEngine()
+    first = engine.run(book)
+    pnl = np.array([[row['pnl'][d['scenario']] for d in descriptors] for row in first['portfolios']])
+    assert np.allclose(pnl, expected, atol=1.0)
+    assert first['cache'] == {'hits': 0, 'computed': 300}
+
+    # Only the edited portfolio gets a new version and is recomputed
+    book[7] = list(reversed(book[7]))
+    assert engine.run(book)['cache'] == {'hits': 300, 'computed': 0}
+    book[7][0] = {**book[7][0], 'quantity': book[7][0]['quantity'] + 1}
+    assert portfolio_version(book[7])[:16] != first['portfolios'][7]['version']
+    assert engine.run(book)['cache'] == {'hits': 299, 'computed': 1}
+
+    with pytest.raises(ValueError):
+        engine.run(book, [{'name': 'bad', 'shocks': {'volatility': 0.1}}])
+
+
+def test_firm_wide_run_is_one_batch_then_cached():
+    book = _book(3000, seed=1)
+    engine = ShockEngine()
+
+    result = engine.run(book)
+    assert result['cache'] == {'hits': 0, 'computed': 3000}
+    assert len(result['portfolios']) == 3000
+    assert np.isclose(
+        sum(row['pnl']['equity_crash'] for row in result['portfolios']),
+        next(s for s in result['scenarios'] if s['scenario'] == 'equity_crash')['total_pnl'],
+        atol=1.0
+    )
+
+    # An unchanged book is served entirely from the version cache
+    rerun = engine.run(book)
+    assert rerun['cache'] == {'hits': 3000, 'computed': 0}
+    assert [row['pnl'] for row in rerun['portfolios']] == [row['pnl'] for row in result['portfolios']]
@@ -0,0 +1,64 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+
+from backend.goals_api import project_goals, build_goal_projections, months_between, simulate_goal_values
+
+
+def _goal(goal_id, target_date, current=10000.0, target=50000.0, contribution=500.0, annual_return=0.07, risk_level=None):
+    return SimpleNamespace(
+        id=goal_id, name=f"Goal {goal_id}", current_value=current, target_value=target,
+        monthly_contribution=contribution, expected_return=annual_return, risk_level=risk_level,
+        target_date=target_date, start_date=datetime(2024, 1, 1)
+    )
+
+
+def test_goal_projection_is_batched_and_consistent():
+    now = datetime(2025, 3, 15)
+    assert months_between(now, [datetime(2025, 4, 14), datetime(2025, 4, 15), datetime(2035, 3, 15), None]).tolist() == [0, 1, 120, -1]
+
+    goals = [_goal(i, datetime(2025 + i, 3, 15), annual_return=0.04 + 0.01 * (i % 3)) for i in range(1, 41)]
+    goals.append(_goal(99, None))
+    metrics = project_goals(goals, now=now)
+
+    for goal, goal_metrics in zip(goals[:3], metrics):
+        months = goal_metrics['months_remaining']
+        rate = goal.expected_return / 12
+        expected = goal.current_value * (1 + rate) ** months + goal.monthly_contribution * ((1 + rate) ** months - 1) / rate
+        assert np.isclose(goal_metrics['projected_value'], expected)
+
+    probabilities = [m['probability_of_success'] for m in metrics[:40:3]]
+    assert probabilities == sorted(probabilities) and probabilities[0] < 0.05 and probabilities[-1] > 0.95
+    assert metrics[-1]['months_remaining'] is None
+
+    # The shared simulation's mean matches the deterministic projection
+    values = simulate_goal_values(
+        np.array([10000.0]), np.array([500.0]), np.array([0.07]), np.array([0.12]), np.array([120]), num_paths=20000
+    )
+    rate = 0.07 / 12
+    expected = 10000 * (1 + rate) ** 120 + 500 * ((1 + rate) ** 120 - 1) / rate
+    assert abs(values.mean() / expected - 1) < 0.01
+
+    undated = build_goal_projections([goals[-1]])[0]
+    assert undated.will_reach_goal and undated.months_to_goal > 0
+
+
+def test_volatility_groups_match_per_goal_recursion():
+    current = np.array([10000.0, 5000.0, 0.0, 20000.0, 7000.0])
+    contribution = np.array([500.0, 0.0, 300.0, 1000.0, 250.0])
+    annual_return = np.array([0.07, 0.05, 0.04, 0.08, 0.06])
+    volatility = np.array([0.12, 0.12, 0.05, 0.18, 0.05])
+    months = np.array([36, 120, 60, 0, 12])
+
+    values = simulate_goal_values(current, contribution, annual_return, volatility, months, num_paths=500, random_seed=3)
+
+    brownian = np.cumsum(np.random.default_rng(3).standard_normal((500, 120)), axis=1)
+    for g in range(len(current)):
+        if months[g] == 0:
+            assert np.allclose(values[:, g], current[g])
+            continue
+        drift = np.log1p(annual_return[g] / 12) - 0.5 * volatility[g] ** 2 / 12
+        growth = np.exp(drift * np.arange(1, months[g] + 1) + volatility[g] * np.sqrt(1 / 12) * brownian[:, :months[g]])
+        expected = growth[:, -1] * (current[g] + contribution[g] * (1.0 / growth).sum(axis=1))
+        assert np.allclose(values[:, g], expected)
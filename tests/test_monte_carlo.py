@@ -0,0 +1,579 @@
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from monte_carlo import (
+    generate_paths, gbm_period_returns, correlation_factor, draw_shocks, stationary_bootstrap_returns,
+    ou_period_returns, path_quantiles, drawdown_statistics, MonteCarloSimulator, SimulationConfig,
+    SimulationMethod, DistributionType
+)
+from price_history import get_price_store
+from analytics import calculate_retirement_projection
+
+
+def _loop_paths(initial, returns, contribution):
+    paths = np.zeros((returns.shape[0], returns.shape[1] + 1))
+    paths[:, 0] = initial
+    for t in range(1, returns.shape[1] + 1):
+        paths[:, t] = paths[:, t - 1] * (1 + returns[:, t - 1]) + contribution[..., t - 1]
+    return paths
+
+
+def test_path_kernel_matches_recursion():
+    rng = np.random.default_rng(0)
+    returns = gbm_period_returns(rng.standard_normal((50, 120)), 0.07, 0.18, 1 / 12)
+    schedule = np.linspace(500, -800, 120)
+
+    for contributions in [None, 250.0, schedule]:
+        expected = _loop_paths(10000.0, returns, np.broadcast_to(0.0 if contributions is None else contributions, (50, 120)))
+        assert np.allclose(generate_paths(10000.0, returns.copy(), contributions), expected, rtol=1e-10)
+
+
+def test_simulator_paths_with_contributions():
+    simulator = MonteCarloSimulator(SimulationConfig(num_simulations=1000, years=5))
+    result = simulator.simulate_portfolio(
+        [{'value': 100000, 'annual_return': 0.0, 'volatility': 0.0001}],
+        contributions={'monthly_amount': 1000}
+    )
+
+    assert abs(result['scenarios']['median'] - 160000) < 1000
+
+
+def test_retirement_projection_at_10k_paths():
+    # Wall time is tracked by scripts/benchmark_monte_carlo_kernels.py
+    portfolio = pd.DataFrame([
+        {'Symbol': 'SPY', 'Value ($)': 100000, 'Asset Type': 'ETF'},
+        {'Symbol': 'BND', 'Value ($)': 50000, 'Asset Type': 'Bond'},
+    ])
+
+    result = calculate_retirement_projection(portfolio, years=30, monthly_contribution=500, num_simulations=10000)
+
+    assert len(result['chart']['p50']) == 30
+    assert result['results']['p10_final'] < result['results']['p50_final'] < result['results']['p90_final']
+
+
+def test_quantile_sketch_relative_accuracy():
+    from monte_carlo_streaming import QuantileSketch
+
+    rng = np.random.default_rng(5)
+    values = np.exp(rng.normal(0, 1, (20000, 3))) * 1000
+    sketch = QuantileSketch(3, scale=1000, relative_accuracy=0.01)
+    for block in np.array_split(values, 7):
+        sketch.update(block)
+
+    estimated = sketch.quantiles([0.05, 0.5, 0.95])
+    exact = np.quantile(values, [0.05, 0.5, 0.95], axis=0)
+    assert np.all(np.abs(estimated / exact - 1) < 0.02)
+
+
+def test_streaming_matches_in_memory_results():
+    holdings = [{'value': 100000, 'annual_return': 0.07, 'volatility': 0.15}]
+    results = {
+        streaming: MonteCarloSimulator(
+            SimulationConfig(num_simulations=5000, years=10, streaming=streaming, block_size=700)
+        ).simulate_portfolio(holdings)
+        for streaming in [False, True]
+    }
+    exact, streamed = results[False], results[True]
+
+    assert streamed['metadata']['streaming'] is True
+    for key, value in exact['percentiles'].items():
+        assert abs(streamed['percentiles'][key] / value - 1) < 0.01
+    assert np.isclose(streamed['statistics']['mean_final_value'], exact['statistics']['mean_final_value'])
+    assert streamed['probabilities'] == exact['probabilities']
+    assert np.isclose(streamed['risk_metrics']['mean_max_drawdown'], exact['risk_metrics']['mean_max_drawdown'])
+    assert streamed['time_series']['num_samples'] == 100
+    assert len(streamed['time_series']['percentile_bands']['p50']) == 121
+
+
+def test_results_are_identical_across_worker_counts():
+    holdings = [{'value': 250000, 'annual_return': 0.06, 'volatility': 0.2}]
+
+    for streaming in [False, True]:
+        runs = [
+            MonteCarloSimulator(
+                SimulationConfig(num_simulations=3000, years=5, block_size=500, workers=workers, streaming=streaming)
+            ).simulate_portfolio(holdings, contributions={'monthly_amount': 100})
+            for workers in [1, 3]
+        ]
+        for key in ['scenarios', 'percentiles', 'statistics', 'probabilities', 'risk_metrics', 'time_series']:
+            assert runs[0][key] == runs[1][key]
+
+
+def test_simulator_does_not_touch_global_random_state():
+    np.random.seed(123)
+    expected = np.random.random()
+    np.random.seed(123)
+    MonteCarloSimulator(SimulationConfig(num_simulations=200, years=1)).simulate_portfolio(
+        [{'value': 1000, 'annual_return': 0.05, 'volatility': 0.1}]
+    )
+    assert np.random.random() == expected
+
+
+def test_variance_reduction_shocks():
+    from monte_carlo import draw_shocks, brownian_bridge_increments
+
+    antithetic = draw_shocks(np.random.default_rng(0), 100, 12, 'antithetic')
+    assert np.allclose(antithetic[:50], -antithetic[50:])
+
+    sobol = draw_shocks(np.random.default_rng(0), 4096, 12, 'sobol')
+    assert abs(sobol.mean()) < 0.01
+    assert np.allclose(np.cov(sobol.T), np.eye(12), atol=0.06)
+
+    # The bridge's first dimension alone sets the terminal value
+    z = np.zeros((1, 12))
+    z[0, 0] = 1.0
+    assert np.isclose(brownian_bridge_increments(z).sum(), np.sqrt(12))
+
+
+def test_adaptive_run_stops_at_target_precision():
+    config = SimulationConfig(
+        num_simulations=100000, years=10, block_size=1024, streaming=False,
+        variance_reduction='sobol', target_relative_error=0.003
+    )
+    result = MonteCarloSimulator(config).simulate_portfolio(
+        [{'value': 100000, 'annual_return': 0.07, 'volatility': 0.15}], confidence_levels=[0.1, 0.5, 0.9]
+    )
+    metadata = result['metadata']
+
+    assert metadata['precision']['converged'] is True
+    assert metadata['precision']['max_relative_error'] <= 0.003
+    assert metadata['paths_used'] < 100000
+    assert metadata['variance_reduction'] == 'sobol'
+
+
+def test_multi_asset_correlation_and_rebalancing():
+    holdings = [
+        {'ticker': 'AAA', 'value': 60000, 'annual_return': 0.08, 'volatility': 0.20},
+        {'ticker': 'BBB', 'value': 40000, 'annual_return': 0.04, 'volatility': 0.10}
+    ]
+    correlation = [[1.0, 0.9], [0.9, 1.0]]
+
+    stats = MonteCarloSimulator()._calculate_portfolio_stats(holdings, correlation)
+    assert np.isclose(stats.volatility, np.sqrt(0.12 ** 2 + 0.04 ** 2 + 2 * 0.9 * 0.12 * 0.04))
+
+    log_vols = []
+    for rho in (0.9, -0.9):
+        config = SimulationConfig(num_simulations=4000, years=1, multi_asset=True, rebalance_months=1, random_seed=3)
+        result = MonteCarloSimulator(config).simulate_portfolio(holdings, correlation_matrix=[[1.0, rho], [rho, 1.0]])
+        paths = np.array(result['time_series']['sample_paths'])
+        log_vols.append(np.diff(np.log(paths), axis=1).std() * np.sqrt(12))
+        assert result['metadata']['correlation_source'] == 'supplied'
+
+    assert abs(log_vols[0] - np.sqrt(0.12 ** 2 + 0.04 ** 2 + 2 * 0.9 * 0.12 * 0.04)) < 0.01
+    assert abs(log_vols[1] - np.sqrt(0.12 ** 2 + 0.04 ** 2 - 2 * 0.9 * 0.12 * 0.04)) < 0.01
+
+
+def test_correlation_factor_repairs_indefinite_matrix():
+    correlation = np.array([[1.0, 0.9, -0.9], [0.9, 1.0, 0.9], [-0.9, 0.9, 1.0]])
+    factor = correlation_factor(correlation)
+    implied = factor @ factor.T
+
+    assert np.allclose(np.diag(implied), 1.0)
+    assert np.linalg.eigvalsh(implied).min() > -1e-10
+
+
+def test_return_model_kernels():
+    rng = np.random.default_rng(5)
+
+    history = np.arange(24) / 100.0
+    sample = stationary_bootstrap_returns(history, rng, 2000, 120, 6.0)
+    steps = np.round(np.diff(sample, axis=1) * 100) % 24
+    assert np.isin(sample, history).all()
+    assert abs(1 / np.mean(steps != 1) - 6.0) < 0.3
+
+    t_shocks = draw_shocks(rng, 20000, 120, degrees_of_freedom=5.0)
+    assert abs(t_shocks.std() - 1.0) < 0.02
+    assert ((t_shocks - t_shocks.mean()) ** 4).mean() / t_shocks.var() ** 2 > 5.0
+
+    # Exact OU sampling: the log deviation has stationary-limit variance sigma^2 / (2 speed)
+    returns = ou_period_returns(rng.standard_normal((20000, 240)), 0.0, 0.2, 1.0, 1 / 12)
+    deviation = np.log1p(returns).sum(axis=1)
+    expected = 0.2 ** 2 / 2 * (1 - np.exp(-2 * 20))
+    assert abs(deviation.var() / expected - 1) < 0.05
+
+
+def test_simulate_portfolio_uses_requested_method():
+    dates = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=6 * 252)
+    prices = 100 * np.exp(np.cumsum(np.random.default_rng(9).normal(0.0003, 0.01, len(dates))))
+    get_price_store().put('BOOT', pd.Series(prices, index=dates))
+
+    holdings = [{'ticker': 'BOOT', 'value': 100000, 'annual_return': 0.07, 'volatility': 0.15}]
+    results = {}
+    for method, distribution in [
+        (SimulationMethod.GEOMETRIC_BROWNIAN, DistributionType.NORMAL),
+        (SimulationMethod.GEOMETRIC_BROWNIAN, DistributionType.STUDENT_T),
+        (SimulationMethod.MEAN_REVERSION, DistributionType.NORMAL),
+        (SimulationMethod.HISTORICAL_BOOTSTRAP, DistributionType.NORMAL)
+    ]:
+        config = SimulationConfig(num_simulations=2000, years=10, method=method, distribution=distribution)
+        results[(method, distribution)] = MonteCarloSimulator(config).simulate_portfolio(holdings)
+
+    gbm = results[(SimulationMethod.GEOMETRIC_BROWNIAN, DistributionType.NORMAL)]['statistics']
+    ou = results[(SimulationMethod.MEAN_REVERSION, DistributionType.NORMAL)]['statistics']
+    bootstrap = results[(SimulationMethod.HISTORICAL_BOOTSTRAP, DistributionType.NORMAL)]
+
+    assert ou['std_final_value'] < 0.6 * gbm['std_final_value']
+    assert bootstrap['metadata']['history_months'] >= 60
+    assert len({round(r['scenarios']['median']) for r in results.values()}) == 4
+
+
+def test_result_cache_is_content_addressed_and_bounded(tmp_path):
+    from monte_carlo_api import SimulationRequest, ResultCache, request_cache_key
+
+    holdings = [{'ticker': 'AAA', 'value': 60000}, {'ticker': 'BBB', 'value': 40000}]
+    request = SimulationRequest(holdings=holdings, num_simulations=500)
+
+    assert request_cache_key(request) == request_cache_key(SimulationRequest(holdings=holdings[::-1], num_simulations=500, use_cache=False))
+    assert request_cache_key(request) != request_cache_key(SimulationRequest(holdings=holdings, num_simulations=500, random_seed=7))
+    assert request_cache_key(SimulationRequest(holdings=holdings, random_seed=None)) is None
+
+    cache = ResultCache(max_bytes=10_000, directory=str(tmp_path))
+    result = {'metadata': {'seed': np.int64(1)}, 'paths': np.arange(50.0)}
+    cache.put('a', result)
+    cache.put('b', {'noise': np.random.default_rng(0).random(2000)})
+
+    assert cache.stats()['bytes'] <= 10_000
+    assert ResultCache(directory=str(tmp_path)).get('a') == {'metadata': {'seed': 1}, 'paths': list(np.arange(50.0))}
+
+
+def test_simulation_jobs_report_progress_and_cancel():
+    from monte_carlo_api import SimulationRequest, SimulationJobManager
+
+    manager = SimulationJobManager(max_workers=1, retention_seconds=60)
+    holdings = [{'ticker': 'AAA', 'value': 100000}]
+
+    done = manager.submit(SimulationRequest(holdings=holdings, num_simulations=6000, years=5, use_cache=False))
+    slow = manager.submit(SimulationRequest(holdings=holdings, num_simulations=100000, years=50, use_cache=False))
+    manager.cancel(slow['job_id'])
+
+    deadline = time.time() + 30
+    while manager.status(done['job_id'])['status'] not in ('completed', 'failed') and time.time() < deadline:
+        time.sleep(0.05)
+
+    status = manager.status(done['job_id'])
+    assert status['status'] == 'completed'
+    assert status['completed_chunks'] == status['total_chunks'] == 3
+    assert manager.result(done['job_id'])['result']['metadata']['paths_used'] == 6000
+    assert manager.status(slow['job_id'])['status'] == 'cancelled'
+
+    manager.retention_seconds = 0
+    assert manager.status(done['job_id']) is None
+
+
+def test_path_statistics_match_reference():
+    rng = np.random.default_rng(11)
+    paths = generate_paths(1000.0, gbm_period_returns(rng.standard_normal((501, 60)), 0.05, 0.25, 1 / 12))
+    levels = [0.01, 0.05, 0.25, 0.5, 0.95]
+
+    assert np.allclose(path_quantiles(paths, levels), np.percentile(paths, np.array(levels) * 100, axis=0))
+
+    stats = drawdown_statistics(paths)
+    for path, drawdown, longest in zip(paths, stats['max_drawdown'], stats['longest_underwater']):
+        running_max = np.maximum.accumulate(path)
+        assert np.isclose(drawdown, np.min((path - running_max) / running_max))
+        runs = ''.join('1' if below else '0' for below in path < running_max).split('0')
+        assert longest == max(len(run) for run in runs)
+
+
+def test_analytic_forecast_matches_simulation():
+    from monte_carlo import analytic_forecast, quick_simulate
+
+    analytic = analytic_forecast(100000, 0.08, 0.18, 10)
+    config = SimulationConfig(num_simulations=100000, years=10, streaming=False)
+    simulated = MonteCarloSimulator(config).simulate_portfolio([{'value': 100000, 'annual_return': 0.08, 'volatility': 0.18}])
+
+    for level in ('p5', 'p50', 'p95'):
+        assert abs(analytic['percentiles'][level] / simulated['percentiles'][level] - 1) < 0.01
+    for key in ('prob_gain', 'prob_double'):
+        assert abs(analytic['probabilities'][key] - simulated['probabilities'][key]) < 0.01
+    assert abs(analytic['statistics']['mean_final_value'] / simulated['statistics']['mean_final_value'] - 1) < 0.01
+    assert abs(analytic['risk_metrics']['conditional_var_95'] - simulated['risk_metrics']['conditional_var_95']) < 0.01
+
+    assert quick_simulate(100000)['metadata']['engine'] == 'analytic'
+    assert 'engine' not in quick_simulate(100000, num_simulations=200, monthly_contribution=500)['metadata']
+
+
+def test_scenario_comparison_uses_common_random_numbers():
+    from monte_carlo import simulate_scenarios
+
+    def scenario(annual_return, years=10):
+        return {
+            'config': SimulationConfig(num_simulations=2000, years=years),
+            'holdings': [{'value': 100000, 'annual_return': annual_return, 'volatility': 0.18}]
+        }
+
+    outcome = simulate_scenarios([scenario(0.07), scenario(0.08), scenario(0.08, years=5)], random_seed=1)
+    plan_b, shorter = outcome['differences']
+
+    assert plan_b['mean_difference'] > 0
+    assert plan_b['prob_outperform'] > 0.99
+    assert plan_b['variance_reduction_factor'] > 100
+    assert len(outcome['scenarios'][2]['time_series']['percentile_bands']['p50']) == 61
+
+    repeat = simulate_scenarios([scenario(0.07), scenario(0.08)], random_seed=1)
+    assert repeat['differences'][0]['mean_difference'] == plan_b['mean_difference']
+    assert repeat['metadata']['block_size'] == 2000
+
+    # Shared-draw settings come from the scenarios' configs and must agree
+    def configured(annual_return, **settings):
+        return {**scenario(annual_return), 'config': SimulationConfig(num_simulations=2000, **settings)}
+
+    antithetic = simulate_scenarios(
+        [configured(0.07, variance_reduction='antithetic', block_size=500), configured(0.08, variance_reduction='antithetic', block_size=500)],
+        random_seed=1
+    )
+    assert antithetic['metadata']['variance_reduction'] == 'antithetic' and antithetic['metadata']['block_size'] == 500
+    assert antithetic['differences'][0]['mean_difference'] != plan_b['mean_difference']
+
+    with pytest.raises(ValueError, match='variance_reduction'):
+        simulate_scenarios([configured(0.07, variance_reduction='antithetic'), scenario(0.08)])
+    with pytest.raises(ValueError, match='block_size'):
+        simulate_scenarios([configured(0.07, block_size=500), scenario(0.08)])
+    with pytest.raises(ValueError, match='target_relative_error'):
+        simulate_scenarios([configured(0.07, target_relative_error=0.01), configured(0.08, target_relative_error=0.01)])
+
+    import asyncio
+    from fastapi import HTTPException
+    from monte_carlo_api import compare_scenarios, SimulationRequest
+
+    holdings = [{'ticker': 'SPY', 'value': 100000, 'annual_return': 0.07, 'volatility': 0.18}]
+    requests = [
+        SimulationRequest(holdings=holdings, variance_reduction='antithetic', use_cache=False),
+        SimulationRequest(holdings=holdings, use_cache=False)
+    ]
+    with pytest.raises(HTTPException) as rejected:
+        asyncio.run(compare_scenarios(requests, baseline=1))
+    assert rejected.value.status_code == 422
+
+
+def test_cash_flow_schedule_and_absorbing_depletion():
+    from monte_carlo import cash_flow_schedule, apply_depletion
+
+    schedule = cash_flow_schedule(
+        36, monthly_amount=100, annual_increase=0.10, retirement_month=25,
+        monthly_withdrawal=200, inflation_rate=0.05, events=[{'month': 6, 'amount': -1000}]
+    )
+    assert schedule[0] == 100 and np.isclose(schedule[12], 110)
+    assert schedule[5] == 100 - 1000
+    assert np.isclose(schedule[24], -200 * 1.05 ** 2)
+
+    rng = np.random.default_rng(3)
+    returns = gbm_period_returns(rng.standard_normal((300, 36)), 0.02, 0.35, 1 / 12)
+    paths = apply_depletion(generate_paths(3000.0, returns.copy(), schedule))
+
+    expected = np.zeros_like(paths)
+    expected[:, 0] = 3000.0
+    for t in range(1, 37):
+        expected[:, t] = np.maximum(expected[:, t - 1] * (1 + returns[:, t - 1]) + schedule[t - 1], 0.0)
+        expected[expected[:, t - 1] <= 0, t] = 0.0
+    depleted = (expected <= 0).any(axis=1)
+    assert depleted.any()
+    assert np.allclose(paths[~depleted], expected[~depleted])
+    assert ((paths <= 0) == (expected <= 0)).all()
+
+    config = SimulationConfig(num_simulations=2000, years=20, streaming=False)
+    contributions = {'monthly_amount': 0, 'retirement_year': 0, 'monthly_withdrawal': 700, 'inflation_rate': 0.03}
+    result = MonteCarloSimulator(config).simulate_portfolio(
+        [{'value': 100000, 'annual_return': 0.05, 'volatility': 0.15}], contributions=contributions
+    )
+    curve = result['depletion']['probability_by_year']
+    assert len(curve) == 20 and np.all(np.diff(curve) >= 0) and curve[-1] > 0.2
+    assert result['metadata']['total_withdrawals'] > 20 * 12 * 700
+
+    streamed = MonteCarloSimulator(SimulationConfig(num_simulations=2000, years=20, streaming=True)).simulate_portfolio(
+        [{'value': 100000, 'annual_return': 0.05, 'volatility': 0.15}], contributions=contributions
+    )
+    assert streamed['depletion']['probability_by_year'] == curve
+
+
+def test_cash_flow_solver_meets_target_on_shared_draws():
+    from monte_carlo import solve_cash_flow, critical_cash_flows, cash_flow_schedule, apply_depletion
+
+    rng = np.random.default_rng(5)
+    returns = gbm_period_returns(rng.standard_normal((400, 120)), 0.05, 0.2, 1 / 12)
+    base = cash_flow_schedule(120, events=[{'month': 30, 'amount': -5000}])
+    unit = cash_flow_schedule(120, retirement_month=1, monthly_withdrawal=1.0, inflation_rate=0.02)
+    critical, _, _ = critical_cash_flows(50000.0, returns.copy(), base, unit)
+    for amount in (200.0, 500.0, 800.0):
+        survived = apply_depletion(generate_paths(50000.0, returns.copy(), base + amount * unit))[:, -1] > 0
+        assert np.array_equal(survived, critical > amount)
+
+    holdings = [{'value': 500000, 'annual_return': 0.06, 'volatility': 0.15}]
+    config = SimulationConfig(num_simulations=4000, years=25)
+    solved = solve_cash_flow(holdings, 'withdrawal', 0.9, config, {'monthly_amount': 0, 'inflation_rate': 0.02})
+    assert solved['achievable'] and solved['success_probability'] >= 0.9
+    assert solved['amounts_by_success']['95%'] < solved['monthly_amount'] < solved['amounts_by_success']['50%']
+
+    contributions = {
+        'monthly_amount': 0, 'retirement_year': 0, 'inflation_rate': 0.02,
+        'monthly_withdrawal': solved['monthly_amount']
+    }
+    check = MonteCarloSimulator(SimulationConfig(num_simulations=4000, years=25, streaming=False)).simulate_portfolio(
+        holdings, contributions=contributions
+    )
+    assert abs(1 - check['depletion']['probability_final'] - 0.9) < 0.002
+
+    saving = solve_cash_flow(
+        holdings, 'contribution', 0.9, config,
+        {'monthly_amount': 0, 'retirement_year': 10, 'monthly_withdrawal': 4000}, target_final_value=250000
+    )
+    assert saving['achievable'] and saving['success_probability'] >= 0.9
+    assert saving['final_value_percentiles']['p50'] > 250000
+
+
+def test_time_series_output_is_downsampled_and_encoded():
+    import base64
+    import json
+    from monte_carlo import lttb_indices, output_steps
+
+    assert output_steps(121, 'yearly').tolist() == list(range(0, 121, 12))
+    assert output_steps(8, 'quarterly').tolist() == [0, 3, 6, 7]
+
+    def lttb_loop(y, n_out):
+        every = (len(y) - 2) / (n_out - 2)
+        kept, a = [0], 0
+        for i in range(n_out - 2):
+            start, stop = int(i * every) + 1, int((i + 1) * every) + 1
+            following = np.arange(stop, min(int((i + 2) * every) + 1, len(y)))
+            cx, cy = following.mean(), y[following].mean()
+            areas = [abs((a - cx) * (y[j] - y[a]) - (a - j) * (cy - y[a])) for j in range(start, stop)]
+            a = start + int(np.argmax(areas))
+            kept.append(a)
+        return kept + [len(y) - 1]
+
+    walks = np.cumsum(np.random.default_rng(2).standard_normal((5, 361)), axis=1)
+    kept = lttb_indices(walks, 40)
+    assert kept.shape == (5, 40)
+    assert all(kept[i].tolist() == lttb_loop(walks[i], 40) for i in range(5))
+
+    holdings = [{'value': 100000, 'annual_return': 0.07, 'volatility': 0.18}]
+    full = MonteCarloSimulator(SimulationConfig(
+        num_simulations=2000, years=30, streaming=False, time_series_resolution='monthly'
+    )).simulate_portfolio(holdings)
+    compact = MonteCarloSimulator(SimulationConfig(
+        num_simulations=2000, years=30, streaming=False, time_series_resolution='yearly',
+        sample_path_points=40, time_series_digits=7
+    )).simulate_portfolio(holdings)
+    binary = MonteCarloSimulator(SimulationConfig(
+        num_simulations=2000, years=30, streaming=True, time_series_resolution='quarterly', time_series_encoding='binary'
+    )).simulate_portfolio(holdings)
+
+    assert len(json.dumps(compact['time_series'])) * 10 < len(json.dumps(full['time_series']))
+    assert compact['time_series']['months'] == list(range(0, 361, 12))
+    assert np.allclose(compact['time_series']['percentile_bands']['p50'], full['time_series']['percentile_bands']['p50'][::12], rtol=1e-6)
+    months = np.array(compact['time_series']['sample_path_months'])
+    sampled = np.take_along_axis(np.array(full['time_series']['sample_paths']), months, axis=1)
+    assert np.allclose(compact['time_series']['sample_paths'], sampled, rtol=1e-6)
+
+    band = binary['time_series']['percentile_bands']['p95']
+    assert binary['time_series']['encoding'] == 'binary' and band['shape'] == [121]
+    assert len(np.frombuffer(base64.b64decode(band['data']), '<f4')) == 121
+
+    # By default long horizons come back yearly and short ones monthly
+    default = MonteCarloSimulator(SimulationConfig(num_simulations=500, years=30)).simulate_portfolio(holdings)
+    assert default['time_series']['months'] == list(range(0, 361, 12))
+    assert SimulationConfig(years=15).resolved_time_series_resolution() == 'quarterly'
+    assert 'months' not in MonteCarloSimulator(SimulationConfig(num_simulations=500, years=10)).simulate_portfolio(holdings)['time_series']
+
+
+def test_path_dependent_kernels_match_reference_loops():
+    import monte_carlo_kernels as kernels
+
+    rng = np.random.default_rng(8)
+    returns = gbm_period_returns(rng.standard_normal((40, 120)), 0.04, 0.3, 1 / 12)
+    asset_returns = gbm_period_returns(rng.standard_normal((40, 120 * 3)), 0.06, 0.25, 1 / 12).reshape(40, 120, 3)
+
+    # Without Numba the loop kernels are plain Python - the reference for both backends
+    guard_args = (returns, 100000.0, 600.0, 0.02, 0.2, 0.2, 0.1)
+    paths, paid = np.empty((40, 121)), np.empty((40, 120))
+    kernels._guardrail_loop(*guard_args, paths, paid)
+    guarded = kernels.guardrail_withdrawals(*guard_args, backend='numpy')
+    assert np.allclose(guarded['paths'], paths) and np.allclose(guarded['withdrawals'], paid)
+    assert (guarded['paths'] >= 0).all() and len(np.unique(np.round(paid[:, 12], 6))) > 1
+
+    weights = np.array([0.6, 0.3, 0.1])
+    paths, counts = np.empty((40, 121)), np.zeros(40, dtype=np.int64)
+    kernels._rebalance_loop(asset_returns, weights * 1000, weights, 0.05, paths, counts)
+    rebalanced = kernels.threshold_rebalance(asset_returns, weights * 1000, weights, 0.05, backend='numpy')
+    assert np.allclose(rebalanced['paths'], paths) and np.array_equal(rebalanced['rebalances'], counts)
+    assert counts.sum() > 0
+
+    for cooldown in (0, 6):
+        paths, triggers = np.empty((40, 121)), np.zeros(40, dtype=np.int64)
+        kernels._stop_loss_loop(returns, 1000.0, 0.15, 0.002, cooldown, paths, triggers)
+        stopped = kernels.stop_loss_paths(returns, 1000.0, 0.15, 0.002, cooldown, backend='numpy')
+        assert np.allclose(stopped['paths'], paths) and np.array_equal(stopped['triggers'], triggers)
+        assert triggers.sum() > 0
+
+    shocks = rng.standard_normal((40, 120))
+    deviation = np.empty_like(shocks)
+    kernels._ou_loop(shocks, 0.9, 0.05, deviation)
+    assert np.allclose(kernels.ou_deviation(shocks, 0.9, 0.05, backend='numpy'), deviation)
+
+    if not kernels.NUMBA_AVAILABLE:
+        with pytest.raises(ValueError):
+            kernels.use_numba('numba')
+
+
+def test_numba_kernels_match_numpy_kernels():
+    pytest.importorskip('numba')
+    import monte_carlo_kernels as kernels
+
+    rng = np.random.default_rng(9)
+    returns = gbm_period_returns(rng.standard_normal((60, 120)), 0.04, 0.3, 1 / 12)
+    asset_returns = gbm_period_returns(rng.standard_normal((60, 120 * 3)), 0.06, 0.25, 1 / 12).reshape(60, 120, 3)
+    weights = np.array([0.6, 0.3, 0.1])
+    shocks = rng.standard_normal((60, 120))
+
+    for backend_results in [
+        lambda backend: kernels.guardrail_withdrawals(returns, 100000.0, 600.0, 0.02, 0.2, 0.2, 0.1, backend=backend),
+        lambda backend: kernels.threshold_rebalance(asset_returns, weights * 1000, weights, 0.05, backend=backend),
+        lambda backend: kernels.stop_loss_paths(returns, 1000.0, 0.15, 0.002, 6, backend=backend),
+        lambda backend: {'deviation': kernels.ou_deviation(shocks, 0.9, 0.05, backend=backend)}
+    ]:
+        compiled, vectorized = backend_results('numba'), backend_results('numpy')
+        assert compiled.keys() == vectorized.keys()
+        for key in compiled:
+            assert np.allclose(compiled[key], vectorized[key]), key
+
+
+def test_regime_switching_fit_sampling_and_simulation():
+    from monte_carlo_regimes import fit_regime_model, sample_regimes
+
+    # Synthetic two-asset process: a calm bull regime and a volatile, correlated bear regime
+    rng = np.random.default_rng(21)
+    transition = np.array([[0.85, 0.15], [0.05, 0.95]])
+    means = np.array([[-0.02, -0.015], [0.012, 0.008]])
+    covariances = np.array([[[0.0036, 0.0027], [0.0027, 0.0036]], [[0.0009, 0.0002], [0.0002, 0.0009]]])
+    states = sample_regimes(rng.random((1, 600)), transition, np.array([0.25, 0.75]))[0]
+    returns = np.array([rng.multivariate_normal(means[s], covariances[s]) for s in states])
+
+    fit = fit_regime_model(returns, np.array([0.5, 0.5]))
+    assert np.allclose(fit['transition'], transition, atol=0.06)
+    assert np.allclose(fit['means'], means, atol=0.006)
+    assert np.allclose(np.sqrt(np.diagonal(fit['covariances'], axis1=1, axis2=2)), np.sqrt(np.diagonal(covariances, axis1=1, axis2=2)), rtol=0.2)
+
+    # One inverse-CDF step per period reproduces the transition frequencies
+    three = np.array([[0.7, 0.2, 0.1], [0.1, 0.8, 0.1], [0.05, 0.15, 0.8]])
+    paths = sample_regimes(rng.random((4000, 120)), three, np.full(3, 1 / 3))
+    counts = np.zeros((3, 3))
+    np.add.at(counts, (paths[:, :-1].ravel(), paths[:, 1:].ravel()), 1)
+    assert np.allclose(counts / counts.sum(axis=1, keepdims=True), three, atol=0.01)
+
+    dates = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=10 * 252)
+    daily = np.where(np.arange(len(dates)) % 500 < 120, rng.normal(-0.001, 0.025, len(dates)), rng.normal(0.0006, 0.007, len(dates)))
+    get_price_store().put('REGM', pd.Series(100 * np.exp(np.cumsum(daily)), index=dates))
+    holdings = [{'ticker': 'REGM', 'value': 100000, 'annual_return': 0.07, 'volatility': 0.15}]
+
+    config = SimulationConfig(num_simulations=20000, years=30, method=SimulationMethod.REGIME_SWITCHING)
+    result = MonteCarloSimulator(config).simulate_portfolio(holdings)
+
+    regimes = result['metadata']['regime_model']
+    assert regimes['labels'] == ['bear', 'bull']
+    assert regimes['annual_volatilities'][0] > 1.5 * regimes['annual_volatilities'][1]
+    assert regimes['annual_returns'][0] < 0 < regimes['annual_returns'][1]
+    assert result['metadata']['num_simulations'] == 20000
+
+    with pytest.raises(ValueError):
+        SimulationConfig(method=SimulationMethod.REGIME_SWITCHING, regimes=5).validate()
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+from backend.analytics import suggest_rebalancing, generate_rebalancing_trades
+
+
+def _holdings():
+    return pd.DataFrame([
+        {'Symbol': 'SPY', 'Quantity': 100, 'Value ($)': 50000.0, 'Assets (%)': 50.0, 'NFS G/L ($)': 10000.0},
+        {'Symbol': 'AGG', 'Quantity': 300, 'Value ($)': 30000.0, 'Assets (%)': 30.0, 'NFS G/L ($)': -2000.0},
+        {'Symbol': 'GLD', 'Quantity': 100, 'Value ($)': 20000.0, 'Assets (%)': 20.0, 'NFS G/L ($)': 4000.0},
+    ])
+
+
+def test_suggest_rebalancing_output_unchanged():
+    suggestions = suggest_rebalancing(_holdings(), {'SPY': 40, 'AGG': 31, 'VXUS': 10})
+
+    assert [s['symbol'] for s in suggestions] == ['SPY', 'VXUS']
+    assert suggestions[1] == {'symbol': 'VXUS', 'action': 'BUY', 'current_weight': 0, 'target_weight': 10,
+                              'difference': 10, 'priority': 'HIGH'}
+    assert suggestions[0]['action'] == 'SELL' and suggestions[0]['difference'] == 10.0
+
+
+def test_trades_respect_bands_lots_and_cash():
+    result = generate_rebalancing_trades(
+        _holdings(), {'SPY': 40, 'AGG': 31, 'VXUS': 29},
+        prices={'VXUS': 60.0}, lot_size=1, tolerance_band=2.0
+    )
+    trades = {t['symbol']: t for t in result['trades']}
+
+    # AGG is inside its band; GLD is not in the model and is sold in full
+    assert 'AGG' not in trades
+    assert trades['GLD']['action'] == 'SELL' and trades['GLD']['shares'] == 100
+    assert trades['SPY']['action'] == 'SELL' and trades['SPY']['shares'] == 20
+    assert trades['VXUS']['action'] == 'BUY' and trades['VXUS']['shares'] == 483
+    assert result['summary']['ending_cash'] >= 0
+
+
+def test_tax_aware_caps_realized_gain():
+    result = generate_rebalancing_trades(
+        _holdings(), {'SPY': 30, 'AGG': 70}, tax_aware=True, max_realized_gain=1000.0
+    )
+    sells = [t for t in result['trades'] if t['action'] == 'SELL']
+
+    assert result['summary']['estimated_realized_gain'] <= 1000.0
+    assert sells[0]['estimated_realized_gain'] <= sells[-1]['estimated_realized_gain']
+
+
+def test_large_account_rebalance_exits_untargeted_and_reconciles_cash():
+    rng = np.random.default_rng(1)
+    n = 1000
+    holdings = pd.DataFrame({
+        'Symbol': [f'S{i}' for i in range(n)],
+        'Quantity': rng.integers(1, 500, n).astype(float),
+        'Value ($)': rng.uniform(1000, 50000, n),
+        'NFS G/L ($)': rng.normal(0, 2000, n),
+    })
+    weights = rng.dirichlet(np.ones(n)) * 100
+    targets = {f'S{i + 200}': w for i, w in enumerate(weights)}
+    prices = {f'S{i}': 50.0 for i in range(n, n + 200)}
+
+    result = generate_rebalancing_trades(holdings, targets, available_cash=10000, prices=prices, tax_aware=True)
+
+    summary = result['summary']
+    assert summary['num_trades'] > 0
+    # The 200 untargeted positions are exited in full; cash reconciles with the trades
+    sold = {t['symbol'] for t in result['trades'] if t['action'] == 'SELL'}
+    assert {f'S{i}' for i in range(200)} <= sold
+    assert np.isclose(summary['ending_cash'], summary['starting_cash'] + summary['total_sell_value'] - summary['total_buy_value'], atol=0.05)
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+from backend.returns_engine import build_valuation_series, calculate_period_returns, calculate_portfolio_returns, solve_irr
+from backend.price_history import PriceHistoryStore
+
+
+def _txn(ttype, date, symbol=None, qty=0.0, price=0.0, amount=0.0):
+    return {'transaction_type': ttype, 'transaction_date': date, 'symbol': symbol,
+            'quantity': qty, 'price': price, 'amount': amount or qty * price, 'fees': 0.0}
+
+
+def _prices(start, end, first, last):
+    days = pd.bdate_range(start, end)
+    return pd.DataFrame({'VTI': np.linspace(first, last, len(days))}, index=days)
+
+
+def test_solve_irr_batch():
+    amounts = np.array([[-100.0, 110.0, 0.0], [-100.0, 0.0, 121.0]])
+    times = np.array([[0.0, 1.0, 0.0], [0.0, 0.0, 2.0]])
+
+    irr = solve_irr(amounts, times)
+
+    assert np.allclose(irr, [0.10, 0.10], atol=1e-8)
+
+
+def test_twr_ignores_external_flows():
+    prices = _prices('2024-01-01', '2024-12-31', 100.0, 130.0)
+    mid = prices.index[len(prices) // 2]
+    mid_price = float(prices.loc[mid, 'VTI'])
+    transactions = [
+        _txn('deposit', '2024-01-01', amount=10000.0),
+        _txn('buy', '2024-01-01', 'VTI', 100, 100.0),
+        _txn('deposit', mid, amount=400 * mid_price),
+        _txn('buy', mid, 'VTI', 400, mid_price),
+    ]
+
+    valuation = build_valuation_series(transactions, prices, end_date='2024-12-31')
+    periods = calculate_period_returns(valuation)
+
+    assert periods['SI']['twr'] == round(130.0 / 100.0 - 1, 6)
+    assert periods['SI']['net_flows'] == round(10000.0 + 400 * mid_price, 2)
+    # Most money arrived after the first half, so the dollar-weighted return trails TWR
+    assert periods['SI']['mwr'] < periods['SI']['twr']
+
+
+def test_standard_periods_from_one_series():
+    prices = _prices('2021-01-04', '2024-06-28', 100.0, 200.0)
+    transactions = [_txn('buy', '2021-01-04', 'VTI', 10, 100.0)]
+
+    result = calculate_portfolio_returns(transactions, prices, as_of='2024-06-28')
+    periods = result['periods']
+
+    assert set(periods) == {'MTD', 'QTD', 'YTD', '1Y', '3Y', 'SI'}
+    assert periods['YTD']['start_date'] == '2024-01-01'
+    assert periods['QTD']['start_date'] == '2024-04-01'
+    assert periods['SI']['twr'] == 1.0
+    # Buy-and-hold: money-weighted equals time-weighted
+    for label in ['1Y', '3Y', 'SI']:
+        assert abs(periods[label]['mwr'] - periods[label]['twr']) < 1e-4
+    assert periods['MTD']['twr_annualized'] is None
+    assert result['valuation']['current_value'] == 2000.0
+
+    # A four-month history has no 1Y or 3Y period; calendar periods and SI still clip to inception
+    young = calculate_portfolio_returns(
+        [_txn('buy', '2024-02-12', 'VTI', 10, 100.0)], _prices('2024-02-12', '2024-06-28', 100.0, 120.0), as_of='2024-06-28'
+    )['periods']
+    assert set(young) == {'MTD', 'QTD', 'YTD', 'SI'}
+    assert young['YTD']['start_date'] == young['SI']['start_date'] == '2024-02-12'
+
+
+def test_transactions_after_as_of_are_ignored():
+    prices = _prices('2024-01-01', '2024-12-31', 100.0, 130.0)
+    held = [_txn('buy', '2023-12-29', 'VTI', 10, 100.0), _txn('buy', '2024-03-01', 'VTI', 5, 104.0)]
+    future = held + [_txn('sell', '2024-09-03', 'VTI', 12, 120.0), _txn('buy', '2024-08-31', 'VTI', 20, 118.0)]
+
+    expected = calculate_portfolio_returns(held, prices, as_of='2024-06-28')
+    actual = calculate_portfolio_returns(future, prices, as_of='2024-06-28')
+
+    for label in ('YTD', 'SI'):
+        assert actual['periods'][label]['twr'] == expected['periods'][label]['twr']
+        assert actual['periods'][label]['mwr'] == expected['periods'][label]['mwr']
+    assert actual['valuation']['current_value'] == expected['valuation']['current_value']
+
+
+def test_returns_follow_each_symbols_own_calendar():
+    store = PriceHistoryStore()
+    rng = np.random.default_rng(2)
+    every_day = pd.date_range('2020-02-01', '2020-03-31')
+    business_days = pd.bdate_range('2020-02-03', '2020-03-31')
+    crypto = pd.Series(100 * np.cumprod(1 + rng.normal(0, 0.03, len(every_day))), index=every_day)
+    equity = pd.Series(100 * np.cumprod(1 + rng.normal(0, 0.01, len(business_days))), index=business_days)
+    store.put('COIN-X', crypto)
+    store.put('EQ', equity)
+
+    returns = store.get_returns(['EQ', 'COIN-X'], '2020-02-01', '2020-03-31')
+
+    # Monday returns run from Friday's close instead of turning NaN on the weekend rows
+    expected = equity.pct_change().iloc[1:]
+    assert returns['EQ'].dropna().index.equals(expected.index)
+    assert np.allclose(returns['EQ'].dropna(), expected)
+    assert np.allclose(returns['COIN-X'], crypto.pct_change().iloc[1:])
+    assert np.isnan(returns.loc['2020-02-08', 'EQ'])  # weekend: no price
+    assert np.isclose((1 + returns['EQ'].fillna(0)).prod(), equity.iloc[-1] / equity.iloc[0])
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+from backend.risk_models import (
+    ledoit_wolf_covariance, covariance_to_correlation, cluster_order,
+    pack_upper_triangle, unpack_upper_triangle, build_correlation_report
+)
+
+
+def test_shrinkage_is_positive_definite_when_assets_exceed_observations():
+    rng = np.random.default_rng(1)
+    returns = rng.normal(0, 0.01, (60, 200))
+
+    covariance, shrinkage = ledoit_wolf_covariance(returns, block_size=64)
+
+    assert 0 < shrinkage <= 1
+    np.linalg.cholesky(covariance)
+    # Blockwise accumulation matches the one-shot estimate
+    assert np.allclose(covariance, ledoit_wolf_covariance(returns, block_size=1000)[0])
+
+
+def test_shrinkage_matches_reference_formula():
+    rng = np.random.default_rng(2)
+    X = rng.normal(0, 1, (40, 5))
+    n, p = X.shape
+    Xc = X - X.mean(axis=0)
+    S = Xc.T @ Xc / n
+    mu = np.trace(S) / p
+    d2 = np.sum((S - mu * np.eye(p)) ** 2) / p
+    b2 = sum(np.sum((np.outer(x, x) - S) ** 2) for x in Xc) / n ** 2 / p
+    delta = min(b2, d2) / d2
+
+    covariance, shrinkage = ledoit_wolf_covariance(X)
+
+    assert np.isclose(shrinkage, delta)
+    assert np.allclose(covariance, delta * mu * np.eye(p) + (1 - delta) * S)
+
+
+def test_packed_round_trip_and_cluster_order():
+    rng = np.random.default_rng(3)
+    factor = rng.normal(0, 1, (250, 2))
+    # Two blocks of assets driven by different factors, interleaved
+    returns = np.column_stack([factor[:, i % 2] + 0.3 * rng.normal(0, 1, 250) for i in range(8)])
+    covariance, shrinkage = ledoit_wolf_covariance(returns)
+    correlation = covariance_to_correlation(covariance)
+
+    decoded = unpack_upper_triangle(pack_upper_triangle(correlation))
+    assert decoded.dtype == np.float32
+    assert np.allclose(decoded, correlation, atol=1e-6)
+
+    order = cluster_order(correlation)
+    groups = [i % 2 for i in order]
+    assert groups[:4] == [groups[0]] * 4
+
+    report = build_correlation_report(covariance, [f'S{i}' for i in range(8)], shrinkage, cluster=True)
+    assert report['labels'] == [f'S{i}' for i in order]
+    assert len(report['values']) == 8
+
+
+def test_thousand_asset_universe():
+    rng = np.random.default_rng(4)
+    returns = pd.DataFrame(rng.normal(0, 0.01, (252, 1000)), columns=[f'S{i}' for i in range(1000)])
+
+    covariance, shrinkage = ledoit_wolf_covariance(returns.values)
+    report = build_correlation_report(covariance, returns.columns, shrinkage, cluster=True)
+
+    assert report['size'] == 1000
+    assert 'values' not in report
+    assert 0 <= shrinkage <= 1 and np.allclose(covariance, covariance.T)
+    assert sorted(report['order']) == list(range(1000))
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backend.stress_test import run_stress_tests, replay_windows, proxy_for, STRESS_SCENARIOS
+
+
+def _returns_panel():
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range('2006-01-02', '2023-12-29')
+    symbols = ['AAA', 'NEWCO', 'SPY', 'AGG', 'VXUS', 'VWO']
+    returns = pd.DataFrame(rng.normal(0.0003, 0.012, (len(dates), len(symbols))), index=dates, columns=symbols)
+    returns.loc[:'2015-06-30', 'NEWCO'] = np.nan
+    returns.loc[:'2011-01-28', 'VXUS'] = np.nan
+    return returns
+
+
+def test_replay_matches_buy_and_hold_and_uses_proxies():
+    returns = _returns_panel()
+    holdings = [
+        {'symbol': 'AAA', 'value': 50000, 'asset_type': 'Stock'},
+        {'symbol': 'NEWCO', 'value': 20000, 'asset_type': 'Stock', 'sector': 'Technology'},
+        {'symbol': 'BONDX', 'value': 20000, 'asset_type': 'Bond'},
+        {'symbol': 'INTLX', 'value': 10000, 'asset_type': 'International Equity'}
+    ]
+
+    result = run_stress_tests(holdings, ['global_financial_crisis', 'covid_crash'], returns=returns)
+    gfc, covid = result['scenarios']
+
+    sources = {h['symbol']: h['source'] for h in gfc['holdings']}
+    # Tech proxy QQQ is absent -> SPY; VXUS did not exist in 2008 -> VWO
+    assert sources == {'AAA': 'AAA', 'NEWCO': 'SPY', 'BONDX': 'AGG', 'INTLX': 'VWO'}
+    assert {h['symbol']: h['source'] for h in covid['holdings']}['NEWCO'] == 'NEWCO'
+    assert {h['symbol']: h['source'] for h in covid['holdings']}['INTLX'] == 'VXUS'
+    assert gfc['history_coverage'] == 0.5
+
+    window = returns.loc['2007-10-10':'2009-03-09', ['AAA', 'SPY', 'AGG', 'VWO']]
+    values = ((1 + window).cumprod() * [50000, 20000, 20000, 10000]).sum(axis=1)
+    assert np.isclose(gfc['portfolio_return'], values.iloc[-1] / 100000 - 1, atol=1e-6)
+    assert np.isclose(gfc['pnl'], values.iloc[-1] - 100000, atol=0.01)
+    assert np.isclose(gfc['max_drawdown'], (values / values.cummax().clip(lower=100000) - 1).min(), atol=1e-6)
+    assert np.isclose(sum(h['contribution'] for h in gfc['holdings']), gfc['portfolio_return'], atol=1e-5)
+    assert np.isclose(gfc['benchmark_return'], (1 + window['SPY']).prod() - 1, atol=1e-6)
+
+
+def test_scenarios_are_batched_into_one_product():
+    rng = np.random.default_rng(4)
+    blocks = [1 + np.cumsum(rng.normal(0, 0.01, (n, 3)), axis=0) for n in (5, 12, 1)]
+    weights = np.array([0.5, 0.3, 0.2])
+
+    paths = replay_windows(blocks, weights)
+    assert [len(p) for p in paths] == [5, 12, 1]
+    assert all(np.allclose(p, b @ weights) for p, b in zip(paths, blocks))
+
+    result = run_stress_tests([{'symbol': 'AAA', 'value': 1000}], returns=_returns_panel())
+    assert [s['scenario'] for s in result['scenarios']] == list(STRESS_SCENARIOS)
+    assert 'error' in result['scenarios'][0]  # the dot-com window predates the stored history
+    assert result['worst_scenario'] in STRESS_SCENARIOS
+
+
+def test_custom_windows_and_validation():
+    custom = {'name': 'flash', 'start': '2010-05-05', 'end': '2010-05-07'}
+    result = run_stress_tests([{'ticker': 'AAA', 'value': 1000}], [custom], returns=_returns_panel(), include_paths=True)
+    assert result['scenarios'][0]['trading_days'] == 2
+    assert len(result['scenarios'][0]['path']['values']) == 2
+
+    assert proxy_for('Fixed Income') == 'AGG'
+    assert proxy_for('Stock', 'Real Estate') == 'VNQ'
+    assert proxy_for(None, None) == 'SPY'
+
+    with pytest.raises(ValueError):
+        run_stress_tests([{'symbol': 'AAA', 'value': 1000}], ['not_a_crisis'], returns=_returns_panel())
+    with pytest.raises(ValueError):
+        run_stress_tests([{'symbol': 'AAA', 'value': 0}], returns=_returns_panel())
+
+
+def test_weekend_rows_do_not_push_equities_onto_proxies():
+    returns = _returns_panel()
+    calendar = returns.index.union(pd.date_range('2019-01-01', '2023-12-31'))
+    returns = returns.reindex(calendar)
+    returns['BTC'] = np.random.default_rng(5).normal(0.001, 0.04, len(calendar))
+
+    # The window's first return row is Saturday 2020-02-22, where only BTC trades
+    custom = {'name': 'weekend_open', 'start': '2020-02-21', 'end': '2020-03-23'}
+    holdings = [{'symbol': 'AAA', 'value': 60000, 'asset_type': 'Stock'}, {'symbol': 'BTC', 'value': 40000, 'asset_type': 'Crypto'}]
+    scenario = run_stress_tests(holdings, [custom], returns=returns)['scenarios'][0]
+
+    assert {h['symbol']: h['source'] for h in scenario['holdings']} == {'AAA': 'AAA', 'BTC': 'BTC'}
+    window = returns.loc['2020-02-22':'2020-03-23', ['AAA', 'BTC']].fillna(0.0)
+    values = ((1 + window).cumprod() * [60000, 40000]).sum(axis=1)
+    assert np.isclose(scenario['portfolio_return'], values.iloc[-1] / 100000 - 1, atol=1e-6)
+    assert np.isclose(scenario['benchmark_return'], (1 + window.index.to_series().map(returns['SPY']).fillna(0.0)).prod() - 1, atol=1e-6)
@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+from wash_sale import WashSaleIndex
+from analytics import identify_tax_loss_harvesting
+
+
+def _txn(tid, symbol, ttype, date, qty, price):
+    return {'id': tid, 'symbol': symbol, 'transaction_type': ttype, 'transaction_date': date,
+            'quantity': qty, 'price': price, 'amount': qty * price, 'fees': 0.0}
+
+
+def test_loss_sale_with_repurchase_is_disallowed():
+    index = WashSaleIndex([
+        _txn(1, 'AAPL', 'buy', '2024-01-02', 10, 150.0),
+        _txn(2, 'AAPL', 'sell', '2024-03-01', 10, 120.0),   # $300 loss
+        _txn(3, 'AAPL', 'buy', '2024-03-15', 4, 118.0),     # replaces 4 of 10 shares
+        _txn(4, 'MSFT', 'buy', '2024-01-02', 5, 400.0),
+        _txn(5, 'MSFT', 'sell', '2024-06-01', 5, 350.0),    # loss, no replacement
+    ])
+
+    result = index.detect()
+
+    assert result['summary']['wash_sale_count'] == 1
+    wash = result['wash_sales'][0]
+    assert wash['symbol'] == 'AAPL'
+    assert wash['realized_loss'] == -300.0
+    assert wash['disallowed_loss'] == 120.0
+    assert wash['allowed_loss'] == -180.0
+
+    adjustment = result['basis_adjustments'][0]
+    assert adjustment['transaction_id'] == 3
+    assert adjustment['adjusted_cost_basis'] == 4 * 118.0 + 120.0
+
+    assert result['summary']['total_realized_loss'] == -550.0
+    assert result['summary']['total_disallowed_loss'] == 120.0
+
+
+def test_purchase_outside_window_is_not_replacement():
+    index = WashSaleIndex([
+        _txn(1, 'VTI', 'buy', '2024-01-02', 10, 200.0),
+        _txn(2, 'VTI', 'sell', '2024-03-01', 10, 180.0),
+        _txn(3, 'VTI', 'buy', '2024-04-01', 10, 170.0),     # 31 days later
+    ])
+
+    assert index.detect()['summary']['wash_sale_count'] == 0
+
+
+def test_harvest_suggestions_are_screened():
+    index = WashSaleIndex([
+        _txn(1, 'TSLA', 'buy', '2024-01-02', 10, 300.0),
+        _txn(2, 'TSLA', 'buy', '2024-05-20', 3, 250.0),
+        _txn(3, 'AMD', 'buy', '2024-05-25', 20, 160.0),
+    ])
+    holdings = pd.DataFrame([
+        {'Symbol': 'TSLA', 'Description': 'Tesla', 'Quantity': 10, 'NFS G/L ($)': -2500.0, 'NFS G/L (%)': -20.0, 'Value ($)': 10000.0},
+        {'Symbol': 'NKE', 'Description': 'Nike', 'Quantity': 100, 'NFS G/L ($)': -1500.0, 'NFS G/L (%)': -15.0, 'Value ($)': 8500.0},
+        {'Symbol': 'AMD', 'Description': 'AMD', 'Quantity': 20, 'NFS G/L ($)': -1200.0, 'NFS G/L (%)': -37.5, 'Value ($)': 2000.0},
+    ])
+
+    screened = identify_tax_loss_harvesting(holdings, wash_sale_index=index, as_of='2024-06-01')
+    by_symbol = {o['symbol']: o for o in screened}
+
+    # Selling 10 TSLA FIFO leaves the 3 May shares held: 3 of 10 shares are replaced
+    assert by_symbol['TSLA']['wash_sale_risk'] is True
+    assert by_symbol['TSLA']['conflicting_purchases'] == [{'transaction_id': 2, 'date': '2024-05-20', 'quantity': 3.0}]
+    assert by_symbol['TSLA']['estimated_tax_benefit'] == round(2500 * 0.24 * 0.7, 2)
+    assert by_symbol['NKE']['wash_sale_risk'] is False
+    assert by_symbol['NKE']['safe_to_repurchase_on'] == '2024-07-02'
+    # Selling the whole recent lot leaves nothing behind to replace it
+    assert by_symbol['AMD']['wash_sale_risk'] is False
+    assert by_symbol['AMD']['estimated_tax_benefit'] == 288.0
+
+    assert index.screen_sale('TSLA', '2024-06-01')['wash_sale_risk'] is False
+    partial = index.screen_sale('TSLA', '2024-06-01', quantity=12)
+    assert partial['replacement_shares'] == 1.0 and partial['safe_to_sell_on'] == '2024-06-20'
+
+
+def test_index_scales_to_large_histories():
+    rng = np.random.default_rng(0)
+    n = 100_000
+    days = pd.Timestamp('2015-01-01') + pd.to_timedelta(rng.integers(0, 3000, n), unit='D')
+    transactions = pd.DataFrame({
+        'id': np.arange(n),
+        'symbol': rng.choice([f'S{i}' for i in range(200)], n),
+        'transaction_type': rng.choice(['buy', 'buy', 'sell'], n),
+        'transaction_date': days,
+        'quantity': rng.integers(1, 50, n).astype(float),
+        'price': rng.uniform(10, 200, n),
+        'amount': 0.0,
+        'fees': 0.0,
+    })
+
+    result = WashSaleIndex(transactions).detect()
+
+    summary = result['summary']
+    assert summary['transactions_indexed'] == n and summary['symbols'] == 200
+    assert summary['wash_sale_count'] == len(result['wash_sales']) > 0
+    assert abs(summary['total_allowed_loss'] - (summary['total_realized_loss'] + summary['total_disallowed_loss'])) < 0.02
+    assert all(0 < w['disallowed_loss'] <= -w['realized_loss'] + 0.01 for w in result['wash_sales'])
+
+
+def test_wash_sale_endpoint_screens_the_quantity_held():
+    from datetime import datetime, timedelta
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from db import Base
+    from models import User, Portfolio, Holding, Transaction, TransactionType
+    from portfolio_api import get_wash_sales
+
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    user = User(email='tax@example.com', hashed_password='x')
+    session.add(user)
+    session.flush()
+    portfolio = Portfolio(name='Taxable', user_id=user.id)
+    session.add(portfolio)
+    session.flush()
+
+    # 13 shares indexed, only 10 still held: selling them FIFO leaves 3 recent shares behind
+    session.add(Holding(portfolio_id=portfolio.id, ticker='TSLA', symbol='TSLA', quantity=10, price=180.0, cost_basis=300.0))
+    now = datetime.utcnow()
+    for days_ago, qty, price in [(90, 10, 300.0), (10, 3, 200.0)]:
+        session.add(Transaction(
+            user_id=user.id, portfolio_id=portfolio.id, transaction_type=TransactionType.BUY, symbol='TSLA',
+            quantity=qty, price=price, amount=qty * price, fees=0.0, transaction_date=now - timedelta(days=days_ago)
+        ))
+    session.commit()
+
+    result = get_wash_sales(portfolio.id, tax_threshold=-1000, session=session)
+
+    opportunity = result['harvest_opportunities'][0]
+    assert opportunity['quantity'] == 10.0
+    assert opportunity['wash_sale_risk'] is True
+    assert [c['quantity'] for c in opportunity['conflicting_purchases']] == [3.0]
+    assert opportunity['disallowed_fraction'] == 0.3
+    session.close()